@@ -0,0 +1,265 @@
+"""
+Pre-computed summaries for the Personal-Finance Tracker.
+
+Every view is answered from a small (year, month, category) -> (sum, count)
+cube instead of re-scanning the full transactions DataFrame. The cube is
+updated in place as transactions are added, so it never needs rebuilding.
+"""
+
+import pandas as pd
+
+
+class SummaryCube:
+    """
+    Sum and count of transactions for every (year, month, category) cell.
+
+    Sums are kept in pence as integers so totals are exact. The cube has at
+    most 12 * 9 cells per year, so any summary can be read from it without
+    touching the transactions again.
+
+    Alongside the cells, running totals per category, per (year, month), per
+    (year, category), for income and expenses, and the overall balance are
+    kept, all of which add() updates in O(1).
+    """
+
+    def __init__(self, income_categories, cells = None, version = None):
+        """
+        Initialises the cube.
+
+        Parameters
+        ----------
+        income_categories : list of str
+            Categories counted as income; every other category is an expense.
+        cells : dict, optional
+            Maps (year, month, category) to a [sum in pence, count] pair.
+        version : int, optional
+            The data version the cube was built from.
+        """
+
+        self.income_categories = set(income_categories)
+        self.cells = {}
+        self.categories = {} # category -> [sum in pence, count]
+        self.months = {} # (year, month) -> [sum in pence, count], across all categories
+        self.category_years = {} # (year, category) -> [sum in pence, count]
+        self.income = [0, 0]
+        self.expenses = [0, 0]
+        self.balance = 0 # Net balance (income + expenses) in pence
+        self.version = version
+
+        for key, (total, count) in (cells or {}).items():
+            self.add_to_cell(key, total, count)
+
+    @classmethod
+    def from_chunks(cls, chunks, income_categories, version = None):
+        """
+        Builds the cube from transactions streamed in chunks, one pass over the data.
+
+        Only one chunk is held in memory at a time, and because sums are exact
+        integers the result is identical to building from the full DataFrame.
+
+        Parameters
+        ----------
+        chunks : iterable of DataFrame
+            Chunks of transactions, with Date, Category and Amount (in pence) columns.
+        income_categories : list of str
+            Categories counted as income.
+        version : int, optional
+            The data version of the transactions.
+
+        Returns
+        -------
+        SummaryCube
+            The populated cube.
+        """
+
+        cube = cls(income_categories, version = version)
+        for chunk in chunks:
+            cube.add_dataframe(chunk)
+        return cube
+
+    @classmethod
+    def from_dataframe(cls, df, income_categories, version = None):
+        """
+        Builds the cube with a single groupby over the transactions.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions, with Date, Category and Amount (in pence) columns.
+        income_categories : list of str
+            Categories counted as income.
+        version : int, optional
+            The data version of df.
+
+        Returns
+        -------
+        SummaryCube
+            The populated cube.
+        """
+
+        return cls.from_chunks([df], income_categories, version)
+
+    def add_dataframe(self, df):
+        """
+        Adds every transaction in a DataFrame to the cube, with one groupby.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions with Date, Category and Amount (in pence) columns.
+
+        Returns
+        -------
+        None
+        """
+
+        if df.empty:
+            return
+
+        # Group on a single integer key (months since January 1970, and the category's code) rather than three columns
+        months = df["Date"].values.astype("datetime64[M]").astype("int64")
+        if isinstance(df["Category"].dtype, pd.CategoricalDtype):
+            category_codes, categories = df["Category"].cat.codes.values.astype("int64"), df["Category"].cat.categories
+        else:
+            category_codes, categories = pd.factorize(df["Category"])
+        pence = df["Amount"].values.astype("int64")
+
+        grouped = pd.Series(pence).groupby(months * len(categories) + category_codes).agg(["sum", "count"])
+
+        for key, total, count in zip(grouped.index, grouped["sum"], grouped["count"]):
+            month_index, code = divmod(int(key), len(categories))
+            year, month = divmod(month_index, 12)
+            self.add_to_cell((1970 + year, month + 1, categories[code]), int(total), int(count))
+
+    def add(self, date, category, pence):
+        """
+        Adds a single transaction to the cube in O(1).
+
+        Parameters
+        ----------
+        date : datetime
+            The date of the transaction.
+        category : str
+            The category of the transaction.
+        pence : int
+            The amount in pence.
+
+        Returns
+        -------
+        None
+        """
+
+        self.add_to_cell((date.year, date.month, category), pence, 1)
+
+    def add_to_cell(self, key, total, count):
+        """
+        Adds a sum (in pence) and count to one cell and to every running total that covers it.
+        """
+
+        year, month, category = key
+
+        for table, table_key in ((self.cells, key), (self.categories, category), (self.months, (year, month)), (self.category_years, (year, category))):
+            cell = table.setdefault(table_key, [0, 0])
+            cell[0] += total
+            cell[1] += count
+
+        side = self.income if category in self.income_categories else self.expenses
+        side[0] += total
+        side[1] += count
+        self.balance += total
+
+    def cumulative_balance(self):
+        """
+        Returns the running net balance in pence at the end of each (year, month), in date order.
+
+        Adding a transaction to an earlier month shifts every later month, so
+        the series is derived from the per-month totals (one value per month)
+        rather than stored.
+        """
+
+        running = 0
+        series = {}
+        for key in sorted(self.months):
+            running += self.months[key][0]
+            series[key] = running
+        return series
+
+    def differences(self, other):
+        """
+        Compares this cube with another one, e.g. a full recompute of an incrementally maintained cube.
+
+        Parameters
+        ----------
+        other : SummaryCube
+            The cube to compare against.
+
+        Returns
+        -------
+        list of str
+            A description of every mismatch; empty if the cubes agree.
+        """
+
+        mismatches = []
+
+        for name in ("cells", "categories", "months", "category_years", "income", "expenses", "balance"):
+            mine = getattr(self, name)
+            theirs = getattr(other, name)
+
+            if isinstance(mine, dict):
+                for key in sorted(set(mine) | set(theirs), key = str):
+                    if mine.get(key) != theirs.get(key):
+                        mismatches.append(f"{name}[{key}]: {mine.get(key)} != {theirs.get(key)}")
+            elif mine != theirs:
+                mismatches.append(f"{name}: {mine} != {theirs}")
+
+        return mismatches
+
+    def category_totals(self, month = None, year = None):
+        """
+        Returns the sum in pence for each category, optionally limited to one month and/or year.
+        """
+
+        if month is None and year is None:
+            return {category: cell[0] for category, cell in self.categories.items()}
+
+        totals = {}
+        for (y, m, category), (total, count) in self.cells.items():
+            if (month is None or m == month) and (year is None or y == year):
+                totals[category] = totals.get(category, 0) + total
+        return totals
+
+    def month_totals(self, categories):
+        """
+        Returns a {month: [sum in pence, count]} dict for the given categories, across all years.
+        """
+
+        totals = {}
+        for (y, m, category), (total, count) in self.cells.items():
+            if category in categories:
+                cell = totals.setdefault(m, [0, 0])
+                cell[0] += total
+                cell[1] += count
+        return totals
+
+    def total(self, categories, month = None, year = None):
+        """
+        Returns the sum in pence of the given categories, optionally limited to one month and/or year.
+        """
+
+        return sum(total for (y, m, category), (total, count) in self.cells.items()
+                   if category in categories and (month is None or m == month) and (year is None or y == year))
+
+    def count(self, categories, month = None, year = None):
+        """
+        Returns the number of transactions in the given categories, optionally limited to one month and/or year.
+        """
+
+        return sum(count for (y, m, category), (total, count) in self.cells.items()
+                   if category in categories and (month is None or m == month) and (year is None or y == year))
+
+    def years(self):
+        """
+        Returns the years that have at least one transaction, in order.
+        """
+
+        return sorted({year for year, month in self.months})
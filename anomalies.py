@@ -0,0 +1,371 @@
+"""
+Anomaly detection for the Personal-Finance Tracker.
+
+Two kinds of anomaly are flagged:
+
+    unusual amounts     a transaction far larger than its category's
+                        typical size: at least Z_THRESHOLD standard
+                        deviations above the category's mean, and above its
+                        QUANTILE quantile, so a heavy-tailed category isn't
+                        flagged on the standard deviation alone
+    monthly spikes      a month whose spend in a category is at least
+                        SPIKE_THRESHOLD standard deviations above, and
+                        SPIKE_RATIO times, its mean over the previous
+                        SPIKE_MONTHS months
+
+Amounts are judged against running statistics of every category's
+transaction sizes (in pence, ignoring the sign): their count, mean and
+variance, merged batch by batch with Chan's parallel update, and a
+logarithmic histogram from which any quantile can be read to within
+SKETCH_ACCURACY of its value (a DDSketch-style quantile sketch). The
+statistics are updated in O(1) per transaction as rows are added, and are
+saved next to the ledger (category_stats.npz) tagged with the store version
+they cover, like the description index.
+
+Scoring transactions and finding spikes are array operations over the
+Amount and Category columns and the summary cube's cells, so a full scan of
+a ledger with millions of rows, or of every bulk import, takes well under a
+second.
+"""
+
+import io
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from budgets import period_name
+from storage import write_atomic
+
+STATS_FORMAT = 1
+SKETCH_ACCURACY = 0.01 # Relative error of a quantile read from the sketch
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY) # Each histogram bin covers sizes from gamma^(i-1) to gamma^i pence
+SKETCH_BINS = 1500 # Covers sizes up to about £100 billion
+
+
+class CategoryStats:
+    """
+    Running count, mean and variance of each category's transaction sizes, with a quantile sketch of them.
+    """
+
+    Z_THRESHOLD = 4.0 # Standard deviations above the category's mean before an amount is unusual
+    QUANTILE = 0.99 # An unusual amount must also be above this quantile of the category's sizes
+    MIN_COUNT = 30 # Transactions a category needs before any of them is judged
+    SPIKE_THRESHOLD = 3.0 # Standard deviations above the previous months' mean before a month's spend is a spike
+    SPIKE_RATIO = 1.5 # A spike must also be at least this many times the previous months' mean
+    SPIKE_MONTHS = 12 # Previous months a month's spend is compared with
+    MIN_MONTHS = 3 # Previous months a category needs before a month of it is judged
+
+    def __init__(self, categories, path = None, version = None):
+        """
+        Initialises empty statistics.
+
+        Parameters
+        ----------
+        categories : list of str
+            The valid categories, in the order of the statistics' rows.
+        path : str or Path, optional
+            Where the statistics are saved.
+        version : int, optional
+            The data version of the transactions the statistics cover.
+        """
+
+        self.categories = list(categories)
+        self.codes = {category: code for code, category in enumerate(self.categories)}
+        self.path = None if path is None else Path(path)
+        self.version = version
+        self.count = np.zeros(len(self.categories), dtype = "int64")
+        self.mean = np.zeros(len(self.categories)) # Mean size in pence
+        self.m2 = np.zeros(len(self.categories)) # Sum of squared differences from the mean
+        self.sketch = np.zeros((len(self.categories), SKETCH_BINS), dtype = "int64") # Transactions per size bin
+
+    @classmethod
+    def from_batches(cls, batches, categories, path = None, version = None):
+        """
+        Builds the statistics from transactions read in batches, one pass over the data.
+
+        Parameters
+        ----------
+        batches : iterable of DataFrame
+            Transactions with Category and Amount (in pence) columns.
+        categories : list of str
+            The valid categories.
+        path : str or Path, optional
+            Where the statistics are saved.
+        version : int, optional
+            The data version of the transactions.
+
+        Returns
+        -------
+        CategoryStats
+            The populated statistics.
+        """
+
+        stats = cls(categories, path, version)
+        for batch in batches:
+            stats.add_dataframe(batch)
+        return stats
+
+    @classmethod
+    def load(cls, path, categories, store_version):
+        """
+        Reads saved statistics if they were saved for the store's current version.
+
+        Parameters
+        ----------
+        path : str or Path
+            The saved statistics.
+        categories : list of str
+            The valid categories.
+        store_version : str
+            The store's current version (see TransactionStore.version).
+
+        Returns
+        -------
+        CategoryStats or None
+            The statistics, or None if there are none, or the ledger or the categories have changed since they were saved.
+        """
+
+        path = Path(path)
+        try:
+            with np.load(path) as saved:
+                state = {name: saved[name] for name in saved.files}
+        except (OSError, ValueError):
+            return None
+
+        if int(state["format"]) != STATS_FORMAT or str(state["store_version"]) != store_version or state["categories"].tolist() != list(categories):
+            return None
+
+        stats = cls(categories, path)
+        stats.count, stats.mean, stats.m2, stats.sketch = state["count"], state["mean"], state["m2"], state["sketch"]
+        return stats
+
+    def state(self):
+        """
+        Returns copies of the statistics' arrays, e.g. to save them after a lock has been released.
+        """
+
+        return {"count": self.count.copy(), "mean": self.mean.copy(), "m2": self.m2.copy(), "sketch": self.sketch.copy()}
+
+    def save(self, store_version, state = None):
+        """
+        Writes the statistics atomically, tagged with the store version they match.
+
+        Parameters
+        ----------
+        store_version : str
+            The store's version once the transactions they cover were saved.
+        state : dict, optional
+            The state() to write, if it was taken earlier (e.g. under a lock); defaults to the current state.
+
+        Returns
+        -------
+        None
+        """
+
+        buffer = io.BytesIO()
+        np.savez(buffer, format = STATS_FORMAT, store_version = store_version, categories = np.array(self.categories), **(state or self.state()))
+        write_atomic(self.path, buffer.getvalue())
+
+    def category_codes(self, categories):
+        """
+        Returns the code of each value of a Category column, -1 for an unknown category.
+        """
+
+        if isinstance(categories.dtype, pd.CategoricalDtype) and list(categories.cat.categories) == self.categories:
+            return categories.cat.codes.values.astype("int64")
+        return pd.Categorical(categories, categories = self.categories).codes.astype("int64")
+
+    def add_dataframe(self, df):
+        """
+        Adds many transactions at once, merging each category's batch statistics into the running ones.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions with Category and Amount (in pence) columns.
+
+        Returns
+        -------
+        None
+        """
+
+        codes = self.category_codes(df["Category"])
+        known = codes >= 0
+        codes, sizes = codes[known], np.abs(df["Amount"].values[known].astype("float64"))
+        if len(codes) == 0:
+            return
+
+        ncat = len(self.categories)
+        count = np.bincount(codes, minlength = ncat)
+        has_rows = count > 0
+        mean = np.bincount(codes, weights = sizes, minlength = ncat) / np.maximum(count, 1)
+        m2 = np.bincount(codes, weights = (sizes - mean[codes]) ** 2, minlength = ncat)
+
+        # Chan et al.'s update merges the batch's count, mean and M2 into the running ones
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = np.where(has_rows, self.mean + delta * count / np.maximum(total, 1), self.mean)
+        self.m2 = np.where(has_rows, self.m2 + m2 + delta ** 2 * self.count * count / np.maximum(total, 1), self.m2)
+        self.count = total
+
+        self.sketch += np.bincount(codes * SKETCH_BINS + sketch_bins(sizes), minlength = ncat * SKETCH_BINS).reshape(ncat, SKETCH_BINS)
+
+    def add(self, category, pence):
+        """
+        Adds one transaction in O(1), with Welford's update.
+        """
+
+        code = self.codes.get(category)
+        if code is None:
+            return
+
+        size = abs(float(pence))
+        self.count[code] += 1
+        delta = size - self.mean[code]
+        self.mean[code] += delta / self.count[code]
+        self.m2[code] += delta * (size - self.mean[code])
+        self.sketch[code, min(math.ceil(math.log(max(size, 1)) / math.log(SKETCH_GAMMA)), SKETCH_BINS - 1)] += 1
+
+    def std(self):
+        """
+        Returns each category's sample standard deviation of sizes, 0 where it has fewer than two transactions.
+        """
+
+        return np.sqrt(np.where(self.count > 1, self.m2 / np.maximum(self.count - 1, 1), 0))
+
+    def quantile(self, q):
+        """
+        Returns each category's q quantile of sizes in pence, read from the sketch (0 for an empty category).
+        """
+
+        cumulative = np.cumsum(self.sketch, axis = 1)
+        rank = q * (self.count - 1) # The rank of the quantile among each category's sizes, counting from 0
+        bins = (cumulative <= rank[:, None]).sum(axis = 1).clip(max = SKETCH_BINS - 1)
+        return np.where(self.count > 0, 2 * SKETCH_GAMMA ** bins / (SKETCH_GAMMA + 1), 0)
+
+    def unusual_amounts(self, df, z_threshold = None):
+        """
+        Finds the transactions whose size is far above their category's typical size.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions with HEADERS columns and Amount in pence.
+        z_threshold : float, optional
+            Standard deviations above the mean; defaults to Z_THRESHOLD.
+
+        Returns
+        -------
+        DataFrame
+            The unusual transactions, largest score first, with their Date,
+            Category, Amount and Description, the category's "Typical" (median)
+            size and "Mean" size in pounds, and their "Score" in standard deviations.
+        """
+
+        z_threshold = CategoryStats.Z_THRESHOLD if z_threshold is None else z_threshold
+        codes = self.category_codes(df["Category"])
+        sizes = np.abs(df["Amount"].values.astype("float64"))
+
+        std, upper = self.std(), self.quantile(CategoryStats.QUANTILE)
+        known = codes >= 0
+        codes = np.where(known, codes, 0)
+        judged = known & (self.count[codes] >= CategoryStats.MIN_COUNT) & (std[codes] > 0)
+        score = np.where(judged, (sizes - self.mean[codes]) / np.where(std[codes] > 0, std[codes], 1), 0)
+        flagged = judged & (score >= z_threshold) & (sizes > upper[codes])
+
+        unusual = df.loc[flagged, ["Date", "Category", "Amount", "Description"]].copy()
+        unusual["Amount"] = unusual["Amount"] / 100
+        unusual["Typical"] = self.quantile(0.5)[codes[flagged]] / 100
+        unusual["Mean"] = self.mean[codes[flagged]] / 100
+        unusual["Score"] = score[flagged]
+        return unusual.sort_values("Score", ascending = False, ignore_index = True)
+
+
+def sketch_bins(sizes):
+    """
+    Returns the sketch bin of each size in pence (sizes under a penny share the first bin).
+    """
+
+    return np.minimum(np.ceil(np.log(np.maximum(sizes, 1)) / math.log(SKETCH_GAMMA)), SKETCH_BINS - 1).astype("int64")
+
+
+def monthly_spikes(cells, categories, threshold = None):
+    """
+    Finds the months whose spend in a category is far above the months before, from the summary cube's cells.
+
+    Every category's monthly spend is laid out as a (month, category) table
+    covering every calendar month, and the mean and standard deviation of
+    each month's previous SPIKE_MONTHS months are read from cumulative sums
+    of it, so every month of every category is judged at once.
+
+    Parameters
+    ----------
+    cells : dict
+        The summary cube's {(year, month, category): [sum in pence, count]} cells.
+    categories : list of str
+        The expense categories to judge.
+    threshold : float, optional
+        Standard deviations above the previous months' mean; defaults to CategoryStats.SPIKE_THRESHOLD.
+
+    Returns
+    -------
+    DataFrame
+        One row per spike, in date order, with its year, month, category,
+        "spent" and the previous months' mean ("typical") in pounds, and its
+        "score" in standard deviations (inf if the previous months' spend never varied).
+    """
+
+    threshold = CategoryStats.SPIKE_THRESHOLD if threshold is None else threshold
+    codes = {category: code for code, category in enumerate(categories)}
+    keys = [(year * 12 + month - 1, codes[category], -total) for (year, month, category), (total, count) in cells.items() if category in codes]
+    if not keys:
+        return pd.DataFrame(columns = ["year", "month", "category", "spent", "typical", "score"])
+
+    months, category_codes, spent = (np.array(column, dtype = "int64") for column in zip(*keys))
+    first = months.min()
+    table = np.zeros((months.max() - first + 1, len(categories)))
+    table[months - first, category_codes] = spent
+
+    # Months before a category's first transaction don't count towards its history
+    started = np.full(len(categories), len(table))
+    np.minimum.at(started, category_codes, months - first)
+
+    # Each month's history is the previous SPIKE_MONTHS months, read from prefix sums of the spend and its square
+    prefix = np.vstack([np.zeros((1, len(categories))), np.cumsum(table, axis = 0)])
+    prefix_squares = np.vstack([np.zeros((1, len(categories))), np.cumsum(table ** 2, axis = 0)])
+    rows, columns = np.arange(len(table))[:, None], np.arange(len(categories))[None, :]
+    start = np.maximum(rows - CategoryStats.SPIKE_MONTHS, started[None, :])
+    history = rows - start
+    valid = history >= CategoryStats.MIN_MONTHS
+
+    n = np.maximum(history, 2) # Only months with at least MIN_MONTHS of history are judged, so this only avoids dividing by zero
+    total = prefix[rows, columns] - prefix[start, columns]
+    squares = prefix_squares[rows, columns] - prefix_squares[start, columns]
+    mean = total / n
+    std = np.sqrt(np.maximum(squares - total * mean, 0) / (n - 1))
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        score = np.where(std > 0, (table - mean) / std, np.where(table > mean, np.inf, 0))
+    flagged = valid & (table > 0) & (score >= threshold) & (table >= CategoryStats.SPIKE_RATIO * mean)
+
+    month_index, category_index = np.nonzero(flagged)
+    return pd.DataFrame({
+        "year": (month_index + first) // 12,
+        "month": (month_index + first) % 12 + 1,
+        "category": [categories[code] for code in category_index],
+        "spent": table[month_index, category_index] / 100,
+        "typical": mean[month_index, category_index] / 100,
+        "score": score[month_index, category_index]
+    })
+
+
+def anomaly_messages(unusual, spikes):
+    """
+    Returns a line for the user about every unusual transaction and monthly spike.
+    """
+
+    messages = [f"Unusual {row.Category} transaction on {row.Date:%d-%m-%Y}: £{abs(row.Amount):.2f} for \"{row.Description}\" (typically £{row.Typical:.2f}, {row.Score:.1f} standard deviations above the mean)" for row in unusual.itertuples()]
+    messages += [f"{row.category} spending spike in {period_name(row.year, row.month)}: £{row.spent:.2f} against a typical £{row.typical:.2f} a month" for row in spikes.itertuples()]
+    return messages
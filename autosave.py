@@ -0,0 +1,99 @@
+"""
+Background saving for the Personal-Finance Tracker's interactive menu.
+
+Saving can take a while on a large ledger (appending to the journal is quick,
+but a compaction or a checkpoint rewrites files), so the menu hands saves to
+an AutoSaver instead of waiting for them. Its thread runs the tracker's save
+function whenever a save is requested.
+
+The request queue holds at most one request: asking for a save while one is
+already queued adds nothing, because the queued save will write every
+transaction staged by the time it runs. A burst of changes is therefore
+written in one go. The save function itself decides what to write (see
+FinanceTracker.write_unsaved), and transactions stay staged until they have
+been written, so a save that fails loses nothing and the next one retries it.
+"""
+
+import queue
+import threading
+
+from instrumentation import tracer
+
+
+class AutoSaver:
+    """
+    A background thread running a save function on request, coalescing requests that arrive while one is queued.
+    """
+
+    QUEUE_SIZE = 1 # Requests waiting to run; more would only write what the queued one already will
+
+    def __init__(self, save):
+        """
+        Initialises the saver and starts its thread.
+
+        Parameters
+        ----------
+        save : callable
+            Writes everything that hasn't been saved yet; takes no arguments.
+        """
+
+        self.save = save
+        self.requests = queue.Queue(maxsize = AutoSaver.QUEUE_SIZE)
+        self.errors = queue.Queue() # Exceptions raised by save, for the menu to report
+        self.thread = threading.Thread(target = self.run, name = "autosave", daemon = True)
+        self.thread.start()
+
+    def request(self):
+        """
+        Asks for a save without waiting for it.
+        """
+
+        try:
+            self.requests.put_nowait(True)
+        except queue.Full:
+            pass # A save is already queued, and it will write these changes too
+
+    def run(self):
+        """
+        Runs a save for each request until close() queues None.
+        """
+
+        while True:
+            request = self.requests.get()
+            try:
+                if request is None:
+                    return
+                with tracer.span("autosave"):
+                    self.save()
+            except Exception as e:
+                self.errors.put(e)
+            finally:
+                self.requests.task_done()
+
+    def take_errors(self):
+        """
+        Returns the exceptions saves have raised since the last call.
+        """
+
+        errors = []
+        while not self.errors.empty():
+            errors.append(self.errors.get_nowait())
+        return errors
+
+    def flush(self):
+        """
+        Waits for every requested save to finish and returns the exceptions they raised.
+        """
+
+        self.requests.join()
+        return self.take_errors()
+
+    def close(self):
+        """
+        Waits for every requested save to finish, stops the thread and returns the exceptions the saves raised.
+        """
+
+        errors = self.flush()
+        self.requests.put(None)
+        self.thread.join()
+        return errors
@@ -0,0 +1,78 @@
+"""
+Benchmark for adding transactions to ledgers of increasing size.
+
+Times FinanceTracker.stage_transaction (the per-row cost paid while the user
+or a script enters transactions) against the old approach of concatenating a
+1-row DataFrame for every transaction. Staging should stay flat as the ledger
+grows, while the per-row concat grows with the number of existing rows.
+
+Run from the repository root:
+
+    python benchmarks/bench_add_transaction.py
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from synthetic import load_synthetic # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+
+LEDGER_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+ADDS_PER_RUN = 500
+CONCAT_LIMIT = 100_000 # The per-row concat baseline is too slow to be worth running past this size
+
+
+def time_staged_adds(ledger):
+    """
+    Returns the mean time per add (in microseconds) when staging, and the time of the final flush.
+    """
+
+    ft = FinanceTracker()
+    ft.df = ledger
+
+    start = time.perf_counter()
+    for i in range(ADDS_PER_RUN):
+        ft.stage_transaction(datetime(2025, 6, 1), "Food", -5.0, "Lunch")
+    per_add = (time.perf_counter() - start) / ADDS_PER_RUN * 1e6
+
+    start = time.perf_counter()
+    ft.flush_pending_transactions()
+    flush = (time.perf_counter() - start) * 1e3
+
+    return per_add, flush
+
+
+def time_concat_adds(ledger):
+    """
+    Returns the mean time per add (in microseconds) when concatenating one row at a time.
+    """
+
+    df = ledger
+    transaction = {"Date": datetime(2025, 6, 1), "Category": "Food", "Amount": -500, "Description": "Lunch"}
+
+    start = time.perf_counter()
+    for i in range(ADDS_PER_RUN):
+        df = pd.concat([df, pd.DataFrame([transaction])], ignore_index = True)
+    return (time.perf_counter() - start) / ADDS_PER_RUN * 1e6
+
+
+def main():
+    # Run in an empty directory so FinanceTracker doesn't load (or overwrite) a real transactions.csv
+    os.chdir(tempfile.mkdtemp())
+
+    print(f"{'Ledger rows':>12} | {'Staged add (us)':>15} | {'Flush (ms)':>10} | {'Per-row concat (us)':>19}")
+    print("-" * 66)
+
+    for rows in LEDGER_SIZES:
+        ledger = load_synthetic(rows)
+        per_add, flush = time_staged_adds(ledger)
+        concat = f"{time_concat_adds(ledger):.1f}" if rows <= CONCAT_LIMIT else "skipped"
+        print(f"{rows:>12,} | {per_add:>15.2f} | {flush:>10.2f} | {concat:>19}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for flagging unusual transactions and monthly spending spikes.
+
+On synthetic ledgers (see synthetic.py) of increasing size, this times:
+
+    build stats     one pass over the ledger for every category's count,
+                    mean, variance and quantile sketch (CategoryStats)
+    full scan       scoring every transaction against its category's
+                    statistics, vectorized over the Amount and Category
+                    columns (CategoryStats.unusual_amounts)
+    row by row      the same scores worked out in a Python loop over the
+                    rows, timed on the first --sample rows and scaled up
+    import          scoring a --batch row bulk import against the ledger's
+                    statistics and adding it to them, as import-csv does
+    spikes          judging every month of every expense category from the
+                    summary cube's cells (anomalies.monthly_spikes)
+
+Run from the repository root:
+
+    python benchmarks/bench_anomalies.py [--rows 100000 1000000 10000000] [--batch 10000] [--sample 100000]
+"""
+
+import argparse
+
+from synthetic import load_synthetic, timed # First, as it puts the repository root on sys.path
+from aggregates import SummaryCube
+from anomalies import CategoryStats, monthly_spikes
+from main import FinanceTracker
+
+
+def row_by_row(df, stats):
+    """
+    Counts the unusual transactions with a Python loop over the rows, the way the scan would be written without arrays.
+    """
+
+    std, upper = stats.std(), stats.quantile(CategoryStats.QUANTILE)
+    flagged = 0
+    for category, amount in zip(df["Category"], df["Amount"]):
+        code = stats.codes.get(category)
+        if code is None or stats.count[code] < CategoryStats.MIN_COUNT or std[code] == 0:
+            continue
+        size = abs(amount)
+        if (size - stats.mean[code]) / std[code] >= CategoryStats.Z_THRESHOLD and size > upper[code]:
+            flagged += 1
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Time flagging unusual transactions with running per-category statistics")
+    parser.add_argument("--rows", type = int, nargs = "+", default = [100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--batch", type = int, default = 10_000, help = "rows in the simulated bulk import (default: %(default)s)")
+    parser.add_argument("--sample", type = int, default = 100_000, help = "rows the row-by-row loop is timed on (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{'Ledger rows':>12} | {'Build stats (ms)':>16} | {'Full scan (ms)':>14} | {'Row by row (ms)':>15} | {'Import (ms)':>11} | {'Spikes (ms)':>11} | {'Flagged':>7}")
+    print("-" * 106)
+
+    for rows in args.rows:
+        df = load_synthetic(rows)
+        cube = SummaryCube.from_dataframe(df, FinanceTracker.INCOME_CATEGORIES)
+
+        build_ms, stats = timed(lambda: CategoryStats.from_batches([df], FinanceTracker.VALID_CATEGORIES))
+        scan_ms, unusual = timed(lambda: stats.unusual_amounts(df))
+
+        sample = df.head(args.sample)
+        loop_ms = timed(lambda: row_by_row(sample, stats))[0] * rows / len(sample)
+
+        batch = df.tail(args.batch)
+
+        def import_batch():
+            stats.unusual_amounts(batch)
+            stats.add_dataframe(batch)
+
+        import_ms = timed(import_batch)[0]
+        spikes_ms = timed(lambda: monthly_spikes(cube.cells, FinanceTracker.EXPENSE_CATEGORIES))[0]
+
+        print(f"{rows:>12,} | {build_ms:>16.0f} | {scan_ms:>14.0f} | {loop_ms:>15.0f} | {import_ms:>11.1f} | {spikes_ms:>11.1f} | {len(unusual):>7,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark for how long saving holds up the interactive menu.
+
+A synthetic ledger (see synthetic.py) is loaded, and one transaction at a
+time is staged and saved with FinanceTracker.save, as add_transaction does
+when the user answers "No". The journal is compacted every --compact-every
+saves, and every compaction also writes a checkpoint, which rewrites a
+snapshot of the whole ledger. This is run twice:
+
+    sync        FinanceTracker.save writes before returning, as the other commands do
+    autosave    the menu's AutoSaver writes on its thread (see autosave.py)
+
+The time FinanceTracker.save takes is what the user waits for before the
+next prompt. In autosave mode the time until every save has finished is
+printed too.
+
+Run from the repository root:
+
+    python benchmarks/bench_autosave.py [--rows 5000000] [--saves 30] [--compact-every 10]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import write_synthetic # First, as it puts the repository root on sys.path
+from autosave import AutoSaver
+from main import FinanceTracker
+from storage import LedgerStore
+
+
+def run(path, saves, autosave):
+    """
+    Returns the time of every FinanceTracker.save call in milliseconds, and the milliseconds until all were written.
+    """
+
+    ft = FinanceTracker(path)
+    if autosave:
+        ft.autosaver = AutoSaver(ft.write_unsaved)
+
+    timings = []
+    began = time.perf_counter()
+    for i in range(saves):
+        ft.stage_transaction(datetime(2024, 12, 31), "Food", -4.5, f"Benchmark transaction {i}")
+        start = time.perf_counter()
+        ft.save()
+        timings.append((time.perf_counter() - start) * 1e3)
+        time.sleep(0.05) # The user typing the next transaction
+
+    if autosave:
+        assert not ft.autosaver.close()
+    assert not ft.unsaved_transactions
+    return timings, (time.perf_counter() - began) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare how long synchronous and background saves block the menu")
+    parser.add_argument("--rows", type = int, default = 5_000_000)
+    parser.add_argument("--saves", type = int, default = 30)
+    parser.add_argument("--compact-every", type = int, default = 10, help = "journal rows before a compaction (default: %(default)s)")
+    args = parser.parse_args()
+
+    LedgerStore.COMPACT_EVERY = args.compact_every
+
+    print(f"{args.rows:,} transactions, {args.saves} saves, compacting every {args.compact_every}\n")
+    print(f"{'Mode':>8} | {'Median (ms)':>11} | {'Max (ms)':>9} | {'Total (ms)':>10}")
+    print("-" * 48)
+
+    for mode in ("sync", "autosave"):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "transactions.ledger"
+            write_synthetic(path, args.rows)
+            FinanceTracker(path) # Write the first checkpoint, so neither run starts with one
+
+            timings, total = run(path, args.saves, mode == "autosave")
+            print(f"{mode:>8} | {statistics.median(timings):>11.2f} | {max(timings):>9.2f} | {total:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
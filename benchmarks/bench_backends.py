@@ -0,0 +1,67 @@
+"""
+Benchmark comparing the binary ledger and SQLite storage backends.
+
+The same synthetic transactions are written to each backend in a temporary
+directory, then each backend is timed on:
+
+    bulk insert     writing every transaction (as migrate does)
+    load            reading every transaction into a DataFrame
+    append batch    saving a batch of new transactions
+    summary         building the summary cube from the store's own totals
+    month read      reading a single month's transactions
+
+Run from the repository root:
+
+    python benchmarks/bench_backends.py [--rows 1000000] [--batch 100]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from synthetic import load_synthetic, timed # First, as it puts the repository root on sys.path
+from aggregates import SummaryCube
+from main import FinanceTracker
+from storage import open_store
+
+BACKENDS = {"ledger": "transactions.ledger", "sqlite": "transactions.sqlite"}
+RUNS = 5
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type = int, default = 1_000_000)
+    parser.add_argument("--batch", type = int, default = 100)
+    args = parser.parse_args()
+
+    df = load_synthetic(args.rows)
+    batch = load_synthetic(args.batch, seed = 1)
+    results = {}
+    balances = set()
+
+    for backend, name in BACKENDS.items():
+        with tempfile.TemporaryDirectory() as workdir:
+            store = open_store(backend, Path(workdir) / name, FinanceTracker.VALID_CATEGORIES)
+            store.open()
+
+            results[backend] = {"bulk insert": timed(lambda: store.bulk_insert([df]))[0]}
+            results[backend]["load"], loaded = timed(store.load)
+            results[backend]["append batch"] = timed(lambda: store.append(batch), RUNS)[0]
+            results[backend]["summary"], cube = timed(lambda: SummaryCube(FinanceTracker.INCOME_CATEGORIES, store.summary_cells()), RUNS)
+            results[backend]["month read"] = timed(lambda: store.read_months((2020, 6), (2020, 6)), RUNS)[0]
+
+            assert len(loaded) == args.rows
+            balances.add(cube.balance)
+
+    if len(balances) > 1:
+        raise AssertionError("The backends' summaries differ")
+
+    print(f"{args.rows:,} transactions, append batches of {args.batch}")
+    print(f"{'Operation':>14} | " + " | ".join(f"{backend + ' (ms)':>12}" for backend in BACKENDS))
+    print("-" * (17 + 15 * len(BACKENDS)))
+    for operation in results["ledger"]:
+        print(f"{operation:>14} | " + " | ".join(f"{results[backend][operation]:>12.1f}" for backend in BACKENDS))
+
+
+if __name__ == "__main__":
+    main()
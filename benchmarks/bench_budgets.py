@@ -0,0 +1,93 @@
+"""
+Benchmark for checking budgets as transactions are added.
+
+Every expense category gets a monthly and a yearly budget, and on synthetic
+ledgers (see synthetic.py) of increasing size, checking a new transaction
+against its category's budgets is timed two ways:
+
+    recompute     sum the category's transactions in the month and in the
+                  year with boolean masks over the whole ledger
+    incremental   read the spend before and after adding the transaction to
+                  the summary cube's running totals (Budgets.spending/alerts)
+
+The last column is the bulk re-evaluation used after a large import: the
+cube is rebuilt with one pass over the ledger and every budget in every
+period is evaluated from it (Budgets.evaluate).
+
+Run from the repository root:
+
+    python benchmarks/bench_budgets.py [--rows 100000 1000000 10000000] [--checks 200]
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from synthetic import load_synthetic # First, as it puts the repository root on sys.path
+from aggregates import SummaryCube
+from budgets import Budgets
+from main import FinanceTracker
+
+DATE = datetime(2024, 6, 15)
+
+
+def recompute(df, category, pence):
+    """
+    Returns the month's and the year's spend in a category after a transaction, by masking the whole ledger.
+    """
+
+    in_category = (df["Category"] == category).values
+    months = df["Date"].values.astype("datetime64[M]")
+    amounts = df["Amount"].values
+    month_total = amounts[in_category & (months == np.datetime64(DATE, "M"))].sum()
+    year_total = amounts[in_category & (months.astype("datetime64[Y]") == np.datetime64(DATE, "Y"))].sum()
+    return -(month_total + pence), -(year_total + pence)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare incremental budget checks with recomputing the spend")
+    parser.add_argument("--rows", type = int, nargs = "+", default = [100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--checks", type = int, default = 200, help = "transactions checked per ledger (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{'Ledger rows':>12} | {'Recompute (ms)':>14} | {'Incremental (us)':>16} | {'Re-evaluate all (ms)':>20}")
+    print("-" * 73)
+
+    for rows in args.rows:
+        df = load_synthetic(rows)
+
+        with tempfile.TemporaryDirectory() as workdir:
+            budgets = Budgets(Path(workdir) / "budgets.json", FinanceTracker.EXPENSE_CATEGORIES)
+            for category in FinanceTracker.EXPENSE_CATEGORIES:
+                budgets.set_limit(category, "monthly", 50_000)
+                budgets.set_limit(category, "yearly", 500_000)
+
+            checks = min(args.checks, 20) # The recompute is too slow on large ledgers to run many times
+            start = time.perf_counter()
+            for _ in range(checks):
+                recompute(df, "Food", -450)
+            recompute_ms = (time.perf_counter() - start) / checks * 1e3
+
+            start = time.perf_counter()
+            cube = SummaryCube.from_dataframe(df, FinanceTracker.INCOME_CATEGORIES)
+            states = budgets.evaluate(cube)
+            evaluate_ms = (time.perf_counter() - start) * 1e3
+
+            cells = [(DATE.year, DATE.month, "Food")]
+            start = time.perf_counter()
+            for _ in range(args.checks):
+                before = budgets.spending(cube, cells)
+                cube.add(DATE, "Food", -450)
+                budgets.alerts(before, budgets.spending(cube, cells))
+            incremental_us = (time.perf_counter() - start) / args.checks * 1e6
+
+        assert len(states) > 0
+        print(f"{rows:>12,} | {recompute_ms:>14.2f} | {incremental_us:>16.1f} | {evaluate_ms:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for starting the tracker from a checkpoint rather than the whole ledger.
+
+For synthetic ledgers (see synthetic.py) of increasing size, the time until
+the tracker is loaded and its summary cube is ready is measured three ways:
+
+    rebuild     no checkpoint: every partition is read, the cube and the
+                description index are built, and a checkpoint is written
+    restore     the checkpoint is mapped into memory and nothing is replayed
+    replay      the checkpoint is restored and --tail transactions added
+                after it are read from the journal and replayed
+
+Run from the repository root:
+
+    python benchmarks/bench_checkpoint.py [--rows 1000000 5000000 10000000] [--tail 500]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import write_synthetic # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+
+
+def start(path):
+    """
+    Returns the milliseconds taken to load a tracker and get its summary cube, and the tracker.
+    """
+
+    began = time.perf_counter()
+    ft = FinanceTracker(path)
+    ft.get_summary_cube()
+    return (time.perf_counter() - began) * 1e3, ft
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare startup from a checkpoint with rebuilding from the ledger")
+    parser.add_argument("--rows", type = int, nargs = "+", default = [1_000_000, 5_000_000, 10_000_000])
+    parser.add_argument("--tail", type = int, default = 500, help = "transactions added after the checkpoint for the replay run (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{'Ledger rows':>12} | {'Rebuild (ms)':>12} | {'Restore (ms)':>12} | {'Replay (ms)':>11} | {'Speed-up':>8}")
+    print("-" * 68)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "transactions.ledger"
+            write_synthetic(path, rows)
+
+            rebuild_ms, ft = start(path)
+            restore_ms, ft = start(path)
+
+            for i in range(args.tail):
+                ft.stage_transaction(datetime(2024, 12, 31), "Food", -4.5, f"Tail transaction {i % 10}")
+            ft.save()
+            del ft
+            replay_ms, ft = start(path)
+
+            assert len(ft.pending_transactions) == args.tail
+            del ft
+            print(f"{rows:>12,} | {rebuild_ms:>12.0f} | {restore_ms:>12.1f} | {replay_ms:>11.1f} | {rebuild_ms / replay_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
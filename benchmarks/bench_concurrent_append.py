@@ -0,0 +1,112 @@
+"""
+Stress test for several processes appending to the same ledger at once.
+
+A synthetic ledger (see synthetic.py) is written, then every writer process
+opens it with its own FinanceTracker and, all starting together, saves
+batches of transactions with distinct descriptions through
+append_transactions, as separate terminals or a server and a terminal
+would. The journal is compacted every --compact-every rows, so appends race
+with compactions too. Before each append a writer merges in what the others
+saved meanwhile (see FinanceTracker.merge_external_changes).
+
+Once every writer has finished, the ledger is loaded afresh and checked: it
+must hold every transaction written exactly once, and every writer's own
+DataFrame must match it after one last merge.
+
+Run from the repository root:
+
+    python benchmarks/bench_concurrent_append.py [--rows 100000] [--writers 2 4 8] [--batches 50] [--batch 20] [--backend ledger]
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import write_synthetic # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from storage import LedgerStore
+
+
+def write_batches(path, backend, writer, batches, batch, compact_every, barrier, results):
+    """
+    Saves batches of transactions from one writer process, then reports what its own DataFrame ended up holding.
+    """
+
+    LedgerStore.COMPACT_EVERY = compact_every
+    ft = FinanceTracker(path, backend = backend)
+    rng = np.random.default_rng(writer)
+
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(batches):
+        df = pd.DataFrame({
+            "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, batch), unit = "D"),
+            "Category": "Food",
+            "Amount": -rng.integers(100, 10_000, batch).astype("float64"),
+            "Description": [f"writer {writer} batch {i} row {j}" for j in range(batch)]
+        })
+        ft.append_transactions(df)
+    seconds = time.perf_counter() - start
+
+    barrier.wait() # Every writer has finished, so the last merge sees everything
+    ft.merge_external_changes()
+    ft.flush_pending_transactions()
+    results.put((writer, seconds, len(ft.df), int(ft.df["Amount"].sum())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Check that concurrent appends from several processes lose no transactions")
+    parser.add_argument("--rows", type = int, default = 100_000, help = "transactions in the ledger before the writers start (default: %(default)s)")
+    parser.add_argument("--writers", type = int, nargs = "+", default = [2, 4, 8])
+    parser.add_argument("--batches", type = int, default = 50, help = "appends per writer (default: %(default)s)")
+    parser.add_argument("--batch", type = int, default = 20, help = "transactions per append (default: %(default)s)")
+    parser.add_argument("--compact-every", type = int, default = 200, help = "journal rows before a compaction (default: %(default)s)")
+    parser.add_argument("--backend", choices = ["ledger", "sqlite"], default = "ledger")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn") # Each writer starts like a separate terminal would, sharing nothing
+    print(f"{args.rows:,} transactions to start with, {args.batches} appends of {args.batch} per writer, {args.backend} backend\n")
+    print(f"{'Writers':>7} | {'Written':>8} | {'Stored':>8} | {'Lost':>5} | {'Twice':>5} | {'Writers agree':>13} | {'Appends/s':>9}")
+    print("-" * 74)
+
+    failed = False
+    for writers in args.writers:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / ("transactions.ledger" if args.backend == "ledger" else "transactions.sqlite")
+            write_synthetic(path, args.rows, args.backend)
+
+            barrier, results = context.Barrier(writers), context.Queue()
+            processes = [context.Process(target = write_batches, args = (path, args.backend, writer, args.batches, args.batch, args.compact_every, barrier, results)) for writer in range(writers)]
+            for process in processes:
+                process.start()
+            reports = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            ft = FinanceTracker(path, backend = args.backend)
+            ft.flush_pending_transactions() # Transactions stored after the last checkpoint are only staged on startup
+            df = ft.df
+            descriptions = df["Description"].astype(str)
+            written = descriptions[descriptions.str.startswith("writer ")]
+            expected = {f"writer {w} batch {i} row {j}" for w in range(writers) for i in range(args.batches) for j in range(args.batch)}
+
+            lost = len(expected - set(written))
+            twice = len(written) - written.nunique()
+            agree = all((rows, total) == (len(df), int(df["Amount"].sum())) for writer, seconds, rows, total in reports)
+            appends_per_second = writers * args.batches / max(seconds for writer, seconds, rows, total in reports)
+            failed = failed or lost or twice or not agree or len(df) != args.rows + len(expected)
+
+            print(f"{writers:>7} | {len(expected):>8,} | {len(written):>8,} | {lost:>5} | {twice:>5} | {'yes' if agree else 'NO':>13} | {appends_per_second:>9.0f}")
+
+    if failed:
+        sys.exit("Transactions were lost, duplicated or not seen by every writer")
+
+
+if __name__ == "__main__":
+    main()
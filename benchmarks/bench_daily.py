@@ -0,0 +1,84 @@
+"""
+Benchmark for the daily running balance and rolling 7/30/90-day totals per category.
+
+On a synthetic ledger (see synthetic.py) the daily running balance and every
+category's 7, 30 and 90-day totals are worked out two ways:
+
+    pandas    a groupby over every transaction by (day, category), reindexed
+              to every calendar day, then cumsum and rolling(window).sum()
+    series    DailySeries (see timeseries.py): built with one scatter-add
+              into a (day, category) table, then read from its prefix sums
+
+The series is then kept up to date as transactions are added, so the last
+row shows adding one transaction and reading every series again, which
+pandas can only answer by recomputing from the transactions.
+
+Run from the repository root:
+
+    python benchmarks/bench_daily.py [--rows 10000000] [--runs 5]
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from synthetic import load_synthetic, timed # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from timeseries import DailySeries
+
+
+def with_pandas(df):
+    """
+    Works out the daily running balance and each window's totals per category with a groupby and rolling sums.
+    """
+
+    days = df["Date"].dt.normalize()
+    table = df.groupby([days, df["Category"]], observed = False)["Amount"].sum().unstack(fill_value = 0)
+    table = table.reindex(pd.date_range(days.iloc[0], days.iloc[-1], freq = "D"), fill_value = 0)[FinanceTracker.VALID_CATEGORIES]
+
+    balance = table.sum(axis = 1).cumsum()
+    return balance.values, [table.rolling(window, min_periods = 1).sum().values.astype("int64") for window in FinanceTracker.ROLLING_WINDOWS]
+
+
+def read_series(series):
+    """
+    Reads the daily running balance and each window's totals per category from a DailySeries.
+    """
+
+    days, net, balance = series.running_balance()
+    return balance, [series.rolling(window)[1] for window in FinanceTracker.ROLLING_WINDOWS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the daily series with recomputing them in pandas")
+    parser.add_argument("--rows", type = int, default = 10_000_000)
+    parser.add_argument("--runs", type = int, default = 5, help = "runs per measurement; the best is reported (default: %(default)s)")
+    args = parser.parse_args()
+
+    # The synthetic ledger is generated in date order over 2015-2024
+    df = load_synthetic(args.rows)
+
+    pandas_ms, expected = timed(lambda: with_pandas(df), args.runs)
+    build_ms, series = timed(lambda: DailySeries.from_dataframe(df, FinanceTracker.VALID_CATEGORIES), args.runs)
+    read_ms, result = timed(lambda: read_series(series), args.runs)
+
+    assert np.array_equal(result[0], expected[0])
+    assert all(np.array_equal(mine, theirs) for mine, theirs in zip(result[1], expected[1]))
+
+    def append_and_read():
+        series.add(datetime(2024, 12, 31), "Food", -450)
+        return read_series(series)
+
+    append_ms, result = timed(append_and_read, args.runs)
+
+    print(f"{args.rows:,} transactions over {series.days:,} days, windows of {', '.join(str(w) for w in FinanceTracker.ROLLING_WINDOWS)} days\n")
+    print(f"{'Step':>22} | {'pandas (ms)':>11} | {'Series (ms)':>11} | {'Speed-up':>8}")
+    print("-" * 62)
+    for name, ms in (("build and read", build_ms + read_ms), ("read", read_ms), ("add 1 and read again", append_ms)):
+        print(f"{name:>22} | {pandas_ms:>11.1f} | {ms:>11.2f} | {pandas_ms / ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
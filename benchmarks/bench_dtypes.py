@@ -0,0 +1,78 @@
+"""
+Benchmark of the ledger's compact dtypes against the plain dtypes it used to load with.
+
+The same synthetic ledger (see synthetic.py) is held both ways:
+
+    plain      Category and Description as Python strings, Amount as float pounds
+    compact    Category and Description as Categoricals, Amount as int64 pence
+               (storage.compact_dtypes, what FinanceTracker loads ledgers as)
+
+and the memory each takes, and the time of the groupbys and filters the
+summaries are built from, are compared. The drift of a float sum of every
+amount from the exact total is printed too.
+
+Run from the repository root:
+
+    python benchmarks/bench_dtypes.py [--rows 10000000] [--runs 3]
+"""
+
+import argparse
+
+import pandas as pd
+
+from synthetic import iter_synthetic, timed # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from storage import concat_ledgers
+
+
+def operations(df):
+    """
+    Returns the operations to time on a ledger, as {name: function}.
+    """
+
+    observed = {"observed": True} if isinstance(df["Category"].dtype, pd.CategoricalDtype) else {}
+    dates = df["Date"]
+
+    return {
+        "total per category": lambda: df["Amount"].groupby(df["Category"], **observed).sum(),
+        "month x category": lambda: df["Amount"].groupby([dates.dt.year, dates.dt.month, df["Category"]], **observed).agg(["sum", "count"]),
+        "income filter": lambda: df["Amount"][df["Category"].isin(FinanceTracker.INCOME_CATEGORIES)].sum(),
+        "per description": lambda: df["Amount"].groupby(df["Description"], **observed).size()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the memory and groupby times of plain and compact ledger dtypes")
+    parser.add_argument("--rows", type = int, default = 10_000_000)
+    parser.add_argument("--runs", type = int, default = 3, help = "runs per operation; the best is reported (default: %(default)s)")
+    args = parser.parse_args()
+
+    # iter_synthetic's chunks have plain dtypes with amounts in pence
+    chunks = list(iter_synthetic(args.rows))
+    plain = pd.concat(chunks, ignore_index = True).astype({"Category": object, "Description": object})
+    plain["Amount"] = plain["Amount"] / 100
+
+    compact = concat_ledgers([chunk.astype({"Category": pd.CategoricalDtype(FinanceTracker.VALID_CATEGORIES), "Description": "category"}) for chunk in chunks])
+    del chunks
+
+    print(f"{args.rows:,} transactions\n")
+    print(f"{'Column':<12} | {'Plain (MB)':>10} | {'Compact (MB)':>12}")
+    print("-" * 40)
+    plain_memory, compact_memory = plain.memory_usage(index = False, deep = True), compact.memory_usage(index = False, deep = True)
+    for column in plain.columns:
+        print(f"{column:<12} | {plain_memory[column] / 2**20:>10.1f} | {compact_memory[column] / 2**20:>12.1f}")
+    print(f"{'Total':<12} | {plain_memory.sum() / 2**20:>10.1f} | {compact_memory.sum() / 2**20:>12.1f}")
+
+    print(f"\n{'Operation':<20} | {'Plain (ms)':>10} | {'Compact (ms)':>12} | {'Speed-up':>8}")
+    print("-" * 60)
+    plain_operations, compact_operations = operations(plain), operations(compact)
+    for name in plain_operations:
+        plain_ms, compact_ms = timed(plain_operations[name], args.runs)[0], timed(compact_operations[name], args.runs)[0]
+        print(f"{name:<20} | {plain_ms:>10.1f} | {compact_ms:>12.1f} | {plain_ms / compact_ms:>7.1f}x")
+
+    exact = int(compact["Amount"].sum())
+    print(f"\nSum of every amount: £{exact / 100:,.2f} exact, float sum off by £{abs(plain['Amount'].sum() - exact / 100):.2e}")
+
+
+if __name__ == "__main__":
+    main()
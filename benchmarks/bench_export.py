@@ -0,0 +1,50 @@
+"""
+Benchmark for exporting a year's report pack with different numbers of workers.
+
+A synthetic ledger (see synthetic.py) is loaded once, and the pack for one
+year (12 month pages, 9 category pages, the cumulative net balance and the
+overview, each with its chart) is exported without the chart cache, with
+each number of workers in turn. Drawing the charts dominates, so the wall
+time should fall with the number of workers until it runs out of cores.
+
+Run from the repository root:
+
+    python benchmarks/bench_export.py [--rows 1000000] [--year 2024] [--workers 1 2 4 8] [--format html]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from synthetic import write_synthetic # First, as it puts the repository root on sys.path
+from export import export_reports, PAGE_FORMATS
+from main import FinanceTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Time exporting a year's report pack with different numbers of workers")
+    parser.add_argument("--rows", type = int, default = 1_000_000)
+    parser.add_argument("--year", type = int, default = 2024, help = "the year to export; the synthetic ledger covers 2015-2024 (default: %(default)s)")
+    parser.add_argument("--workers", type = int, nargs = "+", default = sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--format", choices = list(PAGE_FORMATS), default = "html")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic(Path(workdir) / "transactions.ledger", args.rows)
+        ft = FinanceTracker(Path(workdir) / "transactions.ledger")
+
+        print(f"{args.rows:,} transactions, the {args.year} pack, {os.cpu_count()} CPU(s)\n")
+        print(f"{'Workers':>7} | {'Pages':>5} | {'Charts':>6} | {'Wall (s)':>8} | {'Speed-up':>8}")
+        print("-" * 48)
+
+        baseline = None
+        for workers in args.workers:
+            result = export_reports(ft, Path(workdir) / f"export-{workers}", FinanceTracker.VALID_CATEGORIES, FinanceTracker.INCOME_CATEGORIES, args.format, args.year, workers = workers)
+            baseline = baseline or result["seconds"]
+            print(f"{workers:>7} | {len(result['pages']):>5} | {result['charts']:>6} | {result['seconds']:>8.2f} | {baseline / result['seconds']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
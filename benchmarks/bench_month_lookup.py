@@ -0,0 +1,69 @@
+"""
+Benchmark for reading a single month from ledgers with more and more history.
+
+Each ledger has the same number of transactions per month, so reading one
+month should take the same time however many years of history surround it,
+because only that month's partition is opened.
+
+Run from the repository root:
+
+    python benchmarks/bench_month_lookup.py
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import write_partitions # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from storage import LedgerStore
+
+HISTORY_YEARS = [1, 5, 20]
+ROWS_PER_MONTH = 10_000
+RUNS = 20
+
+
+def write_history(path, years, seed = 0):
+    """
+    Writes a partitioned ledger with ROWS_PER_MONTH transactions in every month of the given number of years.
+    """
+
+    rng = np.random.default_rng(seed)
+    rows = years * 12 * ROWS_PER_MONTH
+    months = np.repeat(np.arange(years * 12), ROWS_PER_MONTH)
+
+    df = pd.DataFrame({
+        "Date": (np.datetime64("2000-01", "M") + months.astype("timedelta64[M]")).astype("datetime64[D]") + rng.integers(0, 28, size = rows).astype("timedelta64[D]"),
+        "Category": pd.Categorical.from_codes(rng.integers(0, len(FinanceTracker.EXPENSE_CATEGORIES), size = rows), FinanceTracker.EXPENSE_CATEGORIES),
+        "Amount": -rng.integers(100, 20_000, size = rows), # In pence
+        "Description": "Synthetic transaction"
+    })
+    write_partitions(path, df)
+
+
+def main():
+    print(f"{'History (years)':>15} | {'Ledger rows':>12} | {'Month lookup (ms)':>17}")
+    print("-" * 52)
+
+    for years in HISTORY_YEARS:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "transactions.ledger"
+            write_history(path, years)
+
+            store = LedgerStore(path, FinanceTracker.VALID_CATEGORIES)
+            store.open()
+
+            start = time.perf_counter()
+            for i in range(RUNS):
+                month = store.read_months((2000, 6), (2000, 6))
+            elapsed = (time.perf_counter() - start) / RUNS * 1e3
+
+            assert len(month) == ROWS_PER_MONTH
+            print(f"{years:>15} | {years * 12 * ROWS_PER_MONTH:>12,} | {elapsed:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark for building the summaries in out-of-core (streaming) mode.
+
+For each ledger size, a synthetic partitioned ledger is written to a
+temporary directory, then a fresh interpreter builds the summary cube with
+FinanceTracker(out_of_core = True) and reports the time taken and its peak
+resident memory. Out-of-core mode is timed both reading the manifest's
+per-partition totals and streaming every transaction. The in-memory path is
+run too (up to IN_MEMORY_LIMIT rows) so the memory use and results can be
+compared.
+
+Run from the repository root:
+
+    python benchmarks/bench_out_of_core.py [--rows 1000000 10000000] [--chunk-rows 250000]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from synthetic import REPO_ROOT, write_synthetic # First, as it puts the repository root on sys.path
+
+IN_MEMORY_LIMIT = 3_000_000
+
+# Run in a child process so the peak only covers building the summaries. VmHWM (Linux) is used rather
+# than ru_maxrss, because ru_maxrss carries over the parent's peak, which includes the generated ledger
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {repo!r})
+from main import FinanceTracker
+start = time.perf_counter()
+ft = FinanceTracker({path!r}, out_of_core = {out_of_core}, chunk_rows = {chunk_rows})
+cube = ft.build_summary_cube(from_manifest = {from_manifest})
+elapsed = time.perf_counter() - start
+try:
+    peak_mb = int(open("/proc/self/status").read().split("VmHWM:")[1].split()[0]) / 1024
+except OSError:
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": elapsed, "peak_mb": peak_mb, "balance": cube.balance}}))
+"""
+
+
+def run_child(path, out_of_core, chunk_rows, from_manifest = True):
+    """
+    Builds the summaries in a fresh interpreter and returns its timing, peak memory and balance.
+    """
+
+    code = CHILD.format(repo = str(REPO_ROOT), path = str(path), out_of_core = out_of_core, chunk_rows = chunk_rows, from_manifest = from_manifest)
+    output = subprocess.run([sys.executable, "-c", code], capture_output = True, text = True, check = True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type = int, nargs = "+", default = [1_000_000, 3_000_000, 10_000_000])
+    parser.add_argument("--chunk-rows", type = int, default = 250_000)
+    args = parser.parse_args()
+
+    print(f"{'Rows':>12} | {'Mode':>20} | {'Time (s)':>8} | {'Peak RSS (MB)':>13}")
+    print("-" * 63)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "transactions.ledger"
+            write_synthetic(path, rows)
+
+            results = {
+                "out-of-core manifest": run_child(path, True, args.chunk_rows),
+                "out-of-core streamed": run_child(path, True, args.chunk_rows, from_manifest = False)
+            }
+            if rows <= IN_MEMORY_LIMIT:
+                results["in-memory"] = run_child(path, False, args.chunk_rows)
+
+            for mode, result in results.items():
+                print(f"{rows:>12,} | {mode:>20} | {result['seconds']:>8.2f} | {result['peak_mb']:>13.0f}")
+
+            if len({result["balance"] for result in results.values()}) > 1:
+                raise AssertionError("Out-of-core and in-memory summaries differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark for range queries over a date-sorted ledger.
+
+The same queries (a date window of a week, a month or a year, some
+categories, an amount bound and a description pattern) are run on a
+synthetic ledger (see synthetic.py) two ways:
+
+    mask      boolean masks over the whole DataFrame, as the views used to filter
+    indexed   TransactionQuery.apply, which slices the date window out of the
+              date-sorted ledger by binary search before testing the other predicates
+
+Run from the repository root:
+
+    python benchmarks/bench_search.py [--rows 10000000] [--runs 5]
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from synthetic import load_synthetic, timed # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from search import TransactionQuery
+
+WINDOWS = {
+    "1 week": (datetime(2020, 6, 1), datetime(2020, 6, 7)),
+    "1 month": (datetime(2020, 6, 1), datetime(2020, 6, 30)),
+    "1 year": (datetime(2020, 1, 1), datetime(2020, 12, 31))
+}
+CATEGORIES = ["Food", "Leisure"]
+MAX_AMOUNT = -20.0 # Spends of £20 or more
+DESCRIPTION = "lunch|dinner"
+
+
+def masked(df, start, end):
+    """
+    Runs the query with boolean masks over every row.
+    """
+
+    mask = (df["Date"] >= start) & (df["Date"] <= end) & df["Category"].isin(CATEGORIES) & (df["Amount"] <= round(MAX_AMOUNT * 100))
+    mask &= df["Description"].str.contains(DESCRIPTION, case = False).values
+    return df[mask]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare indexed range queries with full boolean masks")
+    parser.add_argument("--rows", type = int, default = 10_000_000)
+    parser.add_argument("--runs", type = int, default = 5, help = "runs per query; the best is reported (default: %(default)s)")
+    args = parser.parse_args()
+
+    # The synthetic ledger is generated in date order over 2015-2024
+    df = load_synthetic(args.rows)
+
+    print(f"{args.rows:,} transactions over 10 years\n")
+    print(f"{'Window':>8} | {'Matches':>9} | {'Mask (ms)':>10} | {'Indexed (ms)':>12} | {'Speed-up':>8}")
+    print("-" * 60)
+
+    for name, (start, end) in WINDOWS.items():
+        query = TransactionQuery(start, end, CATEGORIES, max_amount = MAX_AMOUNT, description = DESCRIPTION)
+        mask_ms, expected = timed(lambda: masked(df, start, end), args.runs)
+        indexed_ms, matches = timed(lambda: query.apply(df), args.runs)
+
+        assert np.array_equal(matches.index, expected.index)
+        print(f"{name:>8} | {len(matches):>9,} | {mask_ms:>10.2f} | {indexed_ms:>12.2f} | {mask_ms / indexed_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for cold start to the first menu prompt.
+
+Launches `python main.py` in a fresh interpreter against a copy of the bundled
+transactions.csv, and measures the time until the main menu's
+"Select an option:" prompt is printed. The program is then closed with
+option 3.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RUNS = 10
+PROMPT = b"Select an option:"
+
+
+def time_to_first_prompt(workdir):
+    """
+    Starts the application and returns the seconds taken until the first prompt is printed.
+    """
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "main.py")],
+        cwd = workdir,
+        stdin = subprocess.PIPE,
+        stdout = subprocess.PIPE,
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    )
+
+    output = b""
+    while PROMPT not in output:
+        chunk = process.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError("main.py exited before printing the menu")
+        output += chunk
+    elapsed = time.perf_counter() - start
+
+    process.communicate(b"3\n")
+    return elapsed
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    shutil.copy(REPO_ROOT / "transactions.csv", workdir)
+
+    time_to_first_prompt(workdir) # Warm the OS file cache and write __pycache__ so every timed run starts equal
+    timings = [time_to_first_prompt(workdir) for i in range(RUNS)]
+
+    print(f"Cold start to first prompt over {RUNS} runs:")
+    print(f"  median: {statistics.median(timings) * 1e3:.0f} ms")
+    print(f"  min:    {min(timings) * 1e3:.0f} ms")
+    print(f"  max:    {max(timings) * 1e3:.0f} ms")
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark suite timing the tracker's main operations on synthetic ledgers.
+
+For each ledger size, a deterministic synthetic ledger (see synthetic.py) is
+written to a temporary directory, then a fresh interpreter runs, in order:
+
+    load                FinanceTracker.__init__
+    summary cube        building the summaries every view reads from
+    view by month       the figures behind view_by_month (a month mid-way through the ledger)
+    view by category    the figures behind view_by_category
+    cumulative balance  the figures behind view_cumulative_net_balance
+    all-time overview   the figures behind view_all_time_overview
+    add batch           staging a batch of new transactions and merging them
+    save                FinanceTracker.save writing that batch to the store
+
+Each operation's time, throughput (rows of the ledger, or of the batch,
+per second), peak resident memory and change in resident memory are
+reported, and every result is saved as JSON together with the commit and
+library versions, so runs of different versions can be compared with
+--compare.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py [--rows 10000 100000 1000000] [--backend ledger|sqlite]
+                                     [--out-of-core] [--batch 1000] [--output results.json]
+                                     [--compare old-results.json]
+
+Sizes up to 50M rows can be run; above a few million, --out-of-core keeps
+the load within memory.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import REPO_ROOT, iter_synthetic, write_synthetic # First, as it puts the repository root on sys.path
+
+BACKEND_FILES = {"ledger": "transactions.ledger", "sqlite": "transactions.sqlite"}
+VIEWED_MONTH = (6, 2020) # (month, year) for view by month, half way through the synthetic ledger's 2015-2024
+
+
+def memory_mb(field):
+    """
+    Returns a field of /proc/self/status (e.g. "VmRSS" or "VmHWM") in MB, or NaN where it isn't available.
+    """
+
+    try:
+        with open("/proc/self/status") as f:
+            return int(f.read().split(f"{field}:")[1].split()[0]) / 1024
+    except (OSError, IndexError):
+        return float("nan")
+
+
+def reset_peak_memory():
+    """
+    Resets the process's peak resident memory (VmHWM) to its current size, on Linux.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def measure(name, rows, function):
+    """
+    Runs function and returns its time, throughput and memory use, plus its result.
+    """
+
+    reset_peak_memory()
+    before = memory_mb("VmRSS")
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    return {
+        "operation": name,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else float("inf"),
+        "peak_mb": memory_mb("VmHWM"),
+        "memory_delta_mb": memory_mb("VmRSS") - before
+    }, result
+
+
+def run_operations(path, rows, backend, out_of_core, batch_rows, seed):
+    """
+    Times every operation on an existing synthetic ledger. Runs in the child process.
+    """
+
+    from main import FinanceTracker
+
+    batch = next(iter_synthetic(batch_rows, years = 1, seed = seed + 1))
+    results = []
+
+    result, ft = measure("load", rows, lambda: FinanceTracker(path, out_of_core, backend = backend))
+    results.append(result)
+
+    # Bumping the data version makes the next summary rebuild from scratch
+    ft.data_version += 1
+    results.append(measure("summary cube", rows, ft.get_summary_cube)[0])
+
+    results.append(measure("view by month", rows, lambda: ft.month_summary(*VIEWED_MONTH))[0])
+    results.append(measure("view by category", rows, lambda: ft.category_summary("Food"))[0])
+    results.append(measure("cumulative balance", rows, ft.cumulative_net_balance_summary)[0])
+    results.append(measure("all-time overview", rows, ft.all_time_summary)[0])
+
+    def add_batch():
+        ft.stage_transactions(batch)
+        ft.flush_pending_transactions()
+
+    results.append(measure("add batch", batch_rows, add_batch)[0])
+    results.append(measure("save", batch_rows, ft.save)[0])
+
+    return results
+
+
+def run_size(rows, args):
+    """
+    Writes a synthetic ledger of the given size and times the operations on it in a fresh interpreter.
+    """
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / BACKEND_FILES[args.backend]
+
+        start = time.perf_counter()
+        write_synthetic(path, rows, args.backend, seed = args.seed)
+        generate_seconds = time.perf_counter() - start
+
+        command = [sys.executable, __file__, "--child", str(path), "--rows", str(rows), "--backend", args.backend, "--batch", str(args.batch), "--seed", str(args.seed)]
+        if args.out_of_core:
+            command.append("--out-of-core")
+        results = json.loads(subprocess.run(command, capture_output = True, text = True, check = True).stdout)
+
+    for result in results:
+        result.update({"rows": rows, "backend": args.backend, "out_of_core": args.out_of_core})
+    print(f"{rows:,} rows generated in {generate_seconds:.1f} s")
+    return results
+
+
+def git_commit():
+    """
+    Returns the commit the benchmarked code is at, or None outside a git checkout.
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = REPO_ROOT, capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline = None):
+    """
+    Prints a table of results, with the change in time against a baseline run's results if given.
+    """
+
+    previous = {(r["rows"], r["backend"], r["out_of_core"], r["operation"]): r for r in baseline or []}
+
+    print(f"{'Rows':>12} | {'Operation':>18} | {'Time (ms)':>10} | {'Rows/s':>12} | {'Peak (MB)':>9} | {'Delta (MB)':>10}" + (f" | {'vs baseline':>11}" if baseline else ""))
+    print("-" * (88 + (14 if baseline else 0)))
+
+    for r in results:
+        line = f"{r['rows']:>12,} | {r['operation']:>18} | {r['seconds'] * 1e3:>10.2f} | {r['rows_per_second']:>12,.0f} | {r['peak_mb']:>9.0f} | {r['memory_delta_mb']:>10.1f}"
+        old = previous.get((r["rows"], r["backend"], r["out_of_core"], r["operation"]))
+        if baseline:
+            line += f" | {r['seconds'] / old['seconds']:>10.2f}x" if old else f" | {'-':>11}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the tracker on synthetic ledgers")
+    parser.add_argument("--rows", type = int, nargs = "+", default = [10_000, 100_000, 1_000_000], help = "ledger sizes to run (10k to 50M)")
+    parser.add_argument("--backend", choices = list(BACKEND_FILES), default = "ledger")
+    parser.add_argument("--out-of-core", action = "store_true", help = "run FinanceTracker in out-of-core mode")
+    parser.add_argument("--batch", type = int, default = 1000, help = "transactions in the added batch (default: %(default)s)")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", default = "bench_results.json", help = "where to save the results as JSON (default: %(default)s)")
+    parser.add_argument("--compare", help = "a previous results file to compare the times against")
+    parser.add_argument("--child", help = argparse.SUPPRESS) # Set when the script re-runs itself to time one ledger
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_operations(args.child, args.rows[0], args.backend, args.out_of_core, args.batch, args.seed)))
+        return
+
+    results = [result for rows in args.rows for result in run_size(rows, args)]
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec = "seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results
+    }
+    Path(args.output).write_text(json.dumps(report, indent = 2))
+
+    baseline = json.loads(Path(args.compare).read_text())["results"] if args.compare else None
+    print_results(results, baseline)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark for word searches over transaction descriptions.
+
+Real statements rarely repeat a description exactly (card payments carry a
+reference), so each synthetic description (see synthetic.py) is given one
+of --distinct reference numbers, e.g. "Lunch at café 0482". The same
+multi-word prefix queries are then run two ways:
+
+    regex     TransactionQuery's description pattern, one lookahead per word,
+              tested against every distinct description
+    indexed   the words looked up in a DescriptionIndex (see text_index.py),
+              then the rows kept by their descriptions
+
+Both return the same rows, and selecting them dominates both times. The
+index also answers a query's number of matches and total on its own,
+without touching a row, which is timed separately. The time to build the
+index from the ledger, and to save and load it, is printed too.
+
+Run from the repository root:
+
+    python benchmarks/bench_text_index.py [--rows 10000000] [--distinct 1000] [--runs 5]
+"""
+
+import argparse
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import iter_synthetic, timed # First, as it puts the repository root on sys.path
+from main import FinanceTracker
+from search import TransactionQuery
+from storage import compact_dtypes, concat_ledgers
+from text_index import DescriptionIndex
+
+QUERIES = ["lunch caf", "subscr", "bill elec", "return"]
+
+
+def with_references(chunk, distinct, seed):
+    """
+    Returns a chunk with a reference number, one of distinct, appended to every description.
+    """
+
+    rng = np.random.default_rng(seed)
+    references = pd.Series(rng.integers(0, distinct, size = len(chunk))).map("{:04d}".format)
+    return chunk.assign(Description = chunk["Description"].astype(str).values + " " + references.values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare description index lookups with regular expression searches")
+    parser.add_argument("--rows", type = int, default = 10_000_000)
+    parser.add_argument("--distinct", type = int, default = 1000, help = "reference numbers per description (default: %(default)s)")
+    parser.add_argument("--runs", type = int, default = 5, help = "runs per query; the best is reported (default: %(default)s)")
+    args = parser.parse_args()
+
+    chunks = (with_references(chunk, args.distinct, i) for i, chunk in enumerate(iter_synthetic(args.rows)))
+    df = concat_ledgers([compact_dtypes(chunk, FinanceTracker.VALID_CATEGORIES) for chunk in chunks])
+    print(f"{args.rows:,} transactions, {len(df['Description'].cat.categories):,} distinct descriptions\n")
+
+    build_ms, index = timed(lambda: DescriptionIndex.from_batches([df]))
+    with tempfile.TemporaryDirectory() as workdir:
+        index.path = Path(workdir) / "description_index.json"
+        save_ms, _ = timed(lambda: index.save("benchmark"))
+        load_ms, _ = timed(lambda: DescriptionIndex.load(index.path, "benchmark"))
+    print(f"Index: {len(index.tokens):,} tokens, built in {build_ms:.0f} ms, saved in {save_ms:.0f} ms, loaded in {load_ms:.0f} ms\n")
+
+    print(f"{'Query':>10} | {'Matches':>9} | {'Total (£)':>14} | {'Regex (ms)':>10} | {'Indexed (ms)':>12} | {'Totals only (ms)':>16}")
+    print("-" * 88)
+
+    for text in QUERIES:
+        # Every word has to start a word of the description, in any order
+        pattern = "".join(rf"(?=.*\b{re.escape(word)})" for word in text.split())
+        regex_ms, expected = timed(lambda: TransactionQuery(description = pattern).apply(df), args.runs)
+
+        query = TransactionQuery(text = text)
+        indexed_ms, matches = timed(lambda: query.apply(df, index.match(text)), args.runs)
+
+        assert np.array_equal(matches.index, expected.index)
+        totals_ms, (count, total) = timed(lambda: index.totals(index.match(text)), args.runs)
+        assert count == len(matches) and total == int(matches["Amount"].sum())
+        print(f"{text:>10} | {len(matches):>9,} | {total / 100:>14,.2f} | {regex_ms:>10.1f} | {indexed_ms:>12.1f} | {totals_ms:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
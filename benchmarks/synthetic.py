@@ -0,0 +1,156 @@
+"""
+Deterministic generator of realistic synthetic ledgers for the benchmarks.
+
+The category mix, amounts and descriptions follow the bundled
+transactions.csv: mostly small food, transport and entertainment spends, a
+rent payment and salary every month, and the odd refund. Transactions are
+spread evenly over several years and generated in date order, chunk by
+chunk, so ledgers far larger than memory (tens of millions of rows) can be
+written. The same (rows, years, seed) always gives the same ledger.
+
+    python benchmarks/synthetic.py transactions.ledger --rows 1000000 [--years 10] [--backend sqlite]
+
+It also holds what every benchmark shares. Importing it puts the repository
+root (REPO_ROOT) on sys.path, so benchmarks import it before the tracker's
+modules. load_synthetic returns a whole ledger in memory, write_partitions
+lays out a ledger for a particular benchmark, and timed times a function.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from main import FinanceTracker
+from storage import LedgerStore, compact_dtypes, concat_ledgers, open_store
+
+# Category: (share of transactions, typical amount in pounds, spread of the amounts, descriptions)
+PROFILES = {
+    "Food": (0.26, 20, 0.45, ["Groceries", "Lunch at café", "Coffee", "Dinner out", "Takeaway", "Bakery", "Meal deal"]),
+    "Entertainment": (0.13, 18, 0.35, ["Netflix subscription", "Spotify subscription", "Concert ticket", "Cinema", "Video game", "Theatre ticket"]),
+    "Bills": (0.09, 70, 0.5, ["Electricity bill", "Internet bill", "Gas bill", "Water bill", "Phone bill", "Council tax"]),
+    "Leisure": (0.13, 30, 0.3, ["Gym session", "Swimming", "Bowling", "Karaoke night", "Climbing", "Museum entry"]),
+    "Transport": (0.10, 12, 0.4, ["Bus fare", "Train fare", "Fuel", "Taxi", "Parking", "Bike repair"]),
+    "Shopping": (0.14, 55, 0.3, ["Jeans", "T-shirt", "Backpack", "Books", "Trainers", "Desk chair", "Headphones"]),
+    "Rent": (0.02, 680, 0.05, ["Monthly rent"]),
+    "Income": (0.09, 250, 0.8, ["Part-time salary", "Freelance gig", "Tutoring session", "Bonus", "Interest"]),
+    "Refund": (0.04, 45, 0.7, ["Returned shirt", "Returned mug", "Returned book", "Cancelled order", "Overcharge refund"])
+}
+START_DATE = np.datetime64("2015-01-01")
+CHUNK_ROWS = 1_000_000
+
+
+def iter_synthetic(rows, years = 10, seed = 0, chunk_rows = CHUNK_ROWS):
+    """
+    Yields a synthetic ledger of the given size in date-ordered DataFrames of at most chunk_rows rows.
+
+    Parameters
+    ----------
+    rows : int
+        The total number of transactions.
+    years : int
+        How many years (from 2015) the transactions are spread over.
+    seed : int
+        Seed for the random generator.
+    chunk_rows : int
+        The maximum number of transactions per DataFrame.
+
+    Yields
+    ------
+    DataFrame
+        The next chunk of transactions, with HEADERS columns.
+    """
+
+    categories = list(PROFILES)
+    shares = np.array([PROFILES[c][0] for c in categories])
+    shares = shares / shares.sum()
+    typical = np.array([PROFILES[c][1] for c in categories], dtype = "float64")
+    spread = np.array([PROFILES[c][2] for c in categories])
+    sign = np.where(np.isin(categories, FinanceTracker.INCOME_CATEGORIES), 1, -1) # Income/refunds are positive and expenses are negative, as add_transaction enforces
+
+    # Every category's descriptions in one array, plus where each category's descriptions begin and how many there are
+    descriptions = np.array([d for c in categories for d in PROFILES[c][3]], dtype = object)
+    counts = np.array([len(PROFILES[c][3]) for c in categories])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    span_days = int((np.datetime64(f"{2015 + years}-01-01") - START_DATE).astype("int64"))
+
+    for chunk, start in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, chunk]) # Seeded per chunk, so any chunk can be regenerated on its own
+        positions = np.arange(start, min(start + chunk_rows, rows))
+
+        codes = rng.choice(len(categories), size = len(positions), p = shares)
+        pence = np.maximum(np.round(typical[codes] * rng.lognormal(0, spread[codes]) * 100), 1).astype("int64")
+
+        yield pd.DataFrame({
+            "Date": START_DATE + (positions * span_days // rows).astype("timedelta64[D]"),
+            "Category": np.array(categories, dtype = object)[codes],
+            "Amount": sign[codes] * pence,
+            "Description": descriptions[offsets[codes] + rng.integers(0, counts[codes])]
+        })
+
+
+def load_synthetic(rows, years = 10, seed = 0):
+    """
+    Returns a whole synthetic ledger as one DataFrame, with the compact dtypes FinanceTracker loads ledgers with.
+    """
+
+    return concat_ledgers([compact_dtypes(chunk, FinanceTracker.VALID_CATEGORIES) for chunk in iter_synthetic(rows, years, seed)])
+
+
+def write_synthetic(path, rows, backend = "ledger", years = 10, seed = 0):
+    """
+    Writes a synthetic ledger to a new store and returns the store.
+    """
+
+    store = open_store(backend, path, FinanceTracker.VALID_CATEGORIES)
+    store.open()
+    store.bulk_insert(iter_synthetic(rows, years, seed))
+    return store
+
+
+def write_partitions(path, df):
+    """
+    Writes transactions (Amount in pence) straight into a new ledger's month partitions and returns the store.
+    """
+
+    store = LedgerStore(path, FinanceTracker.VALID_CATEGORIES)
+    store.add_to_partitions(df)
+    store.start_journal()
+    return store
+
+
+def timed(function, runs = 1):
+    """
+    Returns the best time of several runs of function in milliseconds, and its last result.
+    """
+
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Write a synthetic ledger")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type = int, default = 1_000_000)
+    parser.add_argument("--years", type = int, default = 10)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--backend", choices = ["ledger", "sqlite"], default = "ledger")
+    args = parser.parse_args()
+
+    write_synthetic(args.path, args.rows, args.backend, args.years, args.seed)
+    print(f"{args.rows:,} transaction(s) written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Spending limits for the Personal-Finance Tracker.
+
+Each expense category can have a monthly and a yearly budget, kept in pence
+in budgets.json next to the ledger (store.aux_path("budgets.json")).
+
+Budgets are checked against the summary cube's running totals (see
+aggregates.py) rather than the transactions: a month's spend in a category
+is one of the cube's cells, and a year's is one of its (year, category)
+totals, so checking a new transaction is O(1) however large the ledger is.
+A budget's state is "ok", "warning" once WARNING_SHARE of it has been
+spent, or "exceeded" once more than all of it has, and an alert is raised
+whenever adding transactions moves a budget into a worse state.
+
+After a large import, evaluate re-works out the state of every budget in
+every period at once, with array operations over the cube's cells.
+"""
+
+import calendar
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from storage import write_atomic
+
+BUDGET_FORMAT = 1
+PERIODS = ["monthly", "yearly"]
+STATES = ["ok", "warning", "exceeded"]
+
+
+class Budgets:
+    """
+    Monthly and yearly spending limits per category, in pence.
+    """
+
+    WARNING_SHARE = 0.8 # Share of a budget spent before a warning is raised
+
+    def __init__(self, path, categories, limits = None):
+        """
+        Initialises the budgets.
+
+        Parameters
+        ----------
+        path : str or Path
+            Where the budgets are saved.
+        categories : list of str
+            The categories a budget can be set for.
+        limits : dict, optional
+            {"monthly": {category: pence}, "yearly": {category: pence}}.
+        """
+
+        self.path = Path(path)
+        self.categories = list(categories)
+        self.limits = {period: dict((limits or {}).get(period, {})) for period in PERIODS}
+
+    @classmethod
+    def load(cls, path, categories):
+        """
+        Loads the budgets saved at path.
+
+        Parameters
+        ----------
+        path : str or Path
+            Where the budgets are saved.
+        categories : list of str
+            The categories a budget can be set for.
+
+        Raises
+        ------
+        ValueError
+            If the file is damaged or was written by another format version.
+
+        Returns
+        -------
+        Budgets
+            The saved budgets, or none if nothing has been saved yet.
+        """
+
+        path = Path(path)
+        if not path.exists():
+            return cls(path, categories)
+
+        state = json.loads(path.read_text(encoding = "utf-8"))
+        budget_format = state.get("format") if isinstance(state, dict) else None
+        if budget_format != BUDGET_FORMAT:
+            raise ValueError(f"Unknown budget format in {path}: {budget_format}")
+
+        try:
+            limits = {period: {category: int(pence) for category, pence in state[period].items()} for period in PERIODS}
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Damaged budgets in {path}: {e!r}") from e
+        return cls(path, categories, limits)
+
+    def save(self):
+        """
+        Writes the budgets next to the ledger, atomically.
+        """
+
+        state = {"format": BUDGET_FORMAT, **self.limits}
+        write_atomic(self.path, json.dumps(state, indent = 2).encode("utf-8"))
+
+    def set_limit(self, category, period, pence):
+        """
+        Sets (or with pence None, removes) a category's monthly or yearly budget.
+
+        Raises
+        ------
+        ValueError
+            If the category can't have a budget, or the budget isn't positive.
+        """
+
+        if category not in self.categories:
+            raise ValueError(f"Budgets can only be set for {', '.join(self.categories)}")
+        if pence is None:
+            self.limits[period].pop(category, None)
+        elif pence <= 0:
+            raise ValueError("A budget must be more than £0.00")
+        else:
+            self.limits[period][category] = int(pence)
+
+    def covers(self, categories):
+        """
+        Check if any of the categories has a budget.
+        """
+
+        return any(category in limits for limits in self.limits.values() for category in categories)
+
+    @staticmethod
+    def state(spent, limit):
+        """
+        Returns the index into STATES of a budget with spent pence spent of limit.
+        """
+
+        return 2 if spent > limit else 1 if spent >= Budgets.WARNING_SHARE * limit else 0
+
+    def spending(self, cube, cells):
+        """
+        Reads the spend on every budget covering some (year, month, category) cells from the cube, in O(1) per cell.
+
+        Parameters
+        ----------
+        cube : SummaryCube
+            The running totals.
+        cells : iterable of tuple
+            (year, month, category) cells, e.g. those a new transaction was added to.
+
+        Returns
+        -------
+        dict
+            Maps each budget's (period, year, month, category) to the pence
+            spent (month is None for a yearly budget).
+        """
+
+        spending = {}
+        for year, month, category in cells:
+            # Expenses are negative amounts, so the spend is the negated total
+            if category in self.limits["monthly"]:
+                spending["monthly", year, month, category] = -cube.cells.get((year, month, category), [0, 0])[0]
+            if category in self.limits["yearly"]:
+                spending["yearly", year, None, category] = -cube.category_years.get((year, category), [0, 0])[0]
+        return spending
+
+    def alerts(self, before, after):
+        """
+        Compares the spending on budgets before and after some transactions were added.
+
+        Parameters
+        ----------
+        before : dict
+            The budgets' spend before (see spending).
+        after : dict
+            The same budgets' spend after.
+
+        Returns
+        -------
+        list of dict
+            An alert for every budget whose state got worse, with its
+            "category", "budget" (monthly or yearly), "period" (e.g. 2025-05 or
+            2025), "spent" and "limit" in pounds, "state" and a "message".
+        """
+
+        alerts = []
+        for (period, year, month, category), spent in after.items():
+            limit = self.limits[period][category]
+            state = Budgets.state(spent, limit)
+            if state > Budgets.state(before.get((period, year, month, category), 0), limit):
+                alerts.append(alert(category, period, year, month, spent, limit, state))
+        return alerts
+
+    def evaluate(self, cube):
+        """
+        Works out the state of every budget in every period with transactions, in one pass over the cube.
+
+        Parameters
+        ----------
+        cube : SummaryCube
+            The running totals.
+
+        Returns
+        -------
+        DataFrame
+            One row per budget and period, with budget (monthly or yearly),
+            year, month (0 for yearly budgets), category, spent and limit in
+            pounds, the share spent and the state, sorted by period.
+        """
+
+        tables = []
+        for period, totals, keys in (("monthly", cube.cells, lambda key: key), ("yearly", cube.category_years, lambda key: (key[0], 0, key[1]))):
+            if not self.limits[period] or not totals:
+                continue
+
+            years, months, categories = zip(*(keys(key) for key in totals))
+            table = pd.DataFrame({
+                "budget": period,
+                "year": np.array(years, dtype = "int64"),
+                "month": np.array(months, dtype = "int64"),
+                "category": categories,
+                "spent": -np.array([cell[0] for cell in totals.values()], dtype = "int64")
+            })
+            table["limit"] = table["category"].map(self.limits[period])
+            tables.append(table[table["limit"].notna()])
+
+        if not tables:
+            return pd.DataFrame(columns = ["budget", "year", "month", "category", "spent", "limit", "share", "state"])
+
+        table = pd.concat(tables, ignore_index = True)
+        spent, limit = table["spent"].values, table["limit"].values.astype("int64")
+        table["state"] = np.array(STATES)[np.where(spent > limit, 2, np.where(spent >= Budgets.WARNING_SHARE * limit, 1, 0))]
+        table["share"] = spent / limit
+        table["spent"], table["limit"] = spent / 100, limit / 100
+        return table.sort_values(["year", "month", "budget", "category"], ignore_index = True)[["budget", "year", "month", "category", "spent", "limit", "share", "state"]]
+
+
+def period_name(year, month = None):
+    """
+    Returns a budget period as shown to the user, e.g. "May 2025" or "2025".
+    """
+
+    return str(year) if month is None else f"{calendar.month_name[month]} {year}"
+
+
+def alert(category, period, year, month, spent, limit, state):
+    """
+    Returns an alert for a budget that has moved into state, with the message shown to the user.
+    """
+
+    if STATES[state] == "exceeded":
+        message = f"{period.capitalize()} {category} budget for {period_name(year, month)} exceeded: £{spent / 100:.2f} spent of £{limit / 100:.2f}"
+    else:
+        message = f"{period.capitalize()} {category} budget for {period_name(year, month)} nearly reached: £{spent / 100:.2f} spent of £{limit / 100:.2f} ({spent / limit:.0%})"
+
+    return {
+        "category": category,
+        "budget": period,
+        "period": f"{year:04d}" if month is None else f"{year:04d}-{month:02d}",
+        "spent": spent / 100,
+        "limit": limit / 100,
+        "state": STATES[state],
+        "message": message
+    }
@@ -0,0 +1,501 @@
+"""
+Charts for the Personal-Finance Tracker.
+
+The draw_* functions hold each view's chart layout and draw it with pyplot,
+both for the interactive views (which then call plt.show) and for headless
+rendering to PNG/SVG files. Headless rendering uses matplotlib's Agg
+backend in a pool of worker processes, and keeps every rendered image in a
+disk cache keyed by (view, parameters, data version), so a chart whose data
+hasn't changed is copied from the cache without importing matplotlib at all.
+
+    python main.py chart "month --year 2025 --month May" "category Food" cumulative overview --image-format svg
+    python main.py chart daily "rolling --window 90"
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from reports import month_number, describe_query
+
+CHART_VERSION = 2 # Part of every cache key; bump it when a chart layout changes so old images aren't served
+IMAGE_FORMATS = ["png", "svg"]
+
+
+def draw_month_chart(plt, month, year, summary_without_income, total_income, total_expenses, pie = True):
+    """
+    Draws view_by_month's expenses per category, income vs expenses and (if pie) expenses breakdown charts.
+    """
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title(f"Month: {month} {year}")
+
+    ''' Chart 1 '''
+    x1 = np.array(summary_without_income.index)
+    y1 = np.array(summary_without_income.values.__abs__()) # Convert expenses to absolute values so bars display as positive amounts
+
+    plt.subplot(3, 1, 1)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.bar(x1, y1, width = 0.6)
+
+    plt.title("Expenses per Category")
+    plt.xlabel("Categories")
+    plt.ylabel("Amount (£)")
+
+    ''' Chart 2 '''
+    x2 = np.array(["Total Income", "Total Expenses"])
+    y2 = np.array([total_income, total_expenses * -1])
+    colours = ["#2ECC71", "#E74C3C"]
+
+    plt.subplot(3, 1, 2)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.barh(x2, y2, color = colours)
+
+    plt.title("Total Income VS Total Expenses")
+    plt.xlabel("Amount (£)")
+
+    ''' Chart 3 '''
+    if pie:
+        pie_chart_labels = x1
+        y3 = y1
+
+        plt.subplot(3, 1, 3)
+        plt.pie(y3, labels = pie_chart_labels)
+        plt.title("Expenses Breakdown")
+
+    plt.tight_layout()
+
+
+def draw_category_chart(plt, category, summary, number_of_transactions):
+    """
+    Draws view_by_category's monthly total, average per transaction and number of transactions charts.
+    """
+
+    month_names = [calendar.month_abbr[m] for m in summary.index]
+    amount_of_transactions_per_month = list(number_of_transactions[summary.index])
+
+    if category in ("Income", "Refund"):
+        chart1_title = f"Monthly Total {category}"
+        chart2_title = f"Average {category} per Transaction"
+        chart3_title = f"Number of {category} Transactions"
+    else:
+        chart1_title = "Monthly Total Spend"
+        chart2_title = "Average Spend per Transaction"
+        chart3_title = "Number of Transactions"
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title(f"Category: {category}")
+
+    ''' Chart 1'''
+    x1 = np.array(month_names)
+    y1 = np.array(summary.values.__abs__()) # Convert the values to absolute values so bars display as positive amounts
+
+    plt.subplot(3, 1, 1)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.bar(x1, y1)
+
+    plt.title(chart1_title)
+    plt.xlabel("Months")
+    plt.ylabel("Amount (£)")
+
+    ''' Chart 2 '''
+    x2 = np.array(month_names)
+    y2 = np.array(summary.values.__abs__() / amount_of_transactions_per_month)
+
+    plt.subplot(3, 1, 2)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.plot(x2, y2, marker = "o", mfc = "#2ca02c", c = "#2ca02c", linestyle = "--", linewidth =  1, markersize = 4)
+
+    plt.title(chart2_title)
+    plt.xlabel("Months")
+    plt.ylabel("Amount (£)")
+
+    ''' Chart 3 '''
+    x3 = np.array(month_names)
+    y3 = np.array(amount_of_transactions_per_month)
+
+    plt.subplot(3, 1, 3)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.bar(x3, y3, color = "#ff7f0e")
+
+    plt.title(chart3_title)
+    plt.xlabel("Months")
+    plt.ylabel("Frequency")
+
+    plt.tight_layout()
+
+
+def draw_cumulative_chart(plt, net, cumulative_net_balance):
+    """
+    Draws view_cumulative_net_balance's monthly net balance and cumulative net balance charts.
+    """
+
+    month_names = [f"{calendar.month_abbr[m]} {y}" for y, m in net.index]
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title("Cumulative Net Balance")
+
+    ''' Chart 1 '''
+    x1 = np.array(month_names)
+    y1 = np.array(net.values)
+
+    plt.subplot(2, 1, 1)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.axhline(0, color = "black", linewidth = 1)
+    colours =  ["#2ECC71" if v >= 0 else "#E74C3C" for v in y1]
+    plt.bar(x1, y1, color = colours)
+
+    plt.title("Monthly Net Balance (Income - Expenses)")
+    plt.xlabel("Months")
+    plt.ylabel("Net (£)")
+
+    ''' Chart 2 '''
+    x2 = np.array(month_names)
+    y2 = np.array(cumulative_net_balance.values)
+
+    plt.subplot(2, 1, 2)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.plot(x2, y2, marker = "o", mfc = "#00BFFF", c = "#00BFFF", linestyle = "--", linewidth =  1, markersize = 4)
+
+    plt.title("Cumulative Net Balance Over Time")
+    plt.xlabel("Months")
+    plt.ylabel("Cumulative (£)")
+
+    plt.tight_layout()
+
+
+def draw_overview_chart(plt, summary_without_income, total_income, total_expenses):
+    """
+    Draws view_all_time_overview's expenses per category and income vs expenses charts.
+    """
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title("All-time Overview")
+
+    ''' Chart 1 '''
+    x1 = np.array(summary_without_income.index)
+    y1 = np.array(summary_without_income.values.__abs__()) # Convert expenses to absolute values so bars display as positive amounts
+
+    plt.subplot(2, 1, 1)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.bar(x1, y1, width = 0.6)
+
+    plt.title("Expenses per Category")
+    plt.xlabel("Categories")
+    plt.ylabel("Amount (£)")
+
+    ''' Chart 2 '''
+    x2 = np.array(["Total Income", "Total Expenses"])
+    y2 = np.array([total_income, total_expenses * -1])
+    colours = ["#2ECC71", "#E74C3C"]
+
+    plt.subplot(2, 1, 2)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.barh(x2, y2, color = colours, height = 0.6)
+
+    plt.title("Total Income VS Total Expenses")
+    plt.xlabel("Amount (£)")
+
+    plt.tight_layout()
+
+
+def draw_daily_chart(plt, net, balance):
+    """
+    Draws view_daily_balance's running net balance and daily net balance charts.
+    """
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title("Daily Net Balance")
+
+    ''' Chart 1 '''
+    x1 = balance.index.to_numpy()
+    y1 = np.array(balance.values)
+
+    plt.subplot(2, 1, 1)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.axhline(0, color = "black", linewidth = 1)
+    plt.plot(x1, y1, c = "#00BFFF", linewidth = 1)
+
+    plt.title("Running Net Balance")
+    plt.xlabel("Date")
+    plt.ylabel("Balance (£)")
+
+    ''' Chart 2 '''
+    y2 = np.array(net.values)
+    colours = np.where(y2 >= 0, "#2ECC71", "#E74C3C")
+
+    plt.subplot(2, 1, 2)
+    plt.grid(alpha = 0.3, linestyle = '--')
+    plt.axhline(0, color = "black", linewidth = 1)
+    plt.bar(x1, y2, width = np.timedelta64(1, "D"), color = colours)
+
+    plt.title("Daily Net Balance (Income - Expenses)")
+    plt.xlabel("Date")
+    plt.ylabel("Net (£)")
+
+    plt.tight_layout()
+
+
+def draw_rolling_chart(plt, window, totals):
+    """
+    Draws view_daily_balance's chart of each category's total over the last window days.
+    """
+
+    fig = plt.figure(figsize = (8, 5))
+    fig.canvas.manager.set_window_title(f"{window}-day Totals")
+
+    x = totals.index.to_numpy()
+
+    plt.grid(alpha = 0.3, linestyle = '--')
+    for category in totals.columns:
+        plt.plot(x, np.abs(totals[category].values), linewidth = 1, label = category) # Convert expenses to absolute values so lines display as positive amounts
+
+    plt.title(f"{window}-day Totals by Category")
+    plt.xlabel("Date")
+    plt.ylabel("Amount (£)")
+    plt.legend(fontsize = "small", ncols = 2)
+
+    plt.tight_layout()
+
+
+DRAWERS = {
+    "month": draw_month_chart,
+    "category": draw_category_chart,
+    "cumulative": draw_cumulative_chart,
+    "overview": draw_overview_chart,
+    "daily": draw_daily_chart,
+    "rolling": draw_rolling_chart
+}
+
+
+def chart_arguments(ft, args, income_categories):
+    """
+    Works out the data a report query's chart is drawn from, with the tracker's summary methods.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed query (see reports.parse_query).
+    income_categories : list of str
+        Categories left out of the expense charts.
+
+    Raises
+    ------
+    QueryError
+        If the month of a month query is not a month.
+
+    Returns
+    -------
+    dict
+        Keyword arguments for the query's draw function (without plt).
+    """
+
+    if args.report == "month":
+        month = month_number(args.month)
+        summary, total_income, total_expenses = ft.month_summary(month, args.year)
+        expenses = summary.drop(income_categories, errors = "ignore")
+        return {
+            "month": calendar.month_name[month],
+            "year": args.year,
+            "summary_without_income": expenses,
+            "total_income": total_income,
+            "total_expenses": total_expenses,
+            "pie": bool((expenses != 0).any())
+        }
+
+    if args.report == "category":
+        summary, number_of_transactions = ft.category_summary(args.category)
+        return {"category": args.category, "summary": summary, "number_of_transactions": number_of_transactions}
+
+    if args.report == "cumulative":
+        net, cumulative_net_balance = ft.cumulative_net_balance_summary()
+        return {"net": net, "cumulative_net_balance": cumulative_net_balance}
+
+    if args.report == "daily":
+        net, balance = ft.daily_balance_summary(args.start, args.end)
+        return {"net": net, "balance": balance}
+
+    if args.report == "rolling":
+        return {"window": args.window, "totals": ft.rolling_spend_summary(args.window, args.categories, args.start, args.end)}
+
+    summary, total_income, total_expenses = ft.all_time_summary()
+    return {"summary_without_income": summary.drop(income_categories, errors = "ignore"), "total_income": total_income, "total_expenses": total_expenses}
+
+
+def chart_filename(args, image_format):
+    """
+    Returns the file name for a query's chart, e.g. "month-2025-05.png", "category-food.svg" or "rolling-7-food-from-2024-01-01.png".
+    """
+
+    if args.report == "month":
+        name = f"month-{args.year:04d}-{month_number(args.month):02d}"
+    elif args.report == "category":
+        name = f"category-{args.category.lower()}"
+    elif args.report in ("daily", "rolling"):
+        parts = [args.report]
+        if args.report == "rolling":
+            parts += [str(args.window)] + [category.lower() for category in args.categories or []]
+        parts += [f"{label}-{date:%Y-%m-%d}" for label, date in (("from", args.start), ("to", args.end)) if date is not None]
+        name = "-".join(parts)
+    else:
+        name = args.report
+    return f"{name}.{image_format}"
+
+
+def render_chart(report, arguments, path):
+    """
+    Draws one chart with the Agg backend and saves it to path, atomically. Runs in a worker process.
+    """
+
+    import matplotlib
+    matplotlib.use("Agg") # Non-interactive, so no display is needed
+    import matplotlib.pyplot as plt
+
+    DRAWERS[report](plt, **arguments)
+
+    path = Path(path)
+    path.parent.mkdir(parents = True, exist_ok = True) # Another process may have pruned the cache since
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    plt.savefig(temporary, format = path.suffix[1:])
+    plt.close("all")
+    os.replace(temporary, path)
+
+
+class ChartCache:
+    """
+    Directory of rendered charts, each named by the hash of its (view, parameters, data version, format).
+
+    The charts for each data version are kept in a subdirectory of their
+    own, so those of older versions, which can't be asked for again, are
+    removed in one go by prune.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialises the cache.
+
+        Parameters
+        ----------
+        directory : Path
+            Where the rendered images are kept.
+        """
+
+        self.directory = Path(directory)
+
+    def path(self, args, data_version, image_format):
+        """
+        Returns where a query's chart for the given data version is (or would be) cached.
+        """
+
+        key = json.dumps([CHART_VERSION, describe_query(args), data_version, image_format])
+        return self.version_directory(data_version) / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.{image_format}"
+
+    def version_directory(self, data_version):
+        """
+        Returns the subdirectory holding the charts for a data version.
+        """
+
+        return self.directory / hashlib.sha256(str(data_version).encode("utf-8")).hexdigest()[:16]
+
+    def prune(self, data_version):
+        """
+        Removes every cached chart that isn't for the given data version.
+
+        Parameters
+        ----------
+        data_version : str
+            The ledger's current data version.
+        """
+
+        keep = self.version_directory(data_version)
+        for entry in self.directory.iterdir() if self.directory.exists() else []:
+            if entry == keep:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors = True)
+            else:
+                entry.unlink(missing_ok = True) # Charts cached before they were kept by version
+
+
+def render_charts(ft, queries, directory, image_format = "png", cache = None, data_version = None, workers = None, income_categories = (), pool = None):
+    """
+    Renders the charts for many parsed report queries into a directory.
+
+    Charts found in the cache for the current data version are copied from
+    it. The rest are drawn in a process pool (in this process if there is
+    only one to draw or one CPU, unless a pool is given) and added to the
+    cache, and the charts cached for older data versions are removed.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    queries : list of argparse.Namespace
+        The parsed queries (see reports.parse_query).
+    directory : str
+        Where to write the images.
+    image_format : str
+        "png" or "svg".
+    cache : ChartCache, optional
+        The cache to read from and add to.
+    data_version : str, optional
+        The ledger's data version; charts are only cached when it is given.
+    workers : int, optional
+        Number of rendering processes; defaults to one per CPU.
+    income_categories : list of str
+        Categories left out of the expense charts.
+    pool : concurrent.futures.Executor, optional
+        A process pool to draw in, e.g. one shared with other work, instead of starting one.
+
+    Returns
+    -------
+    list of tuple
+        (path, whether it came from the cache) for each query.
+    """
+
+    directory = Path(directory)
+    directory.mkdir(parents = True, exist_ok = True)
+    if cache is not None and data_version is not None:
+        cache.version_directory(data_version).mkdir(parents = True, exist_ok = True)
+
+    results = []
+    jobs = []
+    for args in queries:
+        destination = directory / chart_filename(args, image_format)
+        cached = cache.path(args, data_version, image_format) if cache is not None and data_version is not None else None
+
+        if cached is not None and cached.exists():
+            shutil.copyfile(cached, destination)
+            results.append((destination, True))
+        else:
+            jobs.append((args.report, chart_arguments(ft, args, income_categories), cached or destination))
+            results.append((destination, False))
+
+    workers = workers or os.cpu_count() or 1
+    if pool is not None:
+        if jobs:
+            list(pool.map(render_chart, *zip(*jobs)))
+    elif len(jobs) <= 1 or workers == 1:
+        for job in jobs:
+            render_chart(*job)
+    else:
+        with ProcessPoolExecutor(max_workers = min(workers, len(jobs))) as pool:
+            list(pool.map(render_chart, *zip(*jobs))) # list() so a worker's exception is raised here
+
+    # Copy newly cached charts to where they were asked for
+    for (report, arguments, path), (destination, from_cache) in zip(jobs, [result for result in results if not result[1]]):
+        if path != destination:
+            shutil.copyfile(path, destination)
+
+    if cache is not None and data_version is not None:
+        cache.prune(data_version)
+
+    return results
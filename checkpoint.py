@@ -0,0 +1,182 @@
+"""
+Checkpoints of the loaded ledger, so the tracker starts without re-reading it.
+
+A checkpoint is a snapshot of the date-sorted DataFrame FinanceTracker
+keeps, together with the structures derived from it (the summary cube's
+cells and the description index), and the store position it was taken at
+(see TransactionStore.position). On startup the snapshot is mapped into
+memory and only the transactions stored after that position are read and
+replayed, so startup time depends on how much was added since the last
+checkpoint rather than on the size of the ledger.
+
+The checkpoint directory (store.aux_path("checkpoint")) is laid out as:
+
+    state.json          format, the snapshot directory, the store position,
+                        row count, the category and description lists the
+                        codes index into, the cube's cells and the index
+    snapshot.7/         one .npy file per column, viewed straight out of a
+                        memory map: dates (datetime64[us]), category codes
+                        (int8), amounts (int64 pence), description codes (int32)
+
+A new snapshot is written in full under a new directory before state.json
+is atomically replaced to point at it, and only then are older snapshots
+removed, so a crash while checkpointing leaves the previous checkpoint usable.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from storage import FileLock, write_atomic
+
+CHECKPOINT_FORMAT = 1
+COLUMNS = {
+    "dates": "datetime64[us]",
+    "categories": "int8",
+    "amounts": "int64",
+    "descriptions": "int32"
+}
+
+
+class Checkpoint:
+    """
+    A snapshot of the ledger and its derived structures, plus the store position it covers.
+    """
+
+    CHECKPOINT_EVERY = 10_000 # Write a new checkpoint once this many transactions have been saved since the last one
+
+    def __init__(self, path, categories):
+        """
+        Initialises the checkpoint.
+
+        Parameters
+        ----------
+        path : str or Path
+            The checkpoint directory.
+        categories : list of str
+            The valid categories, in the order their codes are stored.
+        """
+
+        self.path = Path(path)
+        self.state_path = self.path / "state.json"
+        self.categories = list(categories)
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock")) # Several processes may checkpoint the same ledger
+
+    def load(self):
+        """
+        Maps the latest snapshot into memory and reads its derived state.
+
+        Nothing is parsed: the Date and Amount columns are views over memory
+        maps, and only the small Category and Description codes are copied
+        into the Categoricals, so pages are read from disk as they are used.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the checkpoint is damaged, e.g. a column has the wrong length or dtype.
+
+        Returns
+        -------
+        dict or None
+            The "df", the store "position" it covers, the cube's "cells" and
+            the "description_index" state, or None if there is no checkpoint
+            or it was written for other categories or by another format version.
+        """
+
+        if not self.state_path.exists():
+            return None
+
+        # Held while the snapshot is mapped, so another process's save can't remove it first
+        with self.lock.hold(exclusive = False):
+            state = json.loads(self.state_path.read_text(encoding = "utf-8"))
+            if state.get("format") != CHECKPOINT_FORMAT or state.get("categories") != self.categories:
+                return None
+
+            snapshot = self.path / state["snapshot"]
+            # np.asarray gives plain ndarray views of the memory maps, which pandas handles like any other array
+            columns = {name: np.asarray(np.load(snapshot / f"{name}.npy", mmap_mode = "r")) for name in COLUMNS}
+
+        for name, dtype in COLUMNS.items():
+            if columns[name].shape != (state["rows"],) or columns[name].dtype != np.dtype(dtype):
+                raise ValueError(f"Checkpoint column {name} doesn't match its state")
+
+        cells = {(year, month, category): [total, count] for year, month, category, total, count in state["cells"]}
+        if sum(count for total, count in cells.values()) != state["rows"]:
+            raise ValueError("Checkpoint summaries don't match its row count")
+
+        df = pd.DataFrame({
+            "Date": columns["dates"],
+            "Category": pd.Categorical.from_codes(columns["categories"], dtype = pd.CategoricalDtype(self.categories), validate = False),
+            "Amount": columns["amounts"],
+            "Description": pd.Categorical.from_codes(columns["descriptions"], categories = pd.Index(state["descriptions"], dtype = "str"), validate = False)
+        }, copy = False)
+
+        return {
+            "df": df,
+            "position": state["position"],
+            "cells": cells,
+            "description_index": state["description_index"]
+        }
+
+    def save(self, df, position, cells, description_index):
+        """
+        Writes a new checkpoint and removes the older ones.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Every stored transaction, sorted by date, with the compact dtypes (see storage.compact_dtypes).
+        position : dict
+            The store's position once df was stored (see TransactionStore.position).
+        cells : dict
+            The summary cube's {(year, month, category): [sum in pence, count]} cells.
+        description_index : dict
+            The description index's state (see DescriptionIndex.state).
+
+        Returns
+        -------
+        None
+        """
+
+        with self.lock.hold():
+            self.path.mkdir(parents = True, exist_ok = True)
+            previous = sorted(self.path.glob("snapshot.*"))
+            sequence = 1 + max((int(p.suffix[1:]) for p in previous if p.suffix[1:].isdigit()), default = 0)
+            snapshot = self.path / f"snapshot.{sequence}"
+            snapshot.mkdir()
+
+            category = df["Category"].cat.set_categories(self.categories) if list(df["Category"].cat.categories) != self.categories else df["Category"]
+            columns = {
+                "dates": df["Date"].values,
+                "categories": category.cat.codes.values,
+                "amounts": df["Amount"].values,
+                "descriptions": df["Description"].cat.codes.values
+            }
+            for name, dtype in COLUMNS.items():
+                with open(snapshot / f"{name}.npy", "wb") as f:
+                    np.save(f, np.ascontiguousarray(columns[name], dtype = dtype))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            state = {
+                "format": CHECKPOINT_FORMAT,
+                "snapshot": snapshot.name,
+                "position": position,
+                "rows": len(df),
+                "categories": self.categories,
+                "descriptions": [str(description) for description in df["Description"].cat.categories],
+                "cells": [[year, month, category, total, count] for (year, month, category), (total, count) in cells.items()],
+                "description_index": description_index
+            }
+            write_atomic(self.state_path, json.dumps(state, ensure_ascii = False).encode("utf-8"))
+
+            for old in previous:
+                shutil.rmtree(old, ignore_errors = True)
@@ -0,0 +1,80 @@
+"""
+Thin client for the report server (see server.py).
+
+Only uses the standard library, so a query costs an interpreter start-up
+and one HTTP request, with no pandas import or ledger load:
+
+    python client.py report "month --year 2025 --month May" overview --format text
+    python client.py add --date 18-05-2025 --category Food --amount -12.50 --description "Lunch"
+    python client.py health
+"""
+
+import argparse
+import json
+import sys
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+def request(url, data = None):
+    """
+    Sends a GET (or a POST of data as JSON) and returns the response body.
+
+    Raises
+    ------
+    RuntimeError
+        If the server can't be reached or answers with an error.
+    """
+
+    body = None if data is None else json.dumps(data).encode("utf-8")
+    try:
+        with urlopen(Request(url, body, {"Content-Type": "application/json"})) as response:
+            return response.read().decode("utf-8")
+    except HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get("error", str(e)))
+    except URLError as e:
+        raise RuntimeError(f"Can't reach the server at {url} ({e.reason}); start it with: python main.py serve")
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Query a running Personal-Finance Tracker server")
+    parser.add_argument("--url", default = DEFAULT_URL, help = "the server's address (default: %(default)s)")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    report_parser = commands.add_parser("report", help = "run report queries, e.g. \"month --year 2025 --month May\" \"category Food\"")
+    report_parser.add_argument("queries", nargs = "+", metavar = "QUERY")
+    report_parser.add_argument("--format", choices = ["text", "json", "csv"], default = "text", help = "output format (default: %(default)s)")
+    add_parser = commands.add_parser("add", help = "add a transaction")
+    add_parser.add_argument("--date", required = True, help = "DD-MM-YYYY")
+    add_parser.add_argument("--category", required = True)
+    add_parser.add_argument("--amount", required = True, help = "negative for expenses")
+    add_parser.add_argument("--description", default = "")
+    commands.add_parser("health", help = "check the server is up")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "report":
+            sys.stdout.write(request(f"{args.url}/report?" + urlencode([("q", query) for query in args.queries] + [("format", args.format)])))
+        elif args.command == "add":
+            result = json.loads(request(f"{args.url}/transactions", [{
+                "Date": args.date,
+                "Category": args.category,
+                "Amount": args.amount,
+                "Description": args.description
+            }]))
+            for _, reason in result["rejected"]:
+                print(f"Rejected: {reason}")
+            print(f"{result['added']} transaction(s) added")
+            for alert in result.get("alerts", []):
+                print(f"Budget alert: {alert['message']}")
+        else:
+            print(request(f"{args.url}/health"))
+    except RuntimeError as e:
+        print(f"Error: {e}", file = sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
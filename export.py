@@ -0,0 +1,245 @@
+"""
+Static report packs for the Personal-Finance Tracker.
+
+Exports every report the views can show (each month with transactions, each
+category, the cumulative net balance and the all-time overview) into a
+directory of HTML or Markdown pages with their charts, and an index page
+linking to them, e.g.
+
+    python main.py export reports --year 2025 --format markdown --workers 8
+
+Every summary is read from the summary cube, which is built with one pass
+over the ledger (or restored from a checkpoint), so the ledger is scanned
+at most once however many pages there are. Pages and charts are then
+rendered at the same time in one pool of worker processes, with charts
+served from the chart cache when the data hasn't changed (see charts.py).
+
+The directory is laid out as:
+
+    index.html              links to every page, with months grouped by year
+    month-2025-05.html      one page per report, named like its chart
+    charts/month-2025-05.png
+"""
+
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from charts import render_charts, chart_filename
+from reports import parse_query, run_report
+
+PAGE_FORMATS = {"html": "html", "markdown": "md"} # Format -> file extension
+COLUMNS = {
+    "month": [("Category", "category"), ("Amount", "amount")],
+    "category": [("Month", "period"), ("Amount", "amount"), ("Transactions", "transactions")],
+    "cumulative": [("Month", "period"), ("Net", "amount"), ("Cumulative", "cumulative")],
+    "overview": [("Category", "category"), ("Amount", "amount")]
+}
+MONEY_COLUMNS = {"amount", "cumulative"}
+STYLE = "body { font-family: sans-serif; max-width: 50em; margin: 2em auto; } table { border-collapse: collapse; } td, th { padding: 0.2em 1em; border-bottom: 1px solid #ddd; } td.number { text-align: right; } img { max-width: 100%; }"
+
+
+def pack_queries(ft, categories, year = None):
+    """
+    Returns the parsed queries for every report in a pack: the overview, the cumulative net balance, each month and each category.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    categories : list of str
+        The valid categories, in the order their pages are listed.
+    year : int, optional
+        Only export the months of this year; the other reports cover every year.
+
+    Returns
+    -------
+    list of argparse.Namespace
+        The parsed queries (see reports.parse_query).
+    """
+
+    cube = ft.get_summary_cube()
+
+    queries = ["overview", "cumulative"]
+    queries += [f"month --year {y} --month {m}" for y, m in sorted(cube.months) if year is None or y == year]
+    queries += [f"category {category}" for category in categories if cube.categories.get(category, [0, 0])[1]]
+    return [parse_query(query, categories) for query in queries]
+
+
+def cell(row, key):
+    """
+    Returns one table cell of a report row as text, with amounts in pounds.
+    """
+
+    value = row.get(key, "")
+    return f"£{value:.2f}" if key in MONEY_COLUMNS else str(value)
+
+
+def markdown_page(report, image):
+    """
+    Returns a report's page as Markdown, with its chart and a table of its rows.
+    """
+
+    columns = COLUMNS[report["report"]]
+    lines = [f"# {report['title']}", "", f"[All reports](index.md)", ""]
+    if image:
+        lines += [f"![{report['title']}]({image})", ""]
+
+    lines.append("| " + " | ".join(heading for heading, key in columns) + " |")
+    lines.append("|" + "|".join("---:" if key in MONEY_COLUMNS or key == "transactions" else "---" for heading, key in columns) + "|")
+    for row in report["rows"]:
+        lines.append("| " + " | ".join(cell(row, key) for heading, key in columns) + " |")
+
+    if "total_income" in report:
+        lines += ["", f"**Total income:** £{report['total_income']:.2f}  ", f"**Total expenses:** £{report['total_expenses']:.2f}"]
+    return "\n".join(lines) + "\n"
+
+
+def html_page(report, image):
+    """
+    Returns a report's page as HTML, with its chart and a table of its rows.
+    """
+
+    columns = COLUMNS[report["report"]]
+    title = html.escape(report["title"])
+    parts = [f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n<style>{STYLE}</style>\n</head>\n<body>",
+             f"<h1>{title}</h1>", "<p><a href=\"index.html\">All reports</a></p>"]
+    if image:
+        parts.append(f"<img src=\"{html.escape(image)}\" alt=\"{title}\">")
+
+    parts.append("<table>\n<tr>" + "".join(f"<th>{heading}</th>" for heading, key in columns) + "</tr>")
+    for row in report["rows"]:
+        cells = "".join(f"<td class=\"number\">{html.escape(cell(row, key))}</td>" if key in MONEY_COLUMNS or key == "transactions" else f"<td>{html.escape(cell(row, key))}</td>" for heading, key in columns)
+        parts.append(f"<tr>{cells}</tr>")
+    parts.append("</table>")
+
+    if "total_income" in report:
+        parts.append(f"<p><strong>Total income:</strong> £{report['total_income']:.2f}<br>\n<strong>Total expenses:</strong> £{report['total_expenses']:.2f}</p>")
+    return "\n".join(parts + ["</body>\n</html>"]) + "\n"
+
+
+def index_page(pages, page_format, title, year = None):
+    """
+    Returns the index page linking to every (report, file name) page, with months grouped by year.
+
+    When only the months of one year were exported, the overview and
+    category pages, which still cover every year, are headed as such.
+    """
+
+    sections = {}
+    for report, name in pages:
+        if report["report"] == "month":
+            heading = f"Months of {report['period'][:4]}"
+        else:
+            heading = {"overview": "Overview", "cumulative": "Overview", "category": "Categories"}[report["report"]]
+            if year is not None:
+                heading += " (all years)"
+        sections.setdefault(heading, []).append((report["title"], name))
+
+    if page_format == "markdown":
+        lines = [f"# {title}"]
+        for heading, links in sections.items():
+            lines += ["", f"## {heading}", ""] + [f"- [{text}]({name})" for text, name in links]
+        return "\n".join(lines) + "\n"
+
+    parts = [f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{html.escape(title)}</title>\n<style>{STYLE}</style>\n</head>\n<body>", f"<h1>{html.escape(title)}</h1>"]
+    for heading, links in sections.items():
+        parts.append(f"<h2>{html.escape(heading)}</h2>\n<ul>")
+        parts += [f"<li><a href=\"{html.escape(name)}\">{html.escape(text)}</a></li>" for text, name in links]
+        parts.append("</ul>")
+    return "\n".join(parts + ["</body>\n</html>"]) + "\n"
+
+
+def write_page(path, text):
+    """
+    Writes one page, atomically.
+    """
+
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(text, encoding = "utf-8")
+    os.replace(temporary, path)
+
+
+def render_page(path, page_format, report, image):
+    """
+    Formats one report's page and writes it. Runs in a worker process.
+    """
+
+    write_page(path, (markdown_page if page_format == "markdown" else html_page)(report, image))
+
+
+def export_reports(ft, directory, categories, income_categories, page_format = "html", year = None, image_format = "png", cache = None, data_version = None, workers = None):
+    """
+    Exports every report, with its chart, to a directory of pages.
+
+    The reports are worked out in this process from the summary cube, then
+    their pages and charts are rendered together in a pool of worker
+    processes (in this process if there is only one worker).
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    directory : str
+        Where to write the pages; charts go in its charts/ subdirectory.
+    categories : list of str
+        The valid categories.
+    income_categories : list of str
+        Categories left out of the expense charts.
+    page_format : str
+        "html" or "markdown".
+    year : int, optional
+        Only export the months of this year.
+    image_format : str
+        "png" or "svg".
+    cache : ChartCache, optional
+        The chart cache to read from and add to.
+    data_version : str, optional
+        The ledger's data version; charts are only cached when it is given.
+    workers : int, optional
+        Number of rendering processes; defaults to one per CPU.
+
+    Returns
+    -------
+    dict
+        The "pages" written (including the index), the number of "charts"
+        and how many came from the cache ("cached"), the number of
+        "workers" and the wall-clock "seconds" taken.
+    """
+
+    began = time.perf_counter()
+    directory = Path(directory)
+    directory.mkdir(parents = True, exist_ok = True)
+    extension = PAGE_FORMATS[page_format]
+
+    queries = pack_queries(ft, categories, year)
+    reports = [run_report(ft, args) for args in queries]
+    names = [chart_filename(args, extension) for args in queries]
+    images = [f"charts/{chart_filename(args, image_format)}" for args in queries]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for report, name, image in zip(reports, names, images):
+            render_page(directory / name, page_format, report, image)
+        charts = render_charts(ft, queries, directory / "charts", image_format, cache, data_version, 1, income_categories)
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            # Pages are queued first; they are quick, so the workers are soon all drawing charts
+            pages = [pool.submit(render_page, directory / name, page_format, report, image) for report, name, image in zip(reports, names, images)]
+            charts = render_charts(ft, queries, directory / "charts", image_format, cache, data_version, workers, income_categories, pool)
+            for page in pages:
+                page.result() # So a worker's exception is raised here
+
+    title = "Finance Reports" if year is None else f"Finance Reports for {year}"
+    write_page(directory / f"index.{extension}", index_page(list(zip(reports, names)), page_format, title, year))
+
+    return {
+        "pages": [directory / f"index.{extension}"] + [directory / name for name in names],
+        "charts": len(charts),
+        "cached": sum(cached for path, cached in charts),
+        "workers": workers,
+        "seconds": time.perf_counter() - began
+    }
@@ -0,0 +1,324 @@
+"""
+Bulk import of bank statement files for the Personal-Finance Tracker.
+
+Statement files are parsed in parallel worker processes, their columns are
+mapped onto the tracker's headers, every row is validated with the same rules
+as add_transaction (in vectorised form), and rows that are already stored
+are dropped using a persistent index of (date, amount, description) hashes.
+"""
+
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from storage import HEADERS, DATE_FORMAT, write_atomic
+
+# Column names commonly used by bank exports, mapped onto HEADERS (compared case-insensitively)
+COLUMN_ALIASES = {
+    "date": "Date",
+    "transaction date": "Date",
+    "posted date": "Date",
+    "posting date": "Date",
+    "category": "Category",
+    "type": "Category",
+    "amount": "Amount",
+    "value": "Amount",
+    "amount (gbp)": "Amount",
+    "description": "Description",
+    "details": "Description",
+    "memo": "Description",
+    "narrative": "Description",
+    "reference": "Description",
+    "payee": "Description"
+}
+
+
+def parse_statement(path, column_map = None, date_format = DATE_FORMAT, default_category = None):
+    """
+    Reads one statement file and maps its columns onto HEADERS.
+
+    Runs in a worker process, so it only uses its arguments. Values that
+    can't be parsed become NaT/NaN and are rejected later by validation.
+
+    Parameters
+    ----------
+    path : str
+        The statement CSV file.
+    column_map : dict, optional
+        Extra {statement column: header} mappings, checked before COLUMN_ALIASES.
+    date_format : str
+        The strptime format of the statement's dates.
+    default_category : str, optional
+        Category for every row, for statements without a category column.
+
+    Raises
+    ------
+    ValueError
+        If a column needed for HEADERS can't be found in the file.
+
+    Returns
+    -------
+    DataFrame
+        The statement's rows with HEADERS columns, plus Source (the file) and Line (its line number).
+    """
+
+    raw = pd.read_csv(path, dtype = str, keep_default_na = False)
+
+    renames = {}
+    for column in raw.columns:
+        header = (column_map or {}).get(column) or COLUMN_ALIASES.get(column.strip().lower())
+        if header and header not in renames.values():
+            renames[column] = header
+    raw = raw.rename(columns = renames)
+
+    if "Category" not in raw.columns and default_category is not None:
+        raw["Category"] = default_category
+
+    missing = [header for header in HEADERS if header not in raw.columns]
+    if missing:
+        raise ValueError(f"{path}: no column found for {', '.join(missing)} (use --map COLUMN=HEADER)")
+
+    df = normalise_transactions(raw, date_format)
+    df["Source"] = str(path)
+    df["Line"] = np.arange(2, len(raw) + 2) # Line 1 is the header
+    return df
+
+
+def normalise_transactions(raw, date_format = DATE_FORMAT):
+    """
+    Converts raw string values in HEADERS columns into typed, normalised transactions.
+
+    Values are normalised the same way add_transaction normalises user input,
+    and amounts are converted from pounds to pence. Values that can't be
+    parsed become NaT/NaN and are rejected by transaction_errors.
+
+    Parameters
+    ----------
+    raw : DataFrame
+        Transactions with HEADERS columns holding strings.
+    date_format : str
+        The strptime format of the dates.
+
+    Returns
+    -------
+    DataFrame
+        The transactions with parsed dates, and amounts in pence (as floats, so unparseable ones can be NaN).
+    """
+
+    amounts = raw["Amount"].astype(str).str.replace(r"[£,\s]", "", regex = True)
+
+    return pd.DataFrame({
+        "Date": pd.to_datetime(raw["Date"].astype(str).str.strip(), format = date_format, errors = "coerce"),
+        "Category": raw["Category"].astype(str).str.strip().str.capitalize(),
+        "Amount": (pd.to_numeric(amounts, errors = "coerce") * 100).round(),
+        "Description": raw["Description"].fillna("").astype(str).str.strip().str.capitalize()
+    })
+
+
+def parse_statements(paths, workers = None, **options):
+    """
+    Parses many statement files, in a process pool when there is more than one.
+
+    Parameters
+    ----------
+    paths : list of str
+        The statement files.
+    workers : int, optional
+        Number of worker processes; defaults to one per CPU.
+    **options
+        Passed on to parse_statement.
+
+    Returns
+    -------
+    DataFrame
+        The rows of every file, in the order the files were given.
+    """
+
+    if len(paths) == 1 or workers == 1:
+        frames = [parse_statement(path, **options) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers = workers or min(len(paths), os.cpu_count() or 1)) as pool:
+            frames = list(pool.map(partial(parse_statement, **options), paths))
+
+    return pd.concat(frames, ignore_index = True)
+
+
+def transaction_errors(df, valid_categories, income_categories):
+    """
+    Validates every row with add_transaction's rules at once.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Transactions with HEADERS columns.
+    valid_categories : list of str
+        Categories that are accepted.
+    income_categories : list of str
+        Categories whose amounts must be positive; every other category must be negative.
+
+    Returns
+    -------
+    Series
+        The reason each row is invalid, or an empty string if it is valid.
+    """
+
+    is_income = df["Category"].isin(income_categories)
+
+    conditions = [
+        df["Date"].isna(),
+        ~df["Category"].isin(valid_categories),
+        df["Amount"].isna(),
+        is_income & (df["Amount"] <= 0),
+        ~is_income & (df["Amount"] >= 0),
+        df["Description"].fillna("").eq("")
+    ]
+    reasons = [
+        "Invalid date",
+        "Not a valid category",
+        "Invalid amount",
+        df["Category"] + " must be positive",
+        df["Category"] + " must be negative",
+        "Cannot be left blank"
+    ]
+
+    return pd.Series(np.select(conditions, reasons, default = ""), index = df.index)
+
+
+def transaction_keys(df):
+    """
+    Returns each row's (date, amount in pence, description), the columns its hash is taken over.
+    """
+
+    return pd.DataFrame({
+        "Date": df["Date"].values.astype("datetime64[D]").astype("int64"),
+        "Pence": df["Amount"].values.astype("int64"),
+        "Description": df["Description"].astype(str).values
+    })
+
+
+def hash_keys(keys, occurrence):
+    """
+    Returns a 64-bit hash of each row of transaction_keys with its occurrence number.
+    """
+
+    return pd.util.hash_pandas_object(keys.assign(Occurrence = occurrence), index = False).values
+
+
+def transaction_hashes(df):
+    """
+    Returns a 64-bit hash of each row's (date, amount in pence, description).
+
+    Identical rows within one file (e.g. two bus fares on the same day) are
+    told apart by also hashing how many times the row has already appeared in
+    that file, so they are not mistaken for duplicates of each other, while the
+    same rows in an overlapping statement still hash the same.
+    """
+
+    keys = transaction_keys(df)
+    source = df["Source"].values if "Source" in df.columns else np.zeros(len(df))
+    return hash_keys(keys, keys.groupby([source, keys["Date"], keys["Pence"], keys["Description"]]).cumcount().values)
+
+
+class HashIndex:
+    """
+    Persistent, sorted set of the hashes of every stored transaction, used to skip rows that are already stored.
+
+    Identical stored transactions are numbered 0, 1, 2... like the rows of a
+    statement (see transaction_hashes), however and whenever they were stored,
+    so a statement listing n of them skips the first n. The index is saved with the store position it covers (see
+    TransactionStore.position), like a checkpoint, so it can be brought up to
+    date by hashing only the transactions stored after it.
+    """
+
+    def __init__(self, path):
+        """
+        Initialises the index, loading it from disk if it exists.
+
+        Parameters
+        ----------
+        path : Path
+            The .npz file the index is stored in.
+        """
+
+        self.path = path
+        self.hashes = None
+        self.position = None # The store position the hashes cover
+
+        try:
+            with np.load(path) as saved:
+                self.hashes = saved["hashes"]
+                self.position = json.loads(str(saved["position"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.hashes = None # Missing or damaged, so it is rebuilt from the store
+
+    def exists(self):
+        """
+        Check if the index has been built yet.
+        """
+
+        return self.hashes is not None
+
+    def contains(self, hashes):
+        """
+        Returns a boolean array saying which of the given hashes are already in the index.
+        """
+
+        if not self.exists() or len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype = bool)
+
+        positions = np.searchsorted(self.hashes, hashes).clip(max = len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add(self, hashes):
+        """
+        Adds hashes to the index.
+        """
+
+        existing = self.hashes if self.exists() else np.empty(0, dtype = "uint64")
+        new = np.unique(np.asarray(hashes, dtype = "uint64"))
+        new = new[~self.contains(new)]
+        self.hashes = np.insert(existing, np.searchsorted(existing, new), new) # A merge, as both are sorted
+
+    def add_stored(self, df):
+        """
+        Adds the hashes of newly stored transactions.
+
+        Each row identical to ones already in the index is numbered on from
+        them, by looking for its first occurrence number not in the index yet.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions, in the order they were stored.
+
+        Returns
+        -------
+        None
+        """
+
+        keys = transaction_keys(df)
+        _, first, codes = np.unique(pd.util.hash_pandas_object(keys, index = False).values, return_index = True, return_inverse = True)
+        unique = keys.iloc[first].reset_index(drop = True)
+
+        start = np.zeros(len(unique), dtype = "int64")
+        probing = np.arange(len(unique))
+        while len(probing):
+            probing = probing[self.contains(hash_keys(unique.iloc[probing], start[probing]))]
+            start[probing] += 1
+
+        self.add(hash_keys(keys, start[codes] + pd.Series(codes).groupby(codes).cumcount().values))
+
+    def save(self, position):
+        """
+        Saves the index atomically, with the store position it now covers.
+        """
+
+        buffer = io.BytesIO()
+        np.savez(buffer, hashes = self.hashes, position = json.dumps(position))
+        write_atomic(self.path, buffer.getvalue())
+        self.position = position
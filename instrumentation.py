@@ -0,0 +1,271 @@
+"""
+Opt-in timing instrumentation for the Personal-Finance Tracker.
+
+Hot paths are wrapped in tracer.span("stage name"). When instrumentation is
+off (the default) a span is a shared do-nothing object, so the cost is one
+attribute check. When it is on, every span records its wall time, the number
+of rows it scanned and the change in resident memory, and at exit:
+
+    - a summary table of every stage is printed to stderr
+    - the spans are written to a trace file in Chrome's trace event format,
+      which chrome://tracing and https://ui.perfetto.dev can open
+    - optionally, a cProfile dump is written for each menu command
+
+It is turned on with `python main.py --trace [FILE] [--cprofile DIR]`, or by
+setting FINANCE_TRACKER_TRACE=FILE (and FINANCE_TRACKER_CPROFILE=DIR).
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+TRACE_ENV = "FINANCE_TRACKER_TRACE"
+CPROFILE_ENV = "FINANCE_TRACKER_CPROFILE"
+DEFAULT_TRACE_FILE = "finance_tracker_trace.json"
+
+
+def current_rss_mb():
+    """
+    Returns the process's resident memory in MB, or None where /proc is not available.
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Span:
+    """
+    A timed stage. Set rows inside the with block if the count is only known then.
+    """
+
+    def __init__(self, tracer, name, rows):
+        """
+        Initialises the span.
+
+        Parameters
+        ----------
+        tracer : Tracer
+            The tracer the span is recorded in.
+        name : str
+            The stage name.
+        rows : int, optional
+            The number of rows the stage scans.
+        """
+
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.rss = current_rss_mb()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        rss = current_rss_mb()
+        self.tracer.record({
+            "name": self.name,
+            "start": self.start - self.tracer.started,
+            "seconds": seconds,
+            "rows": None if self.rows is None else int(self.rows),
+            "memory_delta_mb": None if rss is None or self.rss is None else rss - self.rss,
+            "thread": threading.get_ident()
+        })
+
+
+class NullSpan:
+    """
+    The span handed out while instrumentation is off; it records nothing.
+    """
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans for the session and reports them at exit.
+    """
+
+    def __init__(self):
+        """
+        Initialises a disabled tracer.
+        """
+
+        self.enabled = False
+        self.trace_path = None
+        self.cprofile_dir = None
+        self.spans = []
+        self.commands = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def enable(self, trace_path = DEFAULT_TRACE_FILE, cprofile_dir = None):
+        """
+        Turns instrumentation on and reports the session when the program exits.
+
+        Parameters
+        ----------
+        trace_path : str
+            Where to write the trace file.
+        cprofile_dir : str, optional
+            Directory to write a cProfile dump per command into.
+
+        Returns
+        -------
+        None
+        """
+
+        if not self.enabled:
+            atexit.register(self.finish)
+
+        self.enabled = True
+        self.trace_path = Path(trace_path)
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+
+    def enable_from_environment(self):
+        """
+        Turns instrumentation on if FINANCE_TRACKER_TRACE is set.
+        """
+
+        if os.environ.get(TRACE_ENV):
+            self.enable(os.environ[TRACE_ENV], os.environ.get(CPROFILE_ENV))
+
+    def span(self, name, rows = None):
+        """
+        Returns a context manager that times the stage called name.
+
+        Parameters
+        ----------
+        name : str
+            The stage name, e.g. "view by category: summary".
+        rows : int, optional
+            The number of rows the stage scans.
+
+        Returns
+        -------
+        Span or NullSpan
+            The span, or a shared do-nothing span when instrumentation is off.
+        """
+
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, rows)
+
+    def record(self, span):
+        """
+        Adds a finished span's measurements (thread-safe).
+        """
+
+        with self.lock:
+            self.spans.append(span)
+
+    def command(self, name, function, *args):
+        """
+        Runs a menu command, under cProfile if a cProfile directory was given.
+
+        Parameters
+        ----------
+        name : str
+            The command name, used for its span and dump file.
+        function : callable
+            The command.
+        *args
+            Passed on to function.
+
+        Returns
+        -------
+        object
+            What function returns.
+        """
+
+        if not self.enabled:
+            return function(*args)
+
+        self.commands += 1
+        with self.span(f"command: {name}"):
+            if self.cprofile_dir is None:
+                return function(*args)
+
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(function, *args)
+            finally:
+                self.cprofile_dir.mkdir(parents = True, exist_ok = True)
+                profiler.dump_stats(self.cprofile_dir / f"{self.commands:03d}-{name.replace(' ', '_')}.prof")
+
+    def summary_rows(self):
+        """
+        Returns one (stage, calls, total seconds, max seconds, rows, memory delta) tuple per stage, slowest first.
+        """
+
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span["name"], [0, 0.0, 0.0, 0, 0.0])
+            stage[0] += 1
+            stage[1] += span["seconds"]
+            stage[2] = max(stage[2], span["seconds"])
+            stage[3] += span["rows"] or 0
+            stage[4] += span["memory_delta_mb"] or 0.0
+
+        return sorted(((name, *values) for name, values in stages.items()), key = lambda stage: -stage[2])
+
+    def print_summary(self, file = sys.stderr):
+        """
+        Prints the session's summary table.
+        """
+
+        print(f"\n{'Stage':<36} | {'Calls':>5} | {'Total (ms)':>10} | {'Max (ms)':>9} | {'Rows':>12} | {'Mem (MB)':>8}", file = file)
+        print("-" * 96, file = file)
+        for name, calls, total, longest, rows, memory in self.summary_rows():
+            print(f"{name:<36} | {calls:>5} | {total * 1e3:>10.2f} | {longest * 1e3:>9.2f} | {rows:>12,} | {memory:>8.1f}", file = file)
+
+    def write_trace(self):
+        """
+        Writes the spans to the trace file in Chrome's trace event format.
+        """
+
+        events = [{
+            "name": span["name"],
+            "ph": "X", # A complete event, with a start and a duration
+            "ts": span["start"] * 1e6,
+            "dur": span["seconds"] * 1e6,
+            "pid": os.getpid(),
+            "tid": span["thread"],
+            "args": {"rows": span["rows"], "memory_delta_mb": span["memory_delta_mb"]}
+        } for span in self.spans]
+
+        self.trace_path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+    def finish(self):
+        """
+        Prints the summary table and writes the trace file. Registered to run at exit.
+        """
+
+        if not self.spans:
+            return
+
+        self.print_summary()
+        self.write_trace()
+        print(f"Trace written to {self.trace_path}" + (f", cProfile dumps to {self.cprofile_dir}" if self.cprofile_dir else ""), file = sys.stderr)
+
+
+tracer = Tracer()
+tracer.enable_from_environment()
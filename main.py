@@ -6,12 +6,27 @@ visualise summaries by generating charts using pandas and matplotlib.
 """
 
 import pandas as pd
-from pathlib import Path
-import matplotlib.pyplot as plt
 import numpy as np 
 from datetime import datetime
 import sys
 import calendar
+import argparse
+import threading
+import itertools
+from storage import open_store, migrate, HEADERS, DATE_FORMAT, write_csv_file, write_csv_batches, empty_ledger, compact_dtypes, concat_ledgers, sort_by_date
+from importer import parse_statements, transaction_errors, transaction_hashes, HashIndex
+from aggregates import SummaryCube
+from timeseries import DailySeries
+from budgets import Budgets, PERIODS, STATES, period_name
+from text_index import DescriptionIndex
+from anomalies import CategoryStats, monthly_spikes, anomaly_messages
+from checkpoint import Checkpoint
+from autosave import AutoSaver
+from instrumentation import tracer, DEFAULT_TRACE_FILE
+from charts import draw_month_chart, draw_category_chart, draw_cumulative_chart, draw_overview_chart, draw_daily_chart, draw_rolling_chart, render_charts, ChartCache, IMAGE_FORMATS
+from reports import REPORTS, FORMATTERS, QueryError, add_report_arguments, parse_query, run_report, describe_query, month_number
+from export import export_reports, PAGE_FORMATS
+from server import serve, DEFAULT_HOST, DEFAULT_PORT
 
 class FinanceTracker:
     """
@@ -23,37 +38,88 @@ class FinanceTracker:
 
     MONTHS_ABBR = {1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun", 7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"}
     MONTHS_FULL = list(calendar.month_name)[1:]
-    HEADERS = ["Date", "Category", "Amount", "Description"]
+    HEADERS = HEADERS
     VALID_CATEGORIES = ["Food", "Entertainment", "Bills", "Leisure", "Transport", "Shopping", "Rent", "Income", "Refund"]
     INCOME_CATEGORIES = ["Income", "Refund"]
     EXPENSE_CATEGORIES = []
     for c in VALID_CATEGORIES:
         if c not in INCOME_CATEGORIES:
             EXPENSE_CATEGORIES.append(c)
+    ROLLING_WINDOWS = [7, 30, 90] # Days covered by the rolling totals view_daily_balance shows
     
-    def __init__(self):
+    def __init__(self, path = None, out_of_core = False, chunk_rows = 250_000, backend = "ledger"):
         """
         Initialises the DataFrame used to store transactions. 
 
+        Loads every monthly partition of the ledger and replays any journalled
+        transactions on top of them. On the first run, an existing
+        transactions.csv is imported. The DataFrame is kept sorted by date, so
+        search_transactions can find date ranges by binary search.
+
+        If a checkpoint was written (see checkpoint.py), the DataFrame, summary
+        cube and description index are restored from it instead, and only the
+        transactions stored after it are read and replayed. A damaged or stale
+        checkpoint is ignored and everything is rebuilt from the store, after
+        which a new checkpoint is written.
+
+        In out-of-core mode the ledger is never loaded into the DataFrame.
+        Instead the summaries every view reads from are built from the per-month
+        totals the store keeps (the ledger's manifest, or a GROUP BY in SQLite),
+        so memory stays bounded for ledgers larger than RAM. The DataFrame then
+        only holds transactions added during this session.
+
         Parameters
         ----------
-        None
+        path : str, optional
+            Where transactions are stored; defaults to transactions.ledger or transactions.sqlite.
+        out_of_core : bool
+            Whether to stream the ledger instead of loading it.
+        chunk_rows : int
+            Number of transactions per chunk when streaming.
+        backend : str
+            The storage backend, "ledger" or "sqlite".
         """
 
-        if Path("transactions.csv").exists():
-            df = pd.read_csv("transactions.csv") 
-            df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y") # Converting the dates column from strings to datetime objects to help with filtering transactions
-        else:
-            df = pd.DataFrame(columns = FinanceTracker.HEADERS)
-            # Explicitly set dtypes so pandas doesn't guess column types when concatenating new rows
-            df = df.astype({
-                "Date": "datetime64[ns]",
-                "Category": "string",
-                "Amount": "float",
-                "Description": "string"
-            })
-
-        self.df = df
+        self.store = open_store(backend, path, FinanceTracker.VALID_CATEGORIES)
+        self.out_of_core = out_of_core
+        self.chunk_rows = chunk_rows
+
+        self.pending_transactions = [] # Staging buffer of transaction records that have not been merged into the DataFrame yet
+        self.unsaved_transactions = [] # Transaction records that have not been written to the journal yet
+        self.data_version = 0 # Bumped whenever the DataFrame changes, so cached summaries know when they are stale
+        self.summary_cube = None
+        self.daily_series = None # Built from the data the first time a daily series is asked for
+        self.description_index = None # Built from the saved index or the data the first time a search looks up words
+        self.category_stats = None # Loaded or built the first time transactions are checked for anomalies
+        try:
+            self.budgets = Budgets.load(self.store.aux_path("budgets.json"), FinanceTracker.EXPENSE_CATEGORIES)
+        except (OSError, ValueError) as e:
+            # Budgets only add alerts, so every other command still works; saving new budgets replaces the file
+            print(f"Ignoring damaged budgets, starting without any: {e}", file = sys.stderr)
+            self.budgets = Budgets(self.store.aux_path("budgets.json"), FinanceTracker.EXPENSE_CATEGORIES)
+        self.checkpoint = Checkpoint(self.store.aux_path("checkpoint"), FinanceTracker.VALID_CATEGORIES)
+        self.checkpoint_rows = 0 # Transactions saved since the checkpoint was written
+        self.checkpoint_stale = False # Whether the store has been compacted since the checkpoint was written
+        self.autosaver = None # Started by menu, so interactive saves run on a background thread
+        self.store_lock = threading.RLock() # Held while writing to the store, and while reading it together with unsaved transactions; taken before the store's own lock
+        self.state_lock = threading.RLock() # Held while the staged transactions, DataFrame and derived structures change or are captured
+        self.store_sequence = None # The store's change-sequence number, position and version when this process last read or wrote it
+        self.store_position = None
+        self.store_version = None
+
+        if out_of_core:
+            # Summaries come from the store's per-month totals, so there is nothing for a checkpoint to save here
+            with self.store_lock, self.store.locked(exclusive = False):
+                self.store.open()
+                self.df = empty_ledger(FinanceTracker.VALID_CATEGORIES)
+                self.summary_cube = self.build_summary_cube()
+                self.record_store_state()
+        elif not self.restore_checkpoint():
+            with self.store_lock, self.store.locked(exclusive = False), tracer.span("load") as span:
+                self.df = sort_by_date(self.store.load())
+                span.rows = len(self.df)
+                self.record_store_state()
+            self.write_checkpoint()
 
     def menu(self):
         """
@@ -74,7 +140,11 @@ class FinanceTracker:
         None
         """
 
+        self.autosaver = AutoSaver(self.write_unsaved)
+
         while True:
+            self.report_save_errors()
+
             while True:
                 try:
                     option = int(input(f"\n1) Add a transaction \n2) View transaction(s) \n3) Exit \n\nSelect an option: "))
@@ -86,7 +156,7 @@ class FinanceTracker:
                     break
 
             if option == 1:
-                self.add_transaction()
+                tracer.command("add transaction", self.add_transaction)
             elif option == 2:
                 self.sub_menu()
             elif option == 3:
@@ -101,6 +171,9 @@ class FinanceTracker:
         wishes to add no further transactions, transactions are saved to 
         the CSV.
 
+        Any budget a transaction moves into a worse state (see budgets.py) is
+        reported as soon as the transaction is entered.
+
         Parameters
         ----------
         None
@@ -169,14 +242,10 @@ class FinanceTracker:
                 else: 
                     break
 
-            transaction = {
-                "Date": parsed_date,
-                "Category": category,
-                "Amount": amount,
-                "Description":description
-            }
-            # Append the new transaction (as a 1-row DataFrame) to the existing DataFrame, and reset the index to keep it continuous
-            self.df = pd.concat([self.df, pd.DataFrame([transaction])], ignore_index = True) 
+            alerts = self.stage_transaction(parsed_date, category, amount, description)
+
+            for alert in alerts:
+                print(f"\nBudget alert: {alert['message']}")
 
             print("")
 
@@ -193,60 +262,131 @@ class FinanceTracker:
             if add_another_transaction == "Yes":
                 pass
             elif add_another_transaction == "No":
-                self.save_to_csv()
+                self.save()
 
                 print(f"\n{total_transactions} transaction(s) added successfully")
                 break
 
-    def sub_menu(self):
+    def stage_transaction(self, date, category, amount, description):
         """
-        Displays the sub-menu to the user.
+        Stages a validated transaction in the buffer without touching the DataFrame.
+
+        Appending a record to a list is constant-time, whereas concatenating a
+        1-row DataFrame copies every existing row. Staged transactions are merged
+        into the DataFrame in one go by flush_pending_transactions.
 
         Parameters
         ----------
-        None
-
-        Raises
-        ------
-        ValueError 
-            If they enter an invalid option or select an option that is not
-            within the range of accepted values.
+        date : datetime
+            The date of the transaction.
+        category : str
+            One of VALID_CATEGORIES.
+        amount : float
+            In pounds, positive for income/refunds, negative for expenses.
+        description : str
+            A short description of the transaction.
 
         Returns
         -------
-        None
+        list of dict
+            An alert for each budget the transaction moved into a worse state (see Budgets.alerts).
         """
 
-        while True:
-            while True:
-                try:
-                    option = int(input(f"\n1) View by month \n2) View by category \n3) View cumulative net balance \n4) View all-time overview \n5) Go back \n\nSelect an option: "))
-                    if option < 1 or option > 5:
-                        raise ValueError("Input must be between 1 and 5")
-                except ValueError as e:
-                    print(e)
-                else:
-                    break 
-
-            if option == 1:
-                self.view_by_month()
+        pence = round(amount * 100) # Amounts are kept as exact integer pence, and only shown in pounds
+        transaction = {
+            "Date": date,
+            "Category": category,
+            "Amount": pence,
+            "Description": description
+        }
+
+        if self.budgets.covers([category]):
+            self.get_summary_cube() # Budgets are checked against the cube's running totals, so it has to be current
+
+        alerts = []
+        with self.state_lock:
+            self.pending_transactions.append(transaction)
+            self.unsaved_transactions.append(transaction)
+
+            if self.summary_cube is not None and self.summary_cube.version == self.data_version:
+                # Keep the cached summaries current in O(1) instead of rebuilding them on the next view
+                cells = [(date.year, date.month, category)]
+                before = self.budgets.spending(self.summary_cube, cells)
+                self.summary_cube.add(date, category, pence)
+                self.summary_cube.version = self.data_version + 1
+                alerts = self.budgets.alerts(before, self.budgets.spending(self.summary_cube, cells))
+            if self.daily_series is not None and self.daily_series.version == self.data_version:
+                self.daily_series.add(date, category, pence)
+                self.daily_series.version = self.data_version + 1
+            if self.description_index is not None and self.description_index.version == self.data_version:
+                self.description_index.add(description, pence)
+                self.description_index.version = self.data_version + 1
+            if self.category_stats is not None and self.category_stats.version == self.data_version:
+                self.category_stats.add(category, pence)
+                self.category_stats.version = self.data_version + 1
+
+            self.data_version += 1
+
+        return alerts
+
+    def stage_transactions(self, df, saved = False):
+        """
+        Stages many validated transactions at once, e.g. from a bulk import.
 
-            elif option == 2:
-                self.view_by_category()
+        Budgets are checked once per (year, month, category) the transactions
+        fall in rather than once per transaction, so a budget exceeded by
+        several of them raises one alert.
 
-            elif option == 3:
-                self.view_cumulative_net_balance()
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions, with HEADERS columns and Amount in pence.
+        saved : bool
+            Whether they are already in the store (e.g. written by another
+            process), in which case they aren't saved again or checked against budgets.
 
-            elif option == 4:
-                self.view_all_time_overview()
+        Returns
+        -------
+        list of dict
+            An alert for each budget the transactions moved into a worse state (see Budgets.alerts).
+        """
 
-            elif option == 5:
-                break
-    
-    @staticmethod
-    def exit_program():
+        records = df[FinanceTracker.HEADERS].to_dict("records")
+
+        cells = []
+        if not saved and self.budgets.covers(df["Category"].unique()):
+            self.get_summary_cube() # Budgets are checked against the cube's running totals, so it has to be current
+            periods = pd.DataFrame({"year": df["Date"].dt.year, "month": df["Date"].dt.month, "category": df["Category"].astype(str)}).drop_duplicates()
+            cells = list(zip(periods["year"].tolist(), periods["month"].tolist(), periods["category"].tolist()))
+
+        alerts = []
+        with self.state_lock:
+            self.pending_transactions.extend(records)
+            if not saved:
+                self.unsaved_transactions.extend(records)
+
+            if self.summary_cube is not None and self.summary_cube.version == self.data_version:
+                before = self.budgets.spending(self.summary_cube, cells)
+                self.summary_cube.add_dataframe(df)
+                self.summary_cube.version = self.data_version + 1
+                alerts = self.budgets.alerts(before, self.budgets.spending(self.summary_cube, cells))
+            if self.daily_series is not None and self.daily_series.version == self.data_version:
+                self.daily_series.add_dataframe(df)
+                self.daily_series.version = self.data_version + 1
+            if self.description_index is not None and self.description_index.version == self.data_version:
+                self.description_index.add_dataframe(df)
+                self.description_index.version = self.data_version + 1
+            if self.category_stats is not None and self.category_stats.version == self.data_version:
+                self.category_stats.add_dataframe(df)
+                self.category_stats.version = self.data_version + 1
+
+            self.data_version += 1
+
+        return alerts
+
+    def flush_pending_transactions(self):
         """
-        Helper method to terminate the program safely. 
+        Merges every staged transaction into the DataFrame with a single concat.
 
         Parameters
         ----------
@@ -257,243 +397,192 @@ class FinanceTracker:
         None
         """
 
-        print("Closing program...")
-        sys.exit(0)
+        with self.state_lock:
+            if not self.pending_transactions:
+                return
 
-    def view_by_month(self):
-        """
-        Displays a financial summary for a given month.
+            with tracer.span("flush pending transactions", len(self.pending_transactions)):
+                new_rows = sort_by_date(self.records_to_dataframe(self.pending_transactions))
 
-        Prompts the user to enter a month. Calculates the sum for each category
-        and calculates total income/expense. 
-        
-        Optionally displays:
-            - Bar chart of expenses by category
-            - Horizontal bar chart of income vs expenses
-            - Pie chart of expense breakdown
+                if self.df.empty:
+                    # Concatenating onto an empty DataFrame is deprecated in pandas, so take the new rows as they are
+                    self.df = new_rows
+                elif new_rows["Date"].iloc[0] >= self.df["Date"].iloc[-1]:
+                    # Append the whole batch to the existing DataFrame, and reset the index to keep it continuous
+                    self.df = concat_ledgers([self.df, new_rows])
+                else:
+                    # Some new rows are dated before the last existing one, so merge the two sorted runs to keep the DataFrame in date order
+                    self.df = sort_by_date(concat_ledgers([self.df, new_rows]))
+
+            self.pending_transactions = []
+
+    @staticmethod
+    def records_to_dataframe(records):
+        """
+        Helper method to turn staged transaction records into a DataFrame with the ledger's compact dtypes.
 
         Parameters
         ----------
-        None
-
-        Raises
-        ------
-        ValueError
-            If the month is not a valid month name.
+        records : list of dict
+            Transaction records, with amounts in pence.
 
         Returns
         -------
-        None
+        DataFrame
+            The transactions.
         """
 
-        if self.check_empty_df():
-            return 
-
-        while True:
-            try: 
-                month = input(f"\nEnter the full month name: ").strip().capitalize()
-                if month not in FinanceTracker.MONTHS_FULL:
-                    raise ValueError("Incorrect month name")
-            except ValueError as e:
-                print(e)
-            else:
-                break
+        df = pd.DataFrame(records, columns = FinanceTracker.HEADERS)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return compact_dtypes(df, FinanceTracker.VALID_CATEGORIES)
 
-        print(f"\n----------------------------")
+    def search_transactions(self, query):
+        """
+        Returns the transactions matching a query, in date order.
 
-        print(f"\nSummary for {month}:\n")
+        The DataFrame is sorted by date, so the query's date range is sliced
+        out by binary search and only the rows inside it are tested against the
+        other predicates. In out-of-core mode only the month partitions the
+        date range covers are read from the store. Words in the query's text
+        are looked up in the description index, and rows are then kept by
+        their description alone.
 
-        # Filter rows for the given month, then group by category and sum the amounts
-        summary = self.df[self.df["Date"].dt.month_name() == month].groupby("Category")["Amount"].sum()  
+        Parameters
+        ----------
+        query : TransactionQuery
+            The date range, categories, amount bounds, description pattern and words to match.
 
-        # Filter rows for the given month and categories in INCOME_CATEGORIES, then sum the amounts
-        total_income = self.df[(self.df["Date"].dt.month_name() == month) & (self.df["Category"].isin(FinanceTracker.INCOME_CATEGORIES))]["Amount"].sum() 
+        Returns
+        -------
+        DataFrame
+            The matching transactions.
+        """
 
-        # Filter rows for the given month and categories in EXPENSE_CATEGORIES, then sum the amounts
-        total_expenses = self.df[(self.df["Date"].dt.month_name() == month) & (self.df["Category"].isin(FinanceTracker.EXPENSE_CATEGORIES))]["Amount"].sum()
+        if self.out_of_core:
+            years = self.get_summary_cube().years()
+            if not years:
+                return empty_ledger(FinanceTracker.VALID_CATEGORIES)
 
-        for category, amount in summary.items(): 
-            print(f"{category}: £{amount:.2f}")
+            with tracer.span("search: read months") as span, self.store_lock, self.state_lock:
+                start, end = query.months((years[0], 1), (years[-1], 12))
+                df = sort_by_date(concat_ledgers([self.store.read_months(start, end), self.records_to_dataframe(self.unsaved_transactions)]))
+                span.rows = len(df)
+        else:
+            with self.state_lock:
+                self.flush_pending_transactions()
+                df = self.df
 
-        print(f"\nTotal income: £{total_income:.2f} \nTotal expenses: £{total_expenses:.2f}")
+        descriptions = None if query.text is None else self.get_description_index().match(query.text, query.any_term)
 
-        print(f"\n----------------------------")
+        with tracer.span("search", len(df)):
+            return query.apply(df, descriptions)
 
-        if self.get_visualisation_choice() == "Yes":
-            # Drops any categories listed in INCOME_CATEGORIES if they exist, if they don't, no error is raised
-            summary_without_income = summary.drop(FinanceTracker.INCOME_CATEGORIES, errors = "ignore") 
+    def get_summary_cube(self):
+        """
+        Returns the (year, month, category) summary cube for the current data.
 
-            fig = plt.figure(figsize = (8, 5))
-            fig.canvas.manager.set_window_title(f"Month: {month}")
+        The cube is built with one pass over the data the first time it is
+        needed, and from then on is updated in place by stage_transaction.
 
-            ''' Chart 1 '''
-            x1 = np.array(summary_without_income.index)
-            y1 = np.array(summary_without_income.values.__abs__()) # Convert expenses to absolute values so bars display as positive amounts
+        Parameters
+        ----------
+        None
 
-            plt.subplot(3, 1, 1)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.bar(x1, y1, width = 0.6)
+        Returns
+        -------
+        SummaryCube
+            The cube for the current data version.
+        """
 
-            plt.title("Expenses per Category")
-            plt.xlabel("Categories")
-            plt.ylabel("Amount (£)")
+        if self.summary_cube is None or self.summary_cube.version != self.data_version:
+            self.summary_cube = self.build_summary_cube()
+        return self.summary_cube
 
-            ''' Chart 2 '''
-            x2 = np.array(["Total Income", "Total Expenses"])
-            y2 = np.array([total_income, total_expenses * -1])
-            colours = ["#2ECC71", "#E74C3C"]
+    def build_summary_cube(self, from_manifest = True):
+        """
+        Builds the summary cube from scratch for the current data.
 
-            plt.subplot(3, 1, 2)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.barh(x2, y2, color = colours)
+        The cube is built from the per-month totals the store keeps (the
+        ledger's manifest, or SQLite's own GROUP BY) plus the unsaved
+        transactions, so no stored transaction is grouped in pandas. That
+        also holds with the ledger loaded, as long as no other process has
+        written to the store since the DataFrame was read; otherwise the
+        DataFrame is grouped in one go. In out-of-core mode the stored
+        transactions can instead be streamed in chunks of chunk_rows.
 
-            plt.title("Total Income VS Total Expenses")
-            plt.xlabel("Amount (£)")
+        Parameters
+        ----------
+        from_manifest : bool
+            Whether to use the store's totals rather than grouping (or streaming) every transaction.
 
-            ''' Chart 3 '''
-            expenses_df = self.df[self.df["Category"].isin(FinanceTracker.EXPENSE_CATEGORIES)]
-            
-            if not expenses_df.empty:
-                pie_chart_labels = x1
-                y3 = y1
+        Returns
+        -------
+        SummaryCube
+            The cube for the current data version.
+        """
 
-                plt.subplot(3, 1, 3)
-                plt.pie(y3, labels = pie_chart_labels)
-                plt.title("Expenses Breakdown")
+        # The store and the unsaved transactions have to be read together, without the autosave thread moving rows between them
+        with self.store_lock, self.store.locked(exclusive = False), self.state_lock, tracer.span("build summary cube") as span:
+            # A loaded DataFrame holds exactly what is stored plus the unsaved transactions until another process writes
+            if from_manifest and (self.out_of_core or self.store.sequence() == self.store_sequence):
+                # The store already keeps (or can total itself) the per-month totals, so no transaction is read here
+                cube = SummaryCube(FinanceTracker.INCOME_CATEGORIES, self.store.summary_cells())
+                cube.add_dataframe(self.records_to_dataframe(self.unsaved_transactions)) # Then add the transactions that haven't been stored yet
+                span.rows = len(self.unsaved_transactions)
+            elif self.out_of_core:
+                cube = SummaryCube.from_chunks(self.store.iter_chunks(self.chunk_rows), FinanceTracker.INCOME_CATEGORIES)
+                cube.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
+                span.rows = cube.income[1] + cube.expenses[1]
             else:
-                print(f"\nNo pie chart to display, no expenses have been recorded yet")
-            
-            plt.tight_layout()
-            plt.show()
+                self.flush_pending_transactions() # The cube has to cover staged transactions too
+                cube = SummaryCube.from_dataframe(self.df, FinanceTracker.INCOME_CATEGORIES)
+                span.rows = len(self.df)
 
-    def view_by_category(self):
-        """
-        Displays a financial summary for a given category.
+            cube.version = self.data_version
+        return cube
 
-        Prompts the user to enter a category. Calculates the sum for each month in the year.
-        Additionally, it calculates the number of transactions for each month for that category and also 
-        calculates the average spent per transaction for each month. 
+    def get_daily_series(self):
+        """
+        Returns the (day, category) series for the current data.
 
-        Optionally displays:
-            - Bar chart of category by month
-            - Line chart of average per transaction by month
-            - Bar chart of total number of transactions by month
+        The series is built with one pass over the data the first time it is
+        needed, and from then on is updated in place by stage_transaction.
 
         Parameters
         ----------
         None
 
-        Raises
-        ------
-        ValueError
-            If the category is not a valid category.
-
         Returns
         -------
-        None
+        DailySeries
+            The series for the current data version.
         """
 
-        if self.check_empty_df():
-            return
+        if self.daily_series is not None and self.daily_series.version == self.data_version:
+            return self.daily_series
 
-        while True:
-            try:
-                print("\nCategories:\n")
-                print("\n".join(FinanceTracker.VALID_CATEGORIES))
-                category = input(f"\nEnter a valid category from the above: ").strip().capitalize()
-                if category not in FinanceTracker.VALID_CATEGORIES:
-                    raise ValueError("Not a valid category")
-            except ValueError as e:
-                print(e)
+        with self.store_lock, self.state_lock, tracer.span("build daily series") as span:
+            if self.out_of_core:
+                # The store only keeps monthly totals, so stream the transactions one chunk at a time
+                series = DailySeries.from_chunks(self.store.iter_chunks(self.chunk_rows), FinanceTracker.VALID_CATEGORIES)
+                series.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
             else:
-                break
-
-        print(f"\n----------------------------")
-
-        print(f"\nSummary for {category} category:\n")
-
-        # Filter rows for the given category, then group by month and sum the amounts 
-        summary = self.df[self.df["Category"] == category].groupby(self.df["Date"].dt.month)["Amount"].sum()
-        
-        # Count the number of transactions per month for the given category
-        number_of_transactions = self.df[self.df["Category"] == category].groupby(self.df["Date"].dt.month)["Amount"].count()
-        amount_of_transactions_per_month = []
-
-        for month, amount in summary.items():
-            count = number_of_transactions.get(month)
-            amount_of_transactions_per_month.append(count)
-            print(f"{FinanceTracker.MONTHS_ABBR[month]}: £{amount:.2f} ({count} transaction(s), avg per transaction: £{amount/count:.2f})")
+                self.flush_pending_transactions()
+                series = DailySeries.from_dataframe(self.df, FinanceTracker.VALID_CATEGORIES)
+                span.rows = len(self.df)
 
-        print(f"\n----------------------------")
+            series.version = self.data_version
+            self.daily_series = series
 
-        if self.get_visualisation_choice() == "Yes":
-            month_names = [FinanceTracker.MONTHS_ABBR[m] for m in summary.index]
-
-            if category == "Income":
-                chart1_title = "Monthly Total Income"
-                chart2_title = "Average Income per Transaction"
-                chart3_title = "Number of Income Transactions"
-            elif category == "Refund":
-                chart1_title = "Monthly Total Refund"
-                chart2_title = "Average Refund per Transaction"
-                chart3_title = "Number of Refund Transactions"
-            elif category in FinanceTracker.EXPENSE_CATEGORIES:
-                chart1_title = "Monthly Total Spend"
-                chart2_title = "Average Spend per Transaction"
-                chart3_title = "Number of Transactions"
-
-            fig = plt.figure(figsize = (8, 5))
-            fig.canvas.manager.set_window_title(f"Category: {category}")
-
-            ''' Chart 1'''
-            x1 = np.array(month_names)
-            y1 = np.array(summary.values.__abs__()) # Convert the values to absolute values so bars display as positive amounts
-
-            plt.subplot(3, 1, 1)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.bar(x1, y1)
-
-            plt.title(chart1_title)
-            plt.xlabel("Months")
-            plt.ylabel("Amount (£)")
-
-            ''' Chart 2 '''  
-            x2 = np.array(month_names)
-            y2 = np.array(summary.values.__abs__() / amount_of_transactions_per_month)
-
-            plt.subplot(3, 1, 2)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.plot(x2, y2, marker = "o", mfc = "#2ca02c", c = "#2ca02c", linestyle = "--", linewidth =  1, markersize = 4)
-
-            plt.title(chart2_title)
-            plt.xlabel("Months")
-            plt.ylabel("Amount (£)")
-
-            ''' Chart 3 '''
-            x3 = np.array(month_names)
-            y3 = np.array(amount_of_transactions_per_month)
-
-            plt.subplot(3, 1, 3)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.bar(x3, y3, color = "#ff7f0e")
-
-            plt.title(chart3_title)
-            plt.xlabel("Months")
-            plt.ylabel("Frequency")
-
-            plt.tight_layout()
-            plt.show()
+        return series
 
-    def view_cumulative_net_balance(self):
+    def get_description_index(self):
         """
-        Displays the cumulative net balance for the year.
-
-        Calculates the net balance (total income - total expense) for each month
-        and then works out the cumulative net balance.
+        Returns the inverted index of the current data's descriptions.
 
-        Optionally displays:
-            - Bar chart of net balance by month 
-            - Line chart of cumulative net balance by month
+        The index saved next to the ledger is used if the ledger hasn't changed
+        since it was saved, and otherwise it is rebuilt with one pass over the
+        data. From then on it is updated in place by stage_transaction.
 
         Parameters
         ----------
@@ -501,176 +590,276 @@ class FinanceTracker:
 
         Returns
         -------
-        None
+        DescriptionIndex
+            The index for the current data version.
         """
 
-        if self.check_empty_df():
-            return
-
-        print(f"\n----------------------------")
-
-        print(f"\nCumulative Net Balance:\n")
+        if self.description_index is not None and self.description_index.version == self.data_version:
+            return self.description_index
 
-        # Filter rows for categories in INCOME_CATEGORIES, then group by month and sum the amounts
-        total_income_per_month = self.df[self.df["Category"].isin(FinanceTracker.INCOME_CATEGORIES)].groupby(self.df["Date"].dt.month)["Amount"].sum()
+        with self.store_lock, self.state_lock:
+            path = self.store.aux_path("description_index.json")
+            store_version = self.store_version
+            index = DescriptionIndex.load(path, store_version)
 
-        # Filter rows for categories in EXPENSE_CATEGORIES, then group by month and sum the amounts 
-        total_expenses_per_month = self.df[self.df["Category"].isin(FinanceTracker.EXPENSE_CATEGORIES)].groupby(self.df["Date"].dt.month)["Amount"].sum()
+            if index is not None:
+                index.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
+            else:
+                with tracer.span("build description index") as span:
+                    if self.out_of_core:
+                        # Read one batch at a time so building the index doesn't need the whole ledger in memory
+                        index = DescriptionIndex.from_batches(self.store.iter_batches(), path)
+                        index.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
+                    else:
+                        self.flush_pending_transactions()
+                        index = DescriptionIndex.from_batches([self.df], path)
+                    span.rows = sum(count for count, total in index.descriptions.values())
 
-        # Add income and expenses per month, treating missing months as 0 instead of NaN (avoids gaps when one side is empty)
-        net = total_income_per_month.add(total_expenses_per_month, fill_value = 0)  
+                if not self.unsaved_transactions:
+                    index.save(store_version)
 
-        cumulative_net_balance = net.cumsum() # Work out the cumulative net balance over time
+            index.version = self.data_version
+            self.description_index = index
 
-        for month, amount in cumulative_net_balance.items():
-            print(f"{FinanceTracker.MONTHS_ABBR[month]}: £{amount:.2f}")
+        return index
 
-        print(f"\n----------------------------")
+    def get_category_stats(self):
+        """
+        Returns the running statistics of every category's transaction sizes for the current data.
 
-        if self.get_visualisation_choice() == "Yes":
-            month_names = [FinanceTracker.MONTHS_ABBR[m] for m in net.index]
+        Like the description index, the statistics saved next to the ledger
+        are used if the ledger hasn't changed since they were saved, and
+        otherwise they are rebuilt with one pass over the data. From then on
+        they are updated in place by stage_transaction.
 
-            fig = plt.figure(figsize = (8, 5))
-            fig.canvas.manager.set_window_title("Cumulative Net Balance")
+        Parameters
+        ----------
+        None
 
-            ''' Chart 1 '''
-            x1 = np.array(month_names)
-            y1 = np.array(net.values)
+        Returns
+        -------
+        CategoryStats
+            The statistics for the current data version.
+        """
 
-            plt.subplot(2, 1, 1)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.axhline(0, color = "black", linewidth = 1)
-            colours =  ["#2ECC71" if v >= 0 else "#E74C3C" for v in y1]
-            plt.bar(x1, y1, color = colours)
+        if self.category_stats is not None and self.category_stats.version == self.data_version:
+            return self.category_stats
 
-            plt.title("Monthly Net Balance (Income - Expenses)")
-            plt.xlabel("Months")
-            plt.ylabel("Net (£)")
+        with self.store_lock, self.state_lock:
+            path = self.store.aux_path("category_stats.npz")
+            stats = CategoryStats.load(path, FinanceTracker.VALID_CATEGORIES, self.store_version)
 
-            ''' Chart 2 '''
-            x2 = np.array(month_names)
-            y2 = np.array(cumulative_net_balance.values)
+            if stats is not None:
+                stats.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
+            else:
+                with tracer.span("build category stats") as span:
+                    if self.out_of_core:
+                        stats = CategoryStats.from_batches(self.store.iter_chunks(self.chunk_rows), FinanceTracker.VALID_CATEGORIES, path)
+                        stats.add_dataframe(self.records_to_dataframe(self.unsaved_transactions))
+                    else:
+                        self.flush_pending_transactions()
+                        stats = CategoryStats.from_batches([self.df], FinanceTracker.VALID_CATEGORIES, path)
+                    span.rows = int(stats.count.sum())
 
-            plt.subplot(2, 1, 2)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.plot(x2, y2, marker = "o", mfc = "#00BFFF", c = "#00BFFF", linestyle = "--", linewidth =  1, markersize = 4)
+                if not self.unsaved_transactions:
+                    stats.save(self.store_version)
 
-            plt.title("Cumulative Net Balance Over Time")
-            plt.xlabel("Months")
-            plt.ylabel("Cumulative (£)")
+            stats.version = self.data_version
+            self.category_stats = stats
 
-            plt.tight_layout()
-            plt.show()
+        return stats
 
-    def view_all_time_overview(self):
+    def detect_anomalies(self, z_threshold = None, spike_threshold = None):
         """
-        Displays an all-time overview of the balance from start to end of the year.
+        Scans every transaction for unusual amounts, and every month of every expense category for spending spikes.
 
-        Calcualtes the sum for each category and calculates the total income/expenses.
-
-        Optionally displays:
-            - Bar chart of expenses by category
-            - Horizontal bar chart of income vs expenses
+        Transactions are scored against their category's running statistics
+        with array operations over the whole Amount and Category columns (in
+        out-of-core mode, one batch of the store at a time), and spikes are
+        found from the summary cube's cells (see anomalies.py).
 
         Parameters
         ----------
-        None
+        z_threshold : float, optional
+            Standard deviations above a category's mean before an amount is unusual.
+        spike_threshold : float, optional
+            Standard deviations above the previous months' mean before a month's spend is a spike.
 
         Returns
         -------
-        None
+        tuple of DataFrame
+            The unusual transactions (see CategoryStats.unusual_amounts) and the spikes (see anomalies.monthly_spikes).
         """
 
-        if self.check_empty_df():
-            return
+        stats = self.get_category_stats()
+        cube = self.get_summary_cube()
 
-        print(f"\n----------------------------")
+        with tracer.span("detect anomalies") as span:
+            if self.out_of_core:
+                with self.store_lock, self.state_lock:
+                    batches = [stats.unusual_amounts(batch, z_threshold) for batch in self.store.iter_batches()]
+                    batches.append(stats.unusual_amounts(self.records_to_dataframe(self.unsaved_transactions), z_threshold))
+                unusual = pd.concat([batch for batch in batches if not batch.empty] or batches[-1:], ignore_index = True).sort_values("Score", ascending = False, ignore_index = True)
+            else:
+                with self.state_lock:
+                    self.flush_pending_transactions()
+                    df = self.df
+                unusual = stats.unusual_amounts(df, z_threshold)
+            span.rows = int(stats.count.sum())
 
-        print(f"\nAll-time Overview by Category:\n")
+            spikes = monthly_spikes(cube.cells, FinanceTracker.EXPENSE_CATEGORIES, spike_threshold)
 
-        # Groups by category and sums the amounts
-        summary = self.df.groupby("Category")["Amount"].sum()
+        return unusual, spikes
 
-        # Filters rows for categories in INCOME_CATEGORIES, then sums the amounts 
-        total_income = self.df[self.df["Category"].isin(FinanceTracker.INCOME_CATEGORIES)]["Amount"].sum()
+    def restore_checkpoint(self):
+        """
+        Restores the DataFrame and its derived structures from the checkpoint, then replays what was stored after it.
 
-        # Filters rows for categories in EXPENSE_CATEGORIES, then sums the amounts 
-        total_expenses = self.df[self.df["Category"].isin(FinanceTracker.EXPENSE_CATEGORIES)]["Amount"].sum()
+        The replayed transactions are staged rather than merged, so the
+        snapshot's memory-mapped columns are only copied once something needs
+        the whole DataFrame.
 
-        for category, amount in summary.items():
-            print(f"{category}: £{amount:.2f}")
+        Parameters
+        ----------
+        None
 
-        print(f"\nTotal income: £{total_income:.2f} \nTotal expenses: £{total_expenses:.2f}")
+        Returns
+        -------
+        bool
+            True if the checkpoint was restored, False if there is none or it can't be used.
+        """
 
-        print(f"\n----------------------------")
+        with tracer.span("restore checkpoint") as span:
+            try:
+                restored = self.checkpoint.load()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Ignoring damaged checkpoint, rebuilding from the ledger: {e}", file = sys.stderr)
+                return False
+
+            with self.store_lock, self.store.locked(exclusive = False):
+                tail = None if restored is None else self.store.read_since(restored["position"])
+                if tail is None:
+                    return False
+                self.record_store_state()
+
+            self.df = restored["df"]
+            self.summary_cube = SummaryCube(FinanceTracker.INCOME_CATEGORIES, restored["cells"])
+            self.summary_cube.add_dataframe(tail)
+            self.description_index = DescriptionIndex.from_state(restored["description_index"])
+            self.description_index.path = self.store.aux_path("description_index.json")
+            self.description_index.add_dataframe(tail)
+
+            # The replayed transactions are already stored, so they are staged without being marked unsaved
+            self.pending_transactions = tail.to_dict("records")
+            self.summary_cube.version = self.description_index.version = self.data_version
+            self.checkpoint_rows = len(tail)
+            span.rows = len(self.df) + len(tail)
+
+        return True
+
+    def write_checkpoint(self):
+        """
+        Writes a checkpoint of the DataFrame, summary cube and description index at the store's current position.
 
-        if self.get_visualisation_choice() == "Yes":
-            # Drops any categories listed in INCOME_CATEGORIES if they exist, if they don't, no error is raised
-            summary_without_income = summary.drop(FinanceTracker.INCOME_CATEGORIES, errors = "ignore")
-            
-            fig = plt.figure(figsize = (8, 5))
-            fig.canvas.manager.set_window_title("All-time Overview")
+        Only saved transactions can be checkpointed, so nothing is written while
+        some are unsaved, or in out-of-core mode where there is no DataFrame.
+        The DataFrame is only ever replaced, never changed in place, so once
+        it and copies of the derived structures have been taken under the
+        locks, the snapshot is written without holding up new transactions.
 
-            ''' Chart 1 '''
-            x1 = np.array(summary_without_income.index)
-            y1 = np.array(summary_without_income.values.__abs__()) # Convert expenses to absolute values so bars display as positive amounts
+        Parameters
+        ----------
+        None
 
-            plt.subplot(2, 1, 1)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.bar(x1, y1, width = 0.6)
-            
-            plt.title("Expenses per Category")
-            plt.xlabel("Categories")
-            plt.ylabel("Amount (£)")
+        Returns
+        -------
+        None
+        """
 
-            ''' Chart 2 '''
-            x2 = np.array(["Total Income", "Total Expenses"])
-            y2 = np.array([total_income, total_expenses * -1])
-            colours = ["#2ECC71", "#E74C3C"]
+        with self.store_lock, self.state_lock:
+            if self.out_of_core or self.unsaved_transactions:
+                return
 
-            plt.subplot(2, 1, 2)
-            plt.grid(alpha = 0.3, linestyle = '--')
-            plt.barh(x2, y2, color = colours, height = 0.6)
+            self.flush_pending_transactions()
+            df = self.df
+            cells = {key: list(cell) for key, cell in self.get_summary_cube().cells.items()}
+            description_index = self.get_description_index().state()
+            position = self.store_position # Not the store's current position, as other processes may have added transactions the DataFrame doesn't have yet
+            self.checkpoint_rows = 0
+            self.checkpoint_stale = False
 
-            plt.title("Total Income VS Total Expenses")
-            plt.xlabel("Amount (£)")
+        with tracer.span("write checkpoint", len(df)):
+            try:
+                self.checkpoint.save(df, position, cells, description_index)
+            except OSError as e:
+                # The transactions themselves are stored, so the next session would only start slower; try again with the next save
+                print(f"Could not write a checkpoint: {e}", file = sys.stderr)
+                self.checkpoint_stale = True
 
-            plt.tight_layout()
-            plt.show()
+    def record_store_state(self):
+        """
+        Records the store's change-sequence number, position and version as what this process has read.
 
-    @staticmethod
-    def get_visualisation_choice():
+        Only called with the store locked, once the DataFrame (with the staged
+        transactions) holds exactly what is stored.
         """
-        Helper method to ask the user whether they want a visual representation of the data.
+
+        self.store_sequence = self.store.sequence()
+        self.store_position = self.store.position()
+        self.store_version = self.store.version()
+
+    def merge_external_changes(self):
+        """
+        Picks up transactions other processes have stored since this one last read or wrote the store.
+
+        Only the store's change-sequence number is read if nothing has changed,
+        so this is cheap enough to call before every view. Otherwise only the
+        transactions stored after this process's position are read, and staged
+        like a checkpoint's tail so the derived structures are updated in
+        place. The whole store is only reloaded if they can't be told apart
+        from the rest, e.g. after another process's bulk import. In
+        out-of-core mode the summaries are rebuilt from the store instead.
 
         Parameters
         ----------
         None
 
-        Raises
-        ------
-        ValueError
-            If choice is not strictly "Yes" or "No".
-
         Returns
         -------
-        str
-            The user's choice ("Yes" or "No").
+        bool
+            True if another process had changed the store, False otherwise.
         """
 
-        while True:
-            try:
-                choice = input(f"\nWould you like a visual representation of this data (Yes/No)? ").strip().capitalize()
-                if choice != "Yes" and choice != "No":
-                    raise ValueError("Incorrect value entered")
-            except ValueError as e:
-                print(e)
+        with self.store_lock, self.store.locked(exclusive = False):
+            if self.store.sequence() == self.store_sequence:
+                return False
+
+            if self.out_of_core:
+                with self.state_lock:
+                    self.data_version += 1 # Everything is read from the store, so rebuilding the summaries picks the changes up
             else:
-                return choice
-            
-    def save_to_csv(self):
+                tail = self.store.read_since(self.store_position)
+                if tail is None:
+                    with tracer.span("reload") as span:
+                        df = sort_by_date(self.store.load())
+                        span.rows = len(df)
+                    with self.state_lock:
+                        self.df = df
+                        self.pending_transactions = list(self.unsaved_transactions) # These aren't in the store yet
+                        self.data_version += 1
+                        self.checkpoint_stale = True
+                elif not tail.empty:
+                    with tracer.span("merge external changes", len(tail)):
+                        self.stage_transactions(tail, saved = True)
+                    self.checkpoint_rows += len(tail)
+
+            self.record_store_state()
+
+        return True
+
+    def verify_summary_cube(self):
         """
-        Saves the DataFrame to the CSV.
+        Compares the incrementally maintained cube against a full recompute.
 
         Parameters
         ----------
@@ -678,32 +867,1373 @@ class FinanceTracker:
 
         Returns
         -------
-        None
+        list of str
+            A description of every mismatch; empty if the cube is consistent.
         """
 
-        # Save the whole DataFrame to CSV in one go
-        df_to_save = self.df.copy()
-        df_to_save["Date"] = df_to_save["Date"].dt.strftime("%d-%m-%Y") # Format the Date column as DD-MM-YYYY strings
-        df_to_save.to_csv("transactions.csv", index = False) 
+        return self.get_summary_cube().differences(self.build_summary_cube(from_manifest = False))
 
-    def check_empty_df(self):
+    def sub_menu(self):
         """
-        Check if the DataFrame has no transactions yet.
+        Displays the sub-menu to the user.
 
         Parameters
         ----------
         None
 
+        Raises
+        ------
+        ValueError 
+            If they enter an invalid option or select an option that is not
+            within the range of accepted values.
+
         Returns
         -------
-        bool
-            True if the DataFrame is empty, False otherwise.
+        None
         """
 
-        if self.df.empty:
-            print(f"\nNo transactions available, please add some first")
-            return True
+        while True:
+            while True:
+                try:
+                    option = int(input(f"\n1) View by month \n2) View by category \n3) View cumulative net balance \n4) View all-time overview \n5) View daily balance and rolling totals \n6) Go back \n\nSelect an option: "))
+                    if option < 1 or option > 6:
+                        raise ValueError("Input must be between 1 and 6")
+                except ValueError as e:
+                    print(e)
+                else:
+                    break 
+
+            if option != 6:
+                self.merge_external_changes() # So the view includes what other sessions have saved meanwhile
+
+            if option == 1:
+                tracer.command("view by month", self.view_by_month)
+
+            elif option == 2:
+                tracer.command("view by category", self.view_by_category)
+
+            elif option == 3:
+                tracer.command("view cumulative net balance", self.view_cumulative_net_balance)
+
+            elif option == 4:
+                tracer.command("view all-time overview", self.view_all_time_overview)
+
+            elif option == 5:
+                tracer.command("view daily balance", self.view_daily_balance)
+
+            elif option == 6:
+                break
+    
+    def exit_program(self):
+        """
+        Helper method to terminate the program safely. 
+
+        Waits for the autosave thread to write every transaction. If that
+        fails, the user can retry; transactions are only left unsaved if they
+        choose not to.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.autosaver is not None:
+            errors = self.autosaver.close()
+            self.autosaver = None
+
+            while self.unsaved_transactions:
+                if errors:
+                    print(f"\n{len(self.unsaved_transactions)} transaction(s) could not be saved: {errors[-1]}")
+                    while True:
+                        try:
+                            retry = input("Would you like to try saving again (Yes/No)? ").strip().capitalize()
+                            if retry != "Yes" and retry != "No":
+                                raise ValueError("Incorrect value entered")
+                        except ValueError as e:
+                            print(e)
+                        else:
+                            break
+
+                    if retry == "No":
+                        print(f"{len(self.unsaved_transactions)} transaction(s) were not saved")
+                        break
+
+                try:
+                    self.write_unsaved()
+                    errors = []
+                except Exception as e:
+                    errors = [e]
+
+        print("Closing program...")
+        sys.exit(0)
+
+    def report_save_errors(self):
+        """
+        Tells the user about background saves that failed since the last check, and asks for another try.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.autosaver is None:
+            return
+
+        errors = self.autosaver.take_errors()
+        if errors:
+            print(f"\nCould not save {len(self.unsaved_transactions)} transaction(s): {errors[-1]}")
+            print("They are kept, and saving them will be tried again now and when you exit")
+            self.autosaver.request()
+
+    def view_by_month(self):
+        """
+        Displays a financial summary for a given month.
+
+        Prompts the user to enter a month and a year. Calculates the sum for each
+        category and calculates total income/expense. 
+        
+        Optionally displays:
+            - Bar chart of expenses by category
+            - Horizontal bar chart of income vs expenses
+            - Pie chart of expense breakdown
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the month is not a valid month name.
+
+            If the year is not a number or has no transactions recorded.
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush_pending_transactions()
+
+        if self.check_empty_df():
+            return 
+
+        while True:
+            try: 
+                month = input(f"\nEnter the full month name: ").strip().capitalize()
+                if month not in FinanceTracker.MONTHS_FULL:
+                    raise ValueError("Incorrect month name")
+            except ValueError as e:
+                print(e)
+            else:
+                break
+
+        cube = self.get_summary_cube()
+        years = cube.years()
+
+        while True:
+            try:
+                print(f"\nYears with transactions: {', '.join(str(y) for y in years)}")
+                year = int(input(f"\nEnter the year: "))
+                if year not in years:
+                    raise ValueError("No transactions recorded in that year")
+            except ValueError as e:
+                print(e)
+            else:
+                break
+
+        print(f"\n----------------------------")
+
+        print(f"\nSummary for {month} {year}:\n")
+
+        summary, total_income, total_expenses = self.month_summary(FinanceTracker.MONTHS_FULL.index(month) + 1, year)
+
+        for category, amount in summary.items(): 
+            print(f"{category}: £{amount:.2f}")
+
+        print(f"\nTotal income: £{total_income:.2f} \nTotal expenses: £{total_expenses:.2f}")
+
+        print(f"\n----------------------------")
+
+        if self.get_visualisation_choice() == "Yes":
+            with tracer.span("view by month: chart"):
+                plt = self.load_pyplot()
+
+                # Drops any categories listed in INCOME_CATEGORIES if they exist, if they don't, no error is raised
+                summary_without_income = summary.drop(FinanceTracker.INCOME_CATEGORIES, errors = "ignore") 
+
+                has_expenses = cube.count(FinanceTracker.EXPENSE_CATEGORIES) > 0
+                draw_month_chart(plt, month, year, summary_without_income, total_income, total_expenses, pie = has_expenses)
+                if not has_expenses:
+                    print(f"\nNo pie chart to display, no expenses have been recorded yet")
+
+            plt.show()
+
+    def view_by_category(self):
+        """
+        Displays a financial summary for a given category.
+
+        Prompts the user to enter a category. Calculates the sum for each month in the year.
+        Additionally, it calculates the number of transactions for each month for that category and also 
+        calculates the average spent per transaction for each month. 
+
+        Optionally displays:
+            - Bar chart of category by month
+            - Line chart of average per transaction by month
+            - Bar chart of total number of transactions by month
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the category is not a valid category.
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush_pending_transactions()
+
+        if self.check_empty_df():
+            return
+
+        while True:
+            try:
+                print("\nCategories:\n")
+                print("\n".join(FinanceTracker.VALID_CATEGORIES))
+                category = input(f"\nEnter a valid category from the above: ").strip().capitalize()
+                if category not in FinanceTracker.VALID_CATEGORIES:
+                    raise ValueError("Not a valid category")
+            except ValueError as e:
+                print(e)
+            else:
+                break
+
+        print(f"\n----------------------------")
+
+        print(f"\nSummary for {category} category:\n")
+
+        summary, number_of_transactions = self.category_summary(category)
+
+        for month, amount in summary.items():
+            count = number_of_transactions.get(month)
+            print(f"{FinanceTracker.MONTHS_ABBR[month]}: £{amount:.2f} ({count} transaction(s), avg per transaction: £{amount/count:.2f})")
+
+        print(f"\n----------------------------")
+
+        if self.get_visualisation_choice() == "Yes":
+            with tracer.span("view by category: chart"):
+                plt = self.load_pyplot()
+                draw_category_chart(plt, category, summary, number_of_transactions)
+
+            plt.show()
+
+    def view_cumulative_net_balance(self):
+        """
+        Displays the cumulative net balance over every month with transactions.
+
+        Calculates the net balance (total income - total expense) for each month
+        of each year and then works out the cumulative net balance.
+
+        Optionally displays:
+            - Bar chart of net balance by month 
+            - Line chart of cumulative net balance by month
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush_pending_transactions()
+
+        if self.check_empty_df():
+            return
+
+        print(f"\n----------------------------")
+
+        print(f"\nCumulative Net Balance:\n")
+
+        net, cumulative_net_balance = self.cumulative_net_balance_summary()
+
+        for (year, month), amount in cumulative_net_balance.items():
+            print(f"{FinanceTracker.MONTHS_ABBR[month]} {year}: £{amount:.2f}")
+
+        print(f"\n----------------------------")
+
+        if self.get_visualisation_choice() == "Yes":
+            with tracer.span("view cumulative net balance: chart"):
+                plt = self.load_pyplot()
+                draw_cumulative_chart(plt, net, cumulative_net_balance)
+
+            plt.show()
+
+    def view_all_time_overview(self):
+        """
+        Displays an all-time overview of the balance from start to end of the year.
+
+        Calcualtes the sum for each category and calculates the total income/expenses.
+
+        Optionally displays:
+            - Bar chart of expenses by category
+            - Horizontal bar chart of income vs expenses
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush_pending_transactions()
+
+        if self.check_empty_df():
+            return
+
+        print(f"\n----------------------------")
+
+        print(f"\nAll-time Overview by Category:\n")
+
+        summary, total_income, total_expenses = self.all_time_summary()
+
+        for category, amount in summary.items():
+            print(f"{category}: £{amount:.2f}")
+
+        print(f"\nTotal income: £{total_income:.2f} \nTotal expenses: £{total_expenses:.2f}")
+
+        print(f"\n----------------------------")
+
+        if self.get_visualisation_choice() == "Yes":
+            with tracer.span("view all-time overview: chart"):
+                plt = self.load_pyplot()
+
+                # Drops any categories listed in INCOME_CATEGORIES if they exist, if they don't, no error is raised
+                summary_without_income = summary.drop(FinanceTracker.INCOME_CATEGORIES, errors = "ignore")
+                draw_overview_chart(plt, summary_without_income, total_income, total_expenses)
+
+            plt.show()
+
+    def view_daily_balance(self):
+        """
+        Displays the running net balance and each expense category's rolling totals, as of the last transaction.
+
+        Shows the balance at the end of the last day with transactions, the
+        lowest and highest balance reached, and each expense category's total
+        over the ROLLING_WINDOWS days up to that day.
+
+        Optionally displays:
+            - Line chart of the running net balance by day
+            - Bar chart of net balance by day
+            - Line chart of each expense category's total over the last 30 days, by day
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush_pending_transactions()
+
+        if self.check_empty_df():
+            return
+
+        net, balance = self.daily_balance_summary()
+        last_day = balance.index[-1]
+        windows = {window: self.rolling_spend_summary(window, start = last_day) for window in FinanceTracker.ROLLING_WINDOWS}
+
+        print(f"\n----------------------------")
+
+        print(f"\nDaily Net Balance:\n")
+
+        print(f"Balance on {last_day.strftime(DATE_FORMAT)}: £{balance.iloc[-1]:.2f}")
+        print(f"Lowest balance: £{balance.min():.2f} on {balance.idxmin().strftime(DATE_FORMAT)}")
+        print(f"Highest balance: £{balance.max():.2f} on {balance.idxmax().strftime(DATE_FORMAT)}")
+
+        print(f"\nTotals up to {last_day.strftime(DATE_FORMAT)}:\n")
+
+        for category in FinanceTracker.EXPENSE_CATEGORIES:
+            print(f"{category}: " + ", ".join(f"£{totals[category].iloc[-1]:.2f} ({window} days)" for window, totals in windows.items()))
+
+        print(f"\n----------------------------")
+
+        if self.get_visualisation_choice() == "Yes":
+            with tracer.span("view daily balance: chart"):
+                plt = self.load_pyplot()
+                draw_daily_chart(plt, net, balance)
+                draw_rolling_chart(plt, 30, self.rolling_spend_summary(30))
+
+            plt.show()
+
+    def month_summary(self, month, year):
+        """
+        Works out the figures shown by view_by_month.
+
+        Parameters
+        ----------
+        month : int
+            The month number (1-12).
+        year : int
+            The year.
+
+        Returns
+        -------
+        tuple
+            The total of each category in pounds (a Series sorted by category),
+            the total income and the total expenses.
+        """
+
+        cube = self.get_summary_cube()
+
+        with tracer.span("view by month: summary", len(cube.cells)):
+            # Read the sum of each category for the given month from the cube, converting pence back to pounds
+            summary = pd.Series(cube.category_totals(month = month, year = year), dtype = "int64").sort_index() / 100
+
+            # Sum the given month's cells for categories in INCOME_CATEGORIES and EXPENSE_CATEGORIES
+            total_income = cube.total(FinanceTracker.INCOME_CATEGORIES, month = month, year = year) / 100
+            total_expenses = cube.total(FinanceTracker.EXPENSE_CATEGORIES, month = month, year = year) / 100
+
+        return summary, total_income, total_expenses
+
+    def category_summary(self, category):
+        """
+        Works out the figures shown by view_by_category.
+
+        Parameters
+        ----------
+        category : str
+            One of VALID_CATEGORIES.
+
+        Returns
+        -------
+        tuple
+            The category's total in pounds and its number of transactions for
+            each month (two Series indexed by month number).
+        """
+
+        cube = self.get_summary_cube()
+
+        with tracer.span("view by category: summary", len(cube.cells)):
+            # Read the sum and number of transactions per month for the given category from the cube
+            totals_per_month = cube.month_totals([category])
+            months = sorted(totals_per_month)
+
+            summary = pd.Series([totals_per_month[m][0] for m in months], index = months, dtype = "int64") / 100
+            number_of_transactions = pd.Series([totals_per_month[m][1] for m in months], index = months, dtype = "int64")
+
+        return summary, number_of_transactions
+
+    def cumulative_net_balance_summary(self):
+        """
+        Works out the figures shown by view_cumulative_net_balance.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple
+            The net balance and the cumulative net balance in pounds for each
+            month (two Series indexed by (year, month)).
+        """
+
+        cube = self.get_summary_cube()
+
+        with tracer.span("view cumulative net balance: summary", len(cube.cells)):
+            # Read the net amount (income + expenses) and running balance per (year, month) from the cube, in pence so they are exact
+            balance = cube.cumulative_balance()
+            index = pd.MultiIndex.from_tuples(list(balance), names = ["year", "month"])
+            net_pence = pd.Series([cube.months[key][0] for key in balance], index = index, dtype = "int64")
+            balance_pence = pd.Series(list(balance.values()), index = index, dtype = "int64")
+
+        return net_pence / 100, balance_pence / 100
+
+    def daily_balance_summary(self, start = None, end = None):
+        """
+        Works out the net amount and running net balance for every day, as shown by view_daily_balance.
+
+        Parameters
+        ----------
+        start : datetime, optional
+            The first day to include; the balance still counts every earlier transaction.
+        end : datetime, optional
+            The last day to include.
+
+        Returns
+        -------
+        tuple
+            The net amount and the running net balance in pounds at the end of
+            each day (two Series indexed by date, including days without transactions).
+        """
+
+        series = self.get_daily_series()
+
+        with tracer.span("daily balance: summary", series.days):
+            days, net_pence, balance_pence = series.running_balance(start, end)
+            index = pd.DatetimeIndex(days, name = "date")
+
+        return pd.Series(net_pence, index = index) / 100, pd.Series(balance_pence, index = index) / 100
+
+    def rolling_spend_summary(self, window, categories = None, start = None, end = None):
+        """
+        Works out each category's total over the window days up to every day.
+
+        Parameters
+        ----------
+        window : int
+            The number of days in each window, e.g. 7, 30 or 90.
+        categories : list of str, optional
+            The categories to include; defaults to EXPENSE_CATEGORIES.
+        start : datetime, optional
+            The first day to include; its window still reaches back before it.
+        end : datetime, optional
+            The last day to include.
+
+        Returns
+        -------
+        DataFrame
+            The totals in pounds, indexed by date with a column per category.
+        """
+
+        series = self.get_daily_series()
+        categories = categories or FinanceTracker.EXPENSE_CATEGORIES
+
+        with tracer.span("rolling spend: summary", series.days):
+            days, totals = series.rolling(window, categories, start, end)
+
+        return pd.DataFrame(totals / 100, index = pd.DatetimeIndex(days, name = "date"), columns = categories)
+
+    def all_time_summary(self):
+        """
+        Works out the figures shown by view_all_time_overview.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple
+            The total of each category in pounds (a Series sorted by category),
+            the total income and the total expenses.
+        """
+
+        cube = self.get_summary_cube()
+
+        with tracer.span("view all-time overview: summary", len(cube.cells)):
+            # Reads the sum of each category across all months from the cube, converting pence back to pounds
+            summary = pd.Series(cube.category_totals(), dtype = "int64").sort_index() / 100
+
+        # Reads the running totals for categories in INCOME_CATEGORIES and EXPENSE_CATEGORIES
+        total_income = cube.income[0] / 100
+        total_expenses = cube.expenses[0] / 100
+
+        return summary, total_income, total_expenses
+
+    @staticmethod
+    def load_pyplot():
+        """
+        Helper method to import matplotlib's pyplot the first time a chart is drawn.
+
+        Importing matplotlib takes longer than everything else the program does
+        at start-up, so it is only imported once the user asks for a chart.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        module
+            matplotlib.pyplot
+        """
+
+        import matplotlib.pyplot as plt
+        return plt
+
+    @staticmethod
+    def get_visualisation_choice():
+        """
+        Helper method to ask the user whether they want a visual representation of the data.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        ValueError
+            If choice is not strictly "Yes" or "No".
+
+        Returns
+        -------
+        str
+            The user's choice ("Yes" or "No").
+        """
+
+        while True:
+            try:
+                choice = input(f"\nWould you like a visual representation of this data (Yes/No)? ").strip().capitalize()
+                if choice != "Yes" and choice != "No":
+                    raise ValueError("Incorrect value entered")
+            except ValueError as e:
+                print(e)
+            else:
+                return choice
+            
+    def save(self):
+        """
+        Saves any new transactions to the store.
+
+        New transactions are appended to the store in one batch rather than
+        rewriting everything stored. With the ledger backend they go to its
+        journal, which is folded into the month partitions once it has grown
+        past LedgerStore.COMPACT_EVERY rows. A new checkpoint is written after
+        a compaction, or once Checkpoint.CHECKPOINT_EVERY transactions have
+        been saved since the last one.
+
+        While the menu is open the write is handed to the autosave thread
+        (see autosave.py) and this returns straight away, leaving the staged
+        transactions to be merged into the DataFrame in one go by whatever
+        reads it next; otherwise they are merged and written before it returns.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.autosaver is not None:
+            self.autosaver.request()
+        else:
+            self.flush_pending_transactions()
+            self.write_unsaved()
+
+    def write_unsaved(self):
+        """
+        Writes the unsaved transactions to the store, then saves the description index and a checkpoint if due.
+
+        This may run on the autosave thread while the menu stages more
+        transactions, so the transactions to write are taken under state_lock
+        and only dropped from unsaved_transactions once they have been
+        written. Transactions staged meanwhile wait for the next save, and if
+        the write fails nothing is lost: they are still unsaved, and the next
+        save retries them.
+
+        Other processes may be appending to the same store, so it is locked
+        exclusively while whatever they added since this process last looked
+        is merged in (see merge_external_changes) and these transactions are
+        appended after it. Nothing can be added in between, so the DataFrame
+        then holds exactly what is stored.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        OSError
+            If the store can't be written, e.g. because the disk is full.
+
+        Returns
+        -------
+        None
+        """
+
+        with self.store_lock:
+            with self.store.locked():
+                self.merge_external_changes()
+
+                with self.state_lock:
+                    records = list(self.unsaved_transactions)
+
+                if records:
+                    with tracer.span("save", len(records)):
+                        self.store.append(self.records_to_dataframe(records))
+                    with self.state_lock:
+                        del self.unsaved_transactions[:len(records)] # Anything staged since stays for the next save
+                        self.checkpoint_rows += len(records)
+
+                compacted = self.store.needs_compaction()
+                if compacted:
+                    with tracer.span("compact"):
+                        self.store.compact()
+                    self.checkpoint_stale = True # The journal the checkpoint would replay from is now in the partitions
+
+                if records or compacted:
+                    self.record_store_state()
+
+            with self.state_lock:
+                # The index can only be saved with the store's version while it covers exactly what is stored
+                index = self.description_index
+                current = not self.unsaved_transactions and index is not None and index.version == self.data_version
+                index_state = index.state() if current and (records or compacted) else None
+                stats = self.category_stats
+                current = not self.unsaved_transactions and stats is not None and stats.version == self.data_version
+                stats_state = stats.state() if current and (records or compacted) else None
+
+            if index_state is not None:
+                # Save the index with the store's new version, so the next session can use it without rebuilding
+                index.save(self.store_version, index_state)
+            if stats_state is not None:
+                stats.save(self.store_version, stats_state)
+
+            if self.checkpoint_stale or self.checkpoint_rows >= Checkpoint.CHECKPOINT_EVERY:
+                self.write_checkpoint()
+
+    def import_csv(self, paths, column_map = None, date_format = DATE_FORMAT, default_category = None, workers = None):
+        """
+        Imports transactions in bulk from one or more CSV statement files.
+
+        Files are parsed in parallel and their columns mapped onto HEADERS.
+        Every row is checked with the same rules as add_transaction, and rows
+        whose (date, amount, description) are already stored, however they
+        were added, are skipped, so importing overlapping statements more
+        than once is harmless.
+
+        The imported rows are also checked for anomalies: each is scored
+        against its category's statistics from before the import, and the
+        months they fall in are checked for spending spikes.
+
+        Parameters
+        ----------
+        paths : list of str
+            The statement files.
+        column_map : dict, optional
+            Extra {statement column: header} mappings for unusual column names.
+        date_format : str
+            The strptime format of the statements' dates.
+        default_category : str, optional
+            Category for every row, for statements without a category column.
+        workers : int, optional
+            Number of parsing processes; defaults to one per CPU.
+
+        Raises
+        ------
+        ValueError
+            If a file is missing a column needed for HEADERS.
+
+        Returns
+        -------
+        dict
+            The number of rows "imported" and "duplicates" skipped, the
+            "rejected" rows as (file, line, reason) tuples, the budget
+            "alerts" the import raised (see Budgets.alerts), and a message
+            for each of the "anomalies" it brought in.
+        """
+
+        with tracer.span("import: parse") as span:
+            df = parse_statements(paths, workers, column_map = column_map, date_format = date_format, default_category = default_category)
+            span.rows = len(df)
+
+        with tracer.span("import: validate", len(df)):
+            errors = transaction_errors(df, FinanceTracker.VALID_CATEGORIES, FinanceTracker.INCOME_CATEGORIES)
+            rejected = df[errors != ""]
+            df = df[errors == ""]
+
+        # Locked from checking for duplicates until the new rows are stored and hashed, so two imports can't both add the same rows
+        with self.store_lock, self.store.locked():
+            self.write_unsaved() # So transactions added this session are checked against too
+            hash_index = self.get_hash_index()
+            with tracer.span("import: de-duplicate", len(df)):
+                hashes = transaction_hashes(df)
+                # Drop rows stored before, and repeats of the same row within this import
+                is_new = ~hash_index.contains(hashes) & ~pd.Series(hashes).duplicated().values
+                df = df[is_new]
+
+            alerts, anomalies = [], []
+            if not df.empty:
+                with tracer.span("import: unusual amounts", len(df)):
+                    unusual = self.get_category_stats().unusual_amounts(df) # Judged against what was there before, so an outlier can't mask itself
+
+                alerts = self.stage_transactions(df)
+                self.save()
+                self.update_hash_index(hash_index)
+
+        if not df.empty:
+            with tracer.span("import: spending spikes", len(df)):
+                periods = pd.DataFrame({"year": df["Date"].dt.year, "month": df["Date"].dt.month, "category": df["Category"].astype(str)}).drop_duplicates()
+                spikes = monthly_spikes(self.get_summary_cube().cells, FinanceTracker.EXPENSE_CATEGORIES).merge(periods.astype({"year": "int64", "month": "int64"}), on = ["year", "month", "category"])
+            anomalies = anomaly_messages(unusual, spikes)
+
+        return {
+            "imported": len(df),
+            "duplicates": int((~is_new).sum()),
+            "rejected": list(zip(rejected["Source"], rejected["Line"], errors[errors != ""])),
+            "alerts": alerts,
+            "anomalies": anomalies
+        }
+
+    def append_transactions(self, df):
+        """
+        Validates transactions with add_transaction's rules, then stages and saves the valid ones.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions, with HEADERS columns (see importer.normalise_transactions).
+
+        Returns
+        -------
+        dict
+            The number of transactions "added", the "rejected" ones as (position, reason) tuples, and the budget "alerts" they raised.
+        """
+
+        errors = transaction_errors(df, FinanceTracker.VALID_CATEGORIES, FinanceTracker.INCOME_CATEGORIES).values
+        valid = df[errors == ""]
+
+        alerts = []
+        if not valid.empty:
+            alerts = self.stage_transactions(valid)
+            self.save()
+
+        return {
+            "added": len(valid),
+            "rejected": [(int(position), reason) for position, reason in enumerate(errors) if reason],
+            "alerts": alerts
+        }
+
+    def get_hash_index(self):
+        """
+        Returns the index of the hashes of every stored transaction, brought up to date with the store.
+
+        However the transactions were stored (added one at a time, appended
+        through the report server or imported), and by whichever process, the
+        index catches up by hashing only those stored since the position it
+        was saved at (see update_hash_index). The store is locked exclusively
+        while the index is read and saved, so concurrent imports don't
+        overwrite each other's index.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        HashIndex
+            The index stored in the ledger directory.
+        """
+
+        with self.store_lock, self.store.locked():
+            hash_index = HashIndex(self.store.aux_path("import_hashes.npz"))
+            self.update_hash_index(hash_index)
+
+        return hash_index
+
+    def update_hash_index(self, hash_index):
+        """
+        Adds the hashes of the transactions stored since the index's position, then saves it with the store's current position.
+
+        The index is rebuilt from the whole store, one batch at a time, if it
+        hasn't been built yet or the stored transactions can't be followed
+        from its position (e.g. after a bulk insert). Called with the store locked.
+
+        Parameters
+        ----------
+        hash_index : HashIndex
+            The index to bring up to date.
+
+        Returns
+        -------
+        None
+        """
+
+        tail = None if hash_index.position is None else self.store.read_since(hash_index.position)
+        position = self.store.position()
+
+        if tail is None:
+            with tracer.span("build hash index") as span:
+                # Read one batch at a time so building the index doesn't need the whole ledger in memory
+                hash_index.hashes = np.empty(0, dtype = "uint64")
+                for batch in self.store.iter_batches():
+                    hash_index.add_stored(batch)
+                span.rows = len(hash_index.hashes)
+        elif not tail.empty:
+            hash_index.add_stored(tail)
+        elif position == hash_index.position:
+            return
+
+        hash_index.save(position)
+
+    def export_csv(self, path):
+        """
+        Exports every transaction to a CSV file in the same format as transactions.csv.
+
+        In out-of-core mode the transactions are streamed from the store a
+        batch at a time (see TransactionStore.iter_batches), so they are
+        written in the store's order rather than sorted by date.
+
+        Parameters
+        ----------
+        path : str
+            The CSV file to write.
+
+        Returns
+        -------
+        int
+            The number of transactions exported.
+        """
+
+        if self.out_of_core:
+            # The unsaved transactions are read with the store, so none is written twice or missed if they are saved meanwhile
+            with self.store_lock, self.store.locked(exclusive = False), self.state_lock:
+                return write_csv_batches(path, itertools.chain(self.store.iter_batches(), [self.records_to_dataframe(self.unsaved_transactions)]))
+
+        self.flush_pending_transactions()
+        write_csv_file(path, self.df)
+        return len(self.df)
+
+    def evaluate_budgets(self):
+        """
+        Works out the state of every budget in every period, e.g. to re-check them all after a large import.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        DataFrame
+            One row per budget and period (see Budgets.evaluate).
+        """
+
+        cube = self.get_summary_cube()
+
+        with tracer.span("evaluate budgets", len(cube.cells)):
+            return self.budgets.evaluate(cube)
+
+    def get_data_version(self):
+        """
+        Returns a version string for the stored transactions that persists between sessions.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str or None
+            The store's version when this process last read or wrote it, or
+            None if there are transactions that haven't been saved yet.
+        """
+
+        if self.unsaved_transactions: # Staged transactions replayed from the store are already saved, so only these count
+            return None
+        return self.store_version
+
+    def check_empty_df(self):
+        """
+        Check if the DataFrame has no transactions yet.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True if the DataFrame is empty, False otherwise.
+        """
+
+        cube = self.get_summary_cube()
+
+        if cube.income[1] + cube.expenses[1] == 0:
+            print(f"\nNo transactions available, please add some first")
+            return True
+        return False
+
+def read_queries(args):
+    """
+    Parses the queries given on the command line and in the --queries file.
+
+    A query that can't be parsed is reported on stderr and skipped.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line of the report or chart command.
+
+    Returns
+    -------
+    tuple
+        The parsed queries, and how many were skipped.
+    """
+
+    queries = list(args.queries)
+    if args.queries_file:
+        lines = sys.stdin.read().splitlines() if args.queries_file == "-" else open(args.queries_file, encoding = "utf-8").read().splitlines()
+        queries += [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+    parsed = []
+    failures = 0
+    for query in queries:
+        try:
+            parsed.append(parse_query(query, FinanceTracker.VALID_CATEGORIES))
+        except QueryError as e:
+            print(f"Skipping query {query!r}: {e}", file = sys.stderr)
+            failures += 1
+
+    return parsed, failures
+
+def write_charts(ft, args):
+    """
+    Renders the charts for the report queries given on the command line to image files.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed command line of the chart command.
+
+    Returns
+    -------
+    bool
+        True if every query's chart was rendered, False if any query was skipped.
+    """
+
+    queries, failures = read_queries(args)
+
+    valid = []
+    for query in queries:
+        try:
+            if query.report == "month":
+                month_number(query.month) # Checked up front, so a bad month doesn't fail a worker part way through
+            elif query.report == "search":
+                raise QueryError("search results have no chart")
+        except QueryError as e:
+            print(f"Skipping query {describe_query(query)!r}: {e}", file = sys.stderr)
+            failures += 1
+        else:
+            valid.append(query)
+
+    cache = None if args.no_cache else ChartCache(ft.store.aux_path("chart_cache"))
+    results = render_charts(ft, valid, args.directory, args.image_format, cache, ft.get_data_version(), args.workers, FinanceTracker.INCOME_CATEGORIES)
+
+    for path, cached in results:
+        print(f"{path}" + (" (cached)" if cached else ""))
+
+    return failures == 0
+
+def write_export(ft, args):
+    """
+    Exports every report with its chart to the directory given on the command line, and prints how long it took.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed command line of the export command.
+
+    Returns
+    -------
+    None
+    """
+
+    cache = None if args.no_cache else ChartCache(ft.store.aux_path("chart_cache"))
+    result = export_reports(ft, args.directory, FinanceTracker.VALID_CATEGORIES, FinanceTracker.INCOME_CATEGORIES, args.format, args.year, args.image_format, cache, ft.get_data_version(), args.workers)
+
+    print(f"{len(result['pages'])} page(s) and {result['charts']} chart(s) ({result['cached']} cached) written to {args.directory}")
+    print(f"Exported in {result['seconds']:.2f} s with {result['workers']} worker(s); open {result['pages'][0]}")
+
+def write_budgets(ft, args):
+    """
+    Sets or removes the budgets given on the command line, then prints how much of each has been spent.
+
+    Without --all, every budget is shown for the latest month with
+    transactions (and its year). With --all, every period any budget was
+    spent in is shown, worked out in one pass by FinanceTracker.evaluate_budgets.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed command line of the budget command.
+
+    Returns
+    -------
+    bool
+        True if every budget given was valid, False if any wasn't (and nothing was saved).
+    """
+
+    try:
+        for period in PERIODS:
+            for category, amount in getattr(args, period) or []:
+                ft.budgets.set_limit(category.capitalize(), period, round(float(amount) * 100))
+        for category in args.remove or []:
+            for period in PERIODS:
+                ft.budgets.set_limit(category.capitalize(), period, None)
+    except ValueError as e:
+        print(f"Invalid budget: {e}", file = sys.stderr)
         return False
 
-ft = FinanceTracker()
-ft.menu()
\ No newline at end of file
+    if args.monthly or args.yearly or args.remove:
+        ft.budgets.save()
+        print(f"Budgets saved to {ft.budgets.path}")
+
+    if not ft.budgets.covers(FinanceTracker.EXPENSE_CATEGORIES):
+        print("No budgets set, e.g. python main.py budget --monthly Food 300")
+        return True
+
+    cube = ft.get_summary_cube()
+    if args.all:
+        rows = [(row.budget, row.year, row.month or None, row.category, round(row.spent * 100), round(row.limit * 100)) for row in ft.evaluate_budgets().itertuples()]
+    elif cube.months:
+        year, month = max(cube.months)
+        spending = ft.budgets.spending(cube, [(year, month, category) for category in FinanceTracker.EXPENSE_CATEGORIES])
+        rows = [(period, y, m, category, spent, ft.budgets.limits[period][category]) for (period, y, m, category), spent in sorted(spending.items(), key = lambda item: PERIODS.index(item[0][0]))]
+    else:
+        rows = []
+
+    states = [0, 0, 0]
+    heading = None
+    for period, year, month, category, spent, limit in rows:
+        if (period, year, month) != heading:
+            heading = (period, year, month)
+            print(f"\n{period.capitalize()} budgets for {period_name(year, month)}:\n")
+
+        state = Budgets.state(spent, limit)
+        states[state] += 1
+        print(f"{category}: £{spent / 100:.2f} spent of £{limit / 100:.2f} ({spent / limit:.0%}, {STATES[state]})")
+
+    print(f"\n{states[2]} exceeded, {states[1]} nearly reached")
+    return True
+
+def write_anomalies(ft, args):
+    """
+    Scans the whole ledger for unusual transactions and monthly spending spikes, and prints the most unusual.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed command line of the anomalies command.
+
+    Returns
+    -------
+    None
+    """
+
+    unusual, spikes = ft.detect_anomalies(args.z, args.spike)
+    if args.category:
+        unusual = unusual[unusual["Category"].astype(str) == args.category]
+        spikes = spikes[spikes["category"] == args.category]
+
+    print(f"{len(unusual)} unusual transaction(s), {len(spikes)} monthly spike(s)")
+    if not unusual.empty:
+        print(f"\nMost unusual transactions (showing {min(args.limit, len(unusual))}):\n")
+        for message in anomaly_messages(unusual.head(args.limit), spikes.iloc[:0]):
+            print(message)
+    if not spikes.empty:
+        print(f"\nLargest monthly spikes (showing {min(args.limit, len(spikes))}):\n")
+        for message in anomaly_messages(unusual.iloc[:0], spikes.sort_values("score", ascending = False).head(args.limit).sort_values(["year", "month"])):
+            print(message)
+
+def write_reports(ft, args):
+    """
+    Runs the report queries given on the command line and writes them out in the chosen format.
+
+    A query that can't be parsed is reported on stderr and skipped, so the
+    rest of a batch still runs.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed command line of a report command.
+
+    Returns
+    -------
+    bool
+        True if every query ran, False if any failed.
+    """
+
+    if args.command == "report":
+        queries, failures = read_queries(args)
+    else:
+        args.report = args.command
+        queries, failures = [args], 0
+
+    reports = []
+    for query in queries:
+        try:
+            reports.append(run_report(ft, query))
+        except QueryError as e:
+            print(f"Skipping query {describe_query(query)!r}: {e}", file = sys.stderr)
+            failures += 1
+
+    output = FORMATTERS[args.format](reports)
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8", newline = "") as f:
+            f.write(output)
+        print(f"{len(reports)} report(s) written to {args.output}")
+    else:
+        sys.stdout.write(output)
+
+    return failures == 0
+
+def main(argv = None):
+    """
+    Entry point for the command-line application.
+
+    With no arguments the interactive menu is shown. The import-csv command
+    bulk imports CSV statements, export-csv writes the ledger out as CSV and
+    migrate copies an existing CSV file, ledger or database into the chosen
+    backend. --out-of-core streams the ledger in chunks instead of loading it.
+    --trace and --cprofile turn on the timing instrumentation.
+
+    The month, category, cumulative, overview, daily and rolling commands
+    print one report without any prompts, search lists the transactions matching a date range,
+    categories, amounts and a description pattern, and report runs many
+    queries against one load of the ledger (see reports.py). serve keeps the ledger loaded and answers report
+    queries and appends over HTTP (see server.py). export writes every report
+    with its chart to a directory of HTML or Markdown pages (see export.py),
+    and budget sets the spending limits checked as transactions are added
+    (see budgets.py). anomalies flags unusual transactions and sudden
+    monthly spikes in spending (see anomalies.py).
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Command-line arguments; defaults to sys.argv.
+
+    Returns
+    -------
+    None
+    """
+
+    parser = argparse.ArgumentParser(description = "Personal-Finance Tracker")
+    parser.add_argument("--backend", choices = ["ledger", "sqlite"], default = "ledger", help = "storage backend (default: %(default)s)")
+    parser.add_argument("--path", help = "where transactions are stored (default: transactions.ledger or transactions.sqlite)")
+    parser.add_argument("--out-of-core", action = "store_true", help = "stream the ledger in chunks instead of loading it into memory")
+    parser.add_argument("--chunk-rows", type = int, default = 250_000, help = "transactions per chunk in out-of-core mode (default: 250000)")
+    parser.add_argument("--trace", nargs = "?", const = DEFAULT_TRACE_FILE, metavar = "FILE", help = f"time each stage, print a summary at exit and write a trace file (default: {DEFAULT_TRACE_FILE})")
+    parser.add_argument("--cprofile", metavar = "DIR", help = "also write a cProfile dump of each command to DIR")
+    commands = parser.add_subparsers(dest = "command")
+    import_parser = commands.add_parser("import-csv", help = "import transactions from CSV statement files")
+    import_parser.add_argument("files", nargs = "+")
+    import_parser.add_argument("--map", action = "append", default = [], metavar = "COLUMN=HEADER", help = f"map a statement column onto one of {', '.join(HEADERS)}")
+    import_parser.add_argument("--date-format", default = DATE_FORMAT, help = "strptime format of the statement dates (default: %(default)s)")
+    import_parser.add_argument("--category", choices = FinanceTracker.VALID_CATEGORIES, help = "category for statements without a category column")
+    import_parser.add_argument("--workers", type = int, help = "number of parsing processes (default: one per CPU)")
+    commands.add_parser("export-csv", help = "export all transactions to a CSV file").add_argument("file")
+    commands.add_parser("migrate", help = "copy transactions from a CSV file, ledger directory or SQLite database into the backend").add_argument("source")
+
+    output_options = argparse.ArgumentParser(add_help = False)
+    output_options.add_argument("--format", choices = list(FORMATTERS), default = "text", help = "output format (default: %(default)s)")
+    output_options.add_argument("--output", metavar = "FILE", help = "write the report(s) to FILE instead of the screen")
+    add_report_arguments(commands, FinanceTracker.VALID_CATEGORIES, parents = [output_options])
+    report_parser = commands.add_parser("report", parents = [output_options], help = "run many report queries, e.g. \"month --year 2025 --month May\" \"category Food\"")
+    report_parser.add_argument("queries", nargs = "*", metavar = "QUERY")
+    report_parser.add_argument("--queries", dest = "queries_file", metavar = "FILE", help = "read queries from FILE, one per line (- for standard input)")
+    chart_parser = commands.add_parser("chart", help = "render the charts for many report queries to image files, without a display")
+    chart_parser.add_argument("queries", nargs = "*", metavar = "QUERY")
+    chart_parser.add_argument("--queries", dest = "queries_file", metavar = "FILE", help = "read queries from FILE, one per line (- for standard input)")
+    chart_parser.add_argument("--image-format", choices = IMAGE_FORMATS, default = "png", help = "image format (default: %(default)s)")
+    chart_parser.add_argument("--directory", default = "charts", help = "where to write the images (default: %(default)s)")
+    chart_parser.add_argument("--workers", type = int, help = "number of rendering processes (default: one per CPU)")
+    chart_parser.add_argument("--no-cache", action = "store_true", help = "redraw every chart instead of reusing cached images")
+    export_parser = commands.add_parser("export", help = "write every month, category, cumulative and overview report with its chart to a directory of pages")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices = list(PAGE_FORMATS), default = "html", help = "page format (default: %(default)s)")
+    export_parser.add_argument("--year", type = int, help = "only export the months of this year (the overview, cumulative and category pages cover every year)")
+    export_parser.add_argument("--image-format", choices = IMAGE_FORMATS, default = "png", help = "image format (default: %(default)s)")
+    export_parser.add_argument("--workers", type = int, help = "number of rendering processes (default: one per CPU)")
+    export_parser.add_argument("--no-cache", action = "store_true", help = "redraw every chart instead of reusing cached images")
+    budget_parser = commands.add_parser("budget", help = "set monthly and yearly budgets per expense category, and show how much of them has been spent")
+    budget_parser.add_argument("--monthly", nargs = 2, action = "append", metavar = ("CATEGORY", "AMOUNT"), help = "set a category's monthly budget in pounds")
+    budget_parser.add_argument("--yearly", nargs = 2, action = "append", metavar = ("CATEGORY", "AMOUNT"), help = "set a category's yearly budget in pounds")
+    budget_parser.add_argument("--remove", nargs = "+", metavar = "CATEGORY", help = "remove the categories' budgets")
+    budget_parser.add_argument("--all", action = "store_true", help = "show every period with spending, not only the latest month and year")
+    anomalies_parser = commands.add_parser("anomalies", help = "flag transactions far outside their category's typical range, and sudden monthly spikes in spending")
+    anomalies_parser.add_argument("--z", type = float, default = CategoryStats.Z_THRESHOLD, help = "standard deviations above a category's mean before an amount is unusual (default: %(default)s)")
+    anomalies_parser.add_argument("--spike", type = float, default = CategoryStats.SPIKE_THRESHOLD, help = "standard deviations above the previous months' mean before a month's spend is a spike (default: %(default)s)")
+    anomalies_parser.add_argument("--category", choices = FinanceTracker.VALID_CATEGORIES, help = "only show this category's anomalies")
+    anomalies_parser.add_argument("--limit", type = int, default = 20, help = "most of each kind of anomaly to show (default: %(default)s)")
+    serve_parser = commands.add_parser("serve", help = "keep the ledger loaded and answer report queries and appends over HTTP (see client.py)")
+    serve_parser.add_argument("--host", default = DEFAULT_HOST, help = "address to listen on (default: %(default)s)")
+    serve_parser.add_argument("--port", type = int, default = DEFAULT_PORT, help = "port to listen on (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.trace or args.cprofile:
+        tracer.enable(args.trace or DEFAULT_TRACE_FILE, args.cprofile)
+
+    if args.command == "migrate":
+        # Copied batch by batch without loading the ledger into a FinanceTracker
+        try:
+            copied = tracer.command("migrate", migrate, args.source, open_store(args.backend, args.path, FinanceTracker.VALID_CATEGORIES, import_csv = False))
+        except (OSError, ValueError) as e:
+            print(f"Could not migrate {args.source}: {e}", file = sys.stderr)
+            sys.exit(1)
+        print(f"{copied} transaction(s) migrated from {args.source}")
+        return
+
+    ft = FinanceTracker(args.path, args.out_of_core, args.chunk_rows, args.backend)
+
+    if args.command == "import-csv":
+        if any("=" not in mapping for mapping in args.map):
+            parser.error("--map takes COLUMN=HEADER")
+        column_map = dict(mapping.split("=", 1) for mapping in args.map)
+        try:
+            result = tracer.command("import-csv", ft.import_csv, args.files, column_map, args.date_format, args.category, args.workers)
+        except (OSError, ValueError) as e:
+            print(f"Could not import the statements: {e}", file = sys.stderr)
+            sys.exit(1)
+
+        print(f"{result['imported']} transaction(s) imported, {result['duplicates']} duplicate(s) skipped, {len(result['rejected'])} row(s) rejected")
+        for source, line, reason in result["rejected"][:10]:
+            print(f"  {source}, line {line}: {reason}")
+        for alert in result["alerts"]:
+            print(f"Budget alert: {alert['message']}")
+        for message in result["anomalies"]:
+            print(f"Anomaly: {message}")
+    elif args.command == "export-csv":
+        exported = tracer.command("export-csv", ft.export_csv, args.file)
+        print(f"{exported} transaction(s) exported to {args.file}")
+    elif args.command in REPORTS or args.command == "report":
+        if not tracer.command("report", write_reports, ft, args):
+            sys.exit(1)
+    elif args.command == "chart":
+        if not tracer.command("chart", write_charts, ft, args):
+            sys.exit(1)
+    elif args.command == "export":
+        tracer.command("export", write_export, ft, args)
+    elif args.command == "budget":
+        if not tracer.command("budget", write_budgets, ft, args):
+            sys.exit(1)
+    elif args.command == "anomalies":
+        tracer.command("anomalies", write_anomalies, ft, args)
+    elif args.command == "serve":
+        serve(ft, args.host, args.port)
+    else:
+        ft.menu()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Non-interactive reports for the Personal-Finance Tracker.
+
+Each report runs the same calculations as one of the views (by month, by
+category, cumulative net balance, all-time overview, daily balance and
+rolling spend) without any prompts or charts, and can be written as text,
+JSON or CSV. The search report lists the
+transactions matching a date range, categories, amount bounds, a
+description pattern and words from the description index (see search.py
+and text_index.py). Many reports can be run against a
+single loaded ledger, e.g.
+
+    python main.py report "month --year 2025 --month May" "category Food" overview --format json
+    python main.py report --queries nightly.txt --format csv --output reports.csv
+    python main.py report "daily --from 01-01-2024" "rolling --window 7 --category Food"
+    python main.py search --from 01-01-2024 --to 31-03-2024 --category Food Leisure --max -20 --description "lunch|dinner"
+    python main.py search --text "netf sub"
+"""
+
+import argparse
+import calendar
+import csv
+import io
+import json
+import shlex
+
+from search import TransactionQuery, parse_date
+from storage import DATE_FORMAT
+
+REPORTS = ["month", "category", "cumulative", "overview", "daily", "rolling", "search"]
+CSV_COLUMNS = ["query", "report", "period", "category", "amount", "transactions", "cumulative", "description"]
+SEPARATOR = "----------------------------"
+
+
+class QueryError(ValueError):
+    """
+    Raised when a report query can't be parsed.
+    """
+
+
+class QueryParser(argparse.ArgumentParser):
+    """
+    An ArgumentParser that raises QueryError instead of exiting, so one bad query doesn't end a batch.
+    """
+
+    def error(self, message):
+        raise QueryError(message)
+
+
+def window_days(value):
+    """
+    Parses the number of days in a rolling window, e.g. from the command line.
+
+    Raises
+    ------
+    ValueError
+        If value is not a whole number of days of at least 1.
+    """
+
+    days = int(value)
+    if days < 1:
+        raise ValueError(f"Window under a day: {days}")
+    return days
+
+
+def add_report_arguments(subparsers, categories, **options):
+    """
+    Adds a subcommand for each report to an argparse subparsers object.
+
+    Used both for main.py's own subcommands and for parsing the queries given to
+    the report subcommand.
+
+    Parameters
+    ----------
+    subparsers : argparse._SubParsersAction
+        Where to add the subcommands.
+    categories : list of str
+        The valid categories.
+    **options
+        Passed on to every add_parser call, e.g. parents.
+
+    Returns
+    -------
+    None
+    """
+
+    month = subparsers.add_parser("month", help = "summary for one month of one year", **options)
+    month.add_argument("--year", type = int, required = True)
+    month.add_argument("--month", required = True, help = "month name (e.g. May) or number (1-12)")
+
+    category = subparsers.add_parser("category", help = "monthly totals for one category", **options)
+    category.add_argument("category", type = str.capitalize, choices = categories)
+
+    subparsers.add_parser("cumulative", help = "cumulative net balance by month", **options)
+    subparsers.add_parser("overview", help = "all-time totals by category", **options)
+
+    daily = subparsers.add_parser("daily", help = "net amount and running net balance for every day", **options)
+    daily.add_argument("--from", dest = "start", type = parse_date, metavar = "DD-MM-YYYY", help = "first day to include")
+    daily.add_argument("--to", dest = "end", type = parse_date, metavar = "DD-MM-YYYY", help = "last day to include")
+
+    rolling = subparsers.add_parser("rolling", help = "each category's total over the last N days, for every day", **options)
+    rolling.add_argument("--window", type = window_days, default = 30, metavar = "DAYS", help = "days in each window, e.g. 7, 30 or 90 (default: %(default)s)")
+    rolling.add_argument("--category", dest = "categories", nargs = "+", type = str.capitalize, choices = categories, metavar = "CATEGORY", help = "categories to include (default: every expense category)")
+    rolling.add_argument("--from", dest = "start", type = parse_date, metavar = "DD-MM-YYYY", help = "first day to include")
+    rolling.add_argument("--to", dest = "end", type = parse_date, metavar = "DD-MM-YYYY", help = "last day to include")
+
+    search = subparsers.add_parser("search", help = "transactions matching a date range, categories, amounts and description", **options)
+    search.add_argument("--from", dest = "start", type = parse_date, metavar = "DD-MM-YYYY", help = "first date to include")
+    search.add_argument("--to", dest = "end", type = parse_date, metavar = "DD-MM-YYYY", help = "last date to include")
+    search.add_argument("--category", dest = "categories", nargs = "+", type = str.capitalize, choices = categories, metavar = "CATEGORY")
+    search.add_argument("--min", dest = "min_amount", type = float, metavar = "AMOUNT", help = "lowest amount in pounds (expenses are negative)")
+    search.add_argument("--max", dest = "max_amount", type = float, metavar = "AMOUNT", help = "highest amount in pounds")
+    search.add_argument("--description", metavar = "PATTERN", help = "regular expression to look for in descriptions, ignoring case")
+    search.add_argument("--text", metavar = "WORDS", help = "words to look up in the description index, each matching the start of a word")
+    search.add_argument("--any", dest = "any_term", action = "store_true", help = "match descriptions with any of the words rather than all of them")
+
+
+def parse_query(query, categories):
+    """
+    Parses one query such as "month --year 2025 --month May" or "category Food".
+
+    Parameters
+    ----------
+    query : str
+        The query.
+    categories : list of str
+        The valid categories.
+
+    Raises
+    ------
+    QueryError
+        If the query is not a valid report query.
+
+    Returns
+    -------
+    argparse.Namespace
+        The query's report name (as "report") and its arguments.
+    """
+
+    parser = QueryParser(prog = "query", add_help = False)
+    add_report_arguments(parser.add_subparsers(dest = "report", required = True, parser_class = QueryParser), categories)
+    return parser.parse_args(shlex.split(query))
+
+
+def month_number(month):
+    """
+    Returns the number (1-12) of a month given by name, abbreviation or number.
+
+    Raises
+    ------
+    QueryError
+        If month is not a month.
+    """
+
+    month = str(month).strip().capitalize()
+    if month.isdigit() and 1 <= int(month) <= 12:
+        return int(month)
+    if month in calendar.month_name:
+        return list(calendar.month_name).index(month)
+    if month in calendar.month_abbr:
+        return list(calendar.month_abbr).index(month)
+    raise QueryError(f"Incorrect month name: {month}")
+
+
+def describe_query(args):
+    """
+    Returns a parsed query written back out as a query string, e.g. "category Food".
+    """
+
+    if args.report == "month":
+        return f"month --year {args.year} --month {args.month}"
+    if args.report == "category":
+        return f"category {args.category}"
+    if args.report in ("daily", "rolling"):
+        options = [
+            ("--window", getattr(args, "window", None)),
+            ("--category", getattr(args, "categories", None) and " ".join(args.categories)),
+            ("--from", args.start and args.start.strftime(DATE_FORMAT)),
+            ("--to", args.end and args.end.strftime(DATE_FORMAT))
+        ]
+        return " ".join([args.report] + [f"{option} {value}" for option, value in options if value is not None])
+    if args.report == "search":
+        options = [
+            ("--from", args.start and args.start.strftime(DATE_FORMAT)),
+            ("--to", args.end and args.end.strftime(DATE_FORMAT)),
+            ("--category", args.categories and " ".join(args.categories)),
+            ("--min", args.min_amount),
+            ("--max", args.max_amount),
+            ("--description", args.description and shlex.quote(args.description)),
+            ("--text", args.text and shlex.quote(args.text))
+        ]
+        return " ".join(["search"] + [f"{option} {value}" for option, value in options if value is not None] + (["--any"] if args.any_term else []))
+    return args.report
+
+
+def run_report(ft, args):
+    """
+    Works out one report with the tracker's summary methods.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    args : argparse.Namespace
+        The parsed query (see parse_query).
+
+    Raises
+    ------
+    QueryError
+        If the month of a month query is not a month, or the description
+        pattern of a search query is not a valid regular expression.
+
+    Returns
+    -------
+    dict
+        The "query", "report" and "title", and the report's "rows" (dicts with
+        CSV_COLUMNS keys), plus "total_income" and "total_expenses" for the
+        month, overview and search reports (and the month's "period").
+    """
+
+    query = describe_query(args)
+
+    if args.report == "month":
+        month = month_number(args.month)
+        summary, total_income, total_expenses = ft.month_summary(month, args.year)
+        period = f"{args.year:04d}-{month:02d}"
+        return {
+            "query": query,
+            "report": "month",
+            "title": f"Summary for {calendar.month_name[month]} {args.year}",
+            "period": period,
+            "rows": [{"period": period, "category": category, "amount": amount} for category, amount in summary.items()],
+            "total_income": total_income,
+            "total_expenses": total_expenses
+        }
+
+    if args.report == "category":
+        summary, number_of_transactions = ft.category_summary(args.category)
+        return {
+            "query": query,
+            "report": "category",
+            "title": f"Summary for {args.category} category",
+            "rows": [{
+                "period": calendar.month_abbr[month],
+                "category": args.category,
+                "amount": amount,
+                "transactions": int(number_of_transactions[month])
+            } for month, amount in summary.items()]
+        }
+
+    if args.report == "cumulative":
+        net, cumulative_net_balance = ft.cumulative_net_balance_summary()
+        return {
+            "query": query,
+            "report": "cumulative",
+            "title": "Cumulative Net Balance",
+            "rows": [{
+                "period": f"{year:04d}-{month:02d}",
+                "amount": amount,
+                "cumulative": cumulative_net_balance[year, month]
+            } for (year, month), amount in net.items()]
+        }
+
+    if args.report == "daily":
+        net, balance = ft.daily_balance_summary(args.start, args.end)
+        return {
+            "query": query,
+            "report": "daily",
+            "title": "Daily Net Balance",
+            "rows": [{
+                "period": date.strftime("%Y-%m-%d"),
+                "amount": amount,
+                "cumulative": total
+            } for date, amount, total in zip(net.index, net.tolist(), balance.tolist())]
+        }
+
+    if args.report == "rolling":
+        totals = ft.rolling_spend_summary(args.window, args.categories, args.start, args.end)
+        return {
+            "query": query,
+            "report": "rolling",
+            "title": f"{args.window}-day Totals by Category",
+            "rows": [{
+                "period": date.strftime("%Y-%m-%d"),
+                "category": category,
+                "amount": amount
+            } for date, amounts in zip(totals.index, totals.values.tolist()) for category, amount in zip(totals.columns, amounts)]
+        }
+
+    if args.report == "search":
+        try:
+            query_filter = TransactionQuery(args.start, args.end, args.categories, args.min_amount, args.max_amount, args.description, args.text, args.any_term)
+        except ValueError as e:
+            raise QueryError(str(e))
+
+        matches = ft.search_transactions(query_filter)
+        amounts = matches["Amount"].values
+        return {
+            "query": query,
+            "report": "search",
+            "title": f"{len(matches)} transaction(s) matching {query}",
+            "rows": [{
+                "period": date.strftime("%Y-%m-%d"),
+                "category": category,
+                "amount": pence / 100,
+                "description": description
+            } for date, category, pence, description in zip(matches["Date"], matches["Category"], amounts.tolist(), matches["Description"])],
+            "total_income": int(amounts[amounts > 0].sum()) / 100,
+            "total_expenses": int(amounts[amounts < 0].sum()) / 100
+        }
+
+    summary, total_income, total_expenses = ft.all_time_summary()
+    return {
+        "query": query,
+        "report": "overview",
+        "title": "All-time Overview by Category",
+        "rows": [{"category": category, "amount": amount} for category, amount in summary.items()],
+        "total_income": total_income,
+        "total_expenses": total_expenses
+    }
+
+
+def format_text(reports):
+    """
+    Formats reports the way the interactive views print them.
+    """
+
+    lines = []
+    for report in reports:
+        lines += [SEPARATOR, "", f"{report['title']}:", ""]
+
+        for row in report["rows"]:
+            if report["report"] == "category":
+                lines.append(f"{row['period']}: £{row['amount']:.2f} ({row['transactions']} transaction(s), avg per transaction: £{row['amount'] / row['transactions']:.2f})")
+            elif report["report"] in ("cumulative", "daily"):
+                lines.append(f"{row['period']}: £{row['cumulative']:.2f}")
+            elif report["report"] == "rolling":
+                lines.append(f"{row['period']} {row['category']}: £{row['amount']:.2f}")
+            elif report["report"] == "search":
+                lines.append(f"{row['period']} {row['category']}: £{row['amount']:.2f} ({row['description']})")
+            else:
+                lines.append(f"{row['category']}: £{row['amount']:.2f}")
+
+        if not report["rows"]:
+            lines.append("No transactions")
+
+        if "total_income" in report:
+            lines += ["", f"Total income: £{report['total_income']:.2f}", f"Total expenses: £{report['total_expenses']:.2f}"]
+        lines.append("")
+
+    return "\n".join(lines + [SEPARATOR]) + "\n"
+
+
+def format_json(reports):
+    """
+    Formats reports as a JSON array.
+    """
+
+    return json.dumps(reports, indent = 2, ensure_ascii = False) + "\n"
+
+
+def format_csv(reports):
+    """
+    Formats reports as a single CSV table with a row per report line, and the month and overview totals as extra rows.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, lineterminator = "\n")
+    writer.writeheader()
+
+    for report in reports:
+        rows = list(report["rows"])
+        if "total_income" in report:
+            rows += [
+                {"period": report.get("period", ""), "category": "Total income", "amount": report["total_income"]},
+                {"period": report.get("period", ""), "category": "Total expenses", "amount": report["total_expenses"]}
+            ]
+
+        for row in rows:
+            writer.writerow({"query": report["query"], "report": report["report"], **{column: round(value, 2) if isinstance(value, float) else value for column, value in row.items()}})
+
+    return buffer.getvalue()
+
+
+FORMATTERS = {"text": format_text, "json": format_json, "csv": format_csv}
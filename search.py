@@ -0,0 +1,161 @@
+"""
+Range queries over the Personal-Finance Tracker's transactions.
+
+A TransactionQuery combines a date range, a set of categories, amount
+bounds, a description pattern and words to look up in the description
+index (see text_index.py). FinanceTracker keeps its DataFrame sorted
+by date, so the date range is found with two binary searches (searchsorted)
+in O(log n), and the other predicates are only tested on the rows inside it:
+a query over one month of ten years of history touches a hundredth of the
+rows a boolean mask over the whole ledger would.
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from storage import DATE_FORMAT
+
+
+def parse_date(value):
+    """
+    Parses a DD-MM-YYYY date, e.g. from the command line.
+
+    Raises
+    ------
+    ValueError
+        If value is not a DD-MM-YYYY date.
+    """
+
+    return datetime.strptime(value, DATE_FORMAT)
+
+
+class TransactionQuery:
+    """
+    Predicates selecting transactions. Every predicate is optional, and a query with none matches everything.
+    """
+
+    def __init__(self, start = None, end = None, categories = None, min_amount = None, max_amount = None, description = None, text = None, any_term = False):
+        """
+        Initialises the query.
+
+        Parameters
+        ----------
+        start : datetime, optional
+            The first date to include.
+        end : datetime, optional
+            The last date to include.
+        categories : list of str, optional
+            The categories to include.
+        min_amount : float, optional
+            The lowest amount to include, in pounds (expenses are negative).
+        max_amount : float, optional
+            The highest amount to include, in pounds.
+        description : str, optional
+            A regular expression searched for in descriptions, ignoring case.
+        text : str, optional
+            Words to look up in the description index, each matched as a prefix of a description's words.
+        any_term : bool
+            Whether descriptions matching any of text's words match, rather than only those matching every word.
+
+        Raises
+        ------
+        ValueError
+            If the description is not a valid regular expression.
+        """
+
+        self.start = None if start is None else np.datetime64(start, "D")
+        self.end = None if end is None else np.datetime64(end, "D")
+        self.categories = None if categories is None else list(categories)
+        self.min_pence = None if min_amount is None else round(min_amount * 100)
+        self.max_pence = None if max_amount is None else round(max_amount * 100)
+        self.text = text or None
+        self.any_term = any_term
+
+        try:
+            self.pattern = re.compile(description, re.IGNORECASE) if description else None
+        except re.error as e:
+            raise ValueError(f"Invalid description pattern: {e}")
+
+    def months(self, first, last):
+        """
+        Returns the first and last (year, month) the query's date range covers, within first and last.
+        """
+
+        if self.start is not None:
+            day = self.start.astype(object) # A datetime.date
+            first = max(first, (day.year, day.month))
+        if self.end is not None:
+            day = self.end.astype(object)
+            last = min(last, (day.year, day.month))
+        return first, last
+
+    def date_window(self, dates):
+        """
+        Returns the positions of the first row in the date range and of the row after the last, by binary search.
+
+        Parameters
+        ----------
+        dates : ndarray
+            The ledger's dates (datetime64), sorted.
+
+        Returns
+        -------
+        tuple of int
+            (first, stop), so dates[first:stop] is the date range.
+        """
+
+        first = 0 if self.start is None else int(dates.searchsorted(self.start.astype(dates.dtype), side = "left"))
+        stop = len(dates) if self.end is None else int(dates.searchsorted((self.end + 1).astype(dates.dtype), side = "left"))
+        return first, max(first, stop)
+
+    def apply(self, df, descriptions = None):
+        """
+        Returns the transactions in a date-sorted DataFrame that match every predicate.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions sorted by date, with the compact dtypes (see storage.compact_dtypes).
+        descriptions : set of str, optional
+            The only descriptions to include, e.g. those the description index matched for text.
+
+        Returns
+        -------
+        DataFrame
+            The matching transactions, in date order.
+        """
+
+        first, stop = self.date_window(df["Date"].values)
+        window = df.iloc[first:stop]
+
+        mask = np.ones(len(window), dtype = bool)
+        if self.categories is not None:
+            mask &= window["Category"].isin(self.categories).values
+        if self.min_pence is not None:
+            mask &= window["Amount"].values >= self.min_pence
+        if self.max_pence is not None:
+            mask &= window["Amount"].values <= self.max_pence
+        if self.pattern is not None:
+            mask &= self.description_mask(window["Description"])
+        if descriptions is not None:
+            mask &= window["Description"].isin(list(descriptions)).values
+
+        return window if mask.all() else window[mask]
+
+    def description_mask(self, descriptions):
+        """
+        Returns whether each description matches the pattern.
+
+        For a Categorical, each distinct description is matched once and the
+        rows' codes are looked up in the result, instead of matching every row.
+        """
+
+        if isinstance(descriptions.dtype, pd.CategoricalDtype):
+            # The extra False at the end is what code -1 (a missing description) looks up
+            matches = np.array([bool(self.pattern.search(description)) for description in descriptions.cat.categories] + [False])
+            return matches[descriptions.cat.codes.values]
+
+        return descriptions.fillna("").str.contains(self.pattern).values
@@ -0,0 +1,318 @@
+"""
+Persistent report server for the Personal-Finance Tracker.
+
+`python main.py serve` loads the ledger once and keeps its summaries warm in
+memory, then answers queries over HTTP on localhost, so scripts and
+dashboards don't pay for interpreter start-up, imports and loading the
+ledger on every query. client.py is a thin client for it.
+
+    GET  /health                                    {"status": "ok", "transactions": N, "data_version": "..."}
+    GET  /report?q=QUERY[&q=QUERY...][&format=F]    reports for the queries (see reports.py), as json (default), text or csv
+    POST /transactions                              JSON list of {"Date": "DD-MM-YYYY", "Category", "Amount", "Description"}
+                                                    objects; the valid ones are saved, and {"added": N, "rejected": [...],
+                                                    "alerts": [...]} is returned, with any budgets they pushed over (see budgets.py)
+
+Errors are returned as {"error": "..."}: 400 for a malformed query or body
+(e.g. anything but a list of objects with every HEADERS key), 404 for an
+unknown path, and 500 if the transactions couldn't be saved.
+
+Requests are handled on a thread each. Any number of reports are answered
+at once, while appends take the lock exclusively, so they are applied one
+at a time and never while a report is being read. Transactions other
+processes save to the same store are merged in before the next report.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from importer import normalise_transactions
+from instrumentation import tracer
+from reports import FORMATTERS, QueryError, parse_query, run_report
+from storage import HEADERS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CONTENT_TYPES = {"json": "application/json", "text": "text/plain", "csv": "text/csv"}
+
+
+class ReadWriteLock:
+    """
+    A lock that many readers can hold at once, or one writer on its own.
+
+    Waiting writers are served before new readers, so a steady stream of
+    reports can't hold back an append forever.
+    """
+
+    def __init__(self):
+        """
+        Initialises the lock, unlocked.
+        """
+
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+
+    def acquire_read(self):
+        with self.condition:
+            while self.writing or self.writers_waiting:
+                self.condition.wait()
+            self.readers += 1
+
+    def release_read(self):
+        with self.condition:
+            self.readers -= 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        with self.condition:
+            self.writers_waiting += 1
+            while self.writing or self.readers:
+                self.condition.wait()
+            self.writers_waiting -= 1
+            self.writing = True
+
+    def release_write(self):
+        with self.condition:
+            self.writing = False
+            self.condition.notify_all()
+
+
+class ReportServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the loaded FinanceTracker that every request is answered from.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, ft, address = (DEFAULT_HOST, DEFAULT_PORT)):
+        """
+        Initialises the server and warms the summaries.
+
+        Parameters
+        ----------
+        ft : FinanceTracker
+            The tracker, with its ledger loaded.
+        address : tuple
+            The (host, port) to listen on.
+        """
+
+        super().__init__(address, RequestHandler)
+        self.ft = ft
+        self.lock = ReadWriteLock()
+
+        self.warm()
+
+    def warm(self):
+        """
+        Builds everything reports read up front, so requests never change the tracker's state while reading it.
+        """
+
+        self.ft.flush_pending_transactions()
+        self.ft.get_summary_cube()
+        self.ft.get_daily_series().prefix_sums()
+        self.ft.get_description_index()
+
+    def refresh(self):
+        """
+        Merges in transactions other processes have saved to the store since, under the write lock.
+        """
+
+        if self.ft.store.sequence() == self.ft.store_sequence:
+            return # Only a small file is read when nothing has changed, so readers aren't held up
+
+        self.lock.acquire_write()
+        try:
+            if self.ft.merge_external_changes():
+                self.warm()
+        finally:
+            self.lock.release_write()
+
+    def report(self, queries, report_format):
+        """
+        Runs report queries under the read lock and returns the formatted output.
+
+        Raises
+        ------
+        QueryError
+            If a query is not a valid report query.
+        """
+
+        parsed = [parse_query(query, self.ft.VALID_CATEGORIES) for query in queries]
+
+        self.refresh()
+        self.lock.acquire_read()
+        try:
+            reports = [run_report(self.ft, args) for args in parsed]
+        finally:
+            self.lock.release_read()
+
+        return FORMATTERS[report_format](reports)
+
+    def append(self, records):
+        """
+        Validates and saves transactions under the write lock.
+
+        Parameters
+        ----------
+        records : list of dict
+            The transactions, with HEADERS keys and dates as DD-MM-YYYY.
+
+        Raises
+        ------
+        ValueError
+            If records isn't a non-empty list of objects with every HEADERS key.
+        OSError
+            If the transactions couldn't be saved.
+
+        Returns
+        -------
+        dict
+            The number of transactions "added", the "rejected" ones as (position, reason) tuples, and the budget "alerts" they raised.
+        """
+
+        check_records(records)
+        df = normalise_transactions(pd.DataFrame(records, columns = HEADERS))
+
+        self.lock.acquire_write()
+        try:
+            result = self.ft.append_transactions(df)
+            self.warm() # Rebuilt here if needed, rather than by the next reader
+        finally:
+            self.lock.release_write()
+
+        return result
+
+    def health(self):
+        """
+        Returns the number of transactions and the data version.
+        """
+
+        self.refresh()
+        self.lock.acquire_read()
+        try:
+            cube = self.ft.get_summary_cube()
+            return {"status": "ok", "transactions": cube.income[1] + cube.expenses[1], "data_version": self.ft.get_data_version()}
+        finally:
+            self.lock.release_read()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers the server's HTTP endpoints.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parameters = parse_qs(url.query)
+
+        if url.path == "/health":
+            self.send(200, json.dumps(self.server.health()))
+        elif url.path == "/report":
+            report_format = parameters.get("format", ["json"])[0]
+            if report_format not in FORMATTERS:
+                self.send(400, json.dumps({"error": f"Unknown format: {report_format}"}))
+                return
+            if not parameters.get("q"):
+                self.send(400, json.dumps({"error": "No query given, e.g. /report?q=overview"}))
+                return
+
+            try:
+                with tracer.span("serve report"):
+                    output = self.server.report(parameters["q"], report_format)
+            except QueryError as e:
+                self.send(400, json.dumps({"error": str(e)}))
+            else:
+                self.send(200, output, CONTENT_TYPES[report_format])
+        else:
+            self.send(404, json.dumps({"error": "Not found"}))
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/transactions":
+            self.send(404, json.dumps({"error": "Not found"}))
+            return
+
+        try:
+            records = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if isinstance(records, dict):
+                records = [records]
+        except ValueError as e:
+            self.send(400, json.dumps({"error": f"Invalid JSON: {e}"}))
+            return
+
+        try:
+            with tracer.span("serve append", len(records) if isinstance(records, list) else 0):
+                result = self.server.append(records)
+        except ValueError as e:
+            self.send(400, json.dumps({"error": str(e)}))
+        except OSError as e:
+            self.send(500, json.dumps({"error": f"Could not save the transactions: {e}"}))
+        else:
+            self.send(200, json.dumps(result))
+
+    def send(self, status, body, content_type = "application/json"):
+        """
+        Sends a response with a UTF-8 body.
+        """
+
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # Keep the terminal quiet; use --trace to see what the server is doing
+
+
+def check_records(records):
+    """
+    Checks that a request body is a non-empty list of transaction objects with every HEADERS key.
+
+    Raises
+    ------
+    ValueError
+        Describing the first problem found.
+    """
+
+    if not isinstance(records, list) or not records:
+        raise ValueError(f"Expected a transaction object or a non-empty list of them, with keys {', '.join(HEADERS)}")
+
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Transaction {position} is not an object")
+        missing = [header for header in HEADERS if header not in record]
+        if missing:
+            raise ValueError(f"Transaction {position} is missing {', '.join(missing)}")
+
+
+def serve(ft, host = DEFAULT_HOST, port = DEFAULT_PORT):
+    """
+    Serves reports from a loaded tracker until interrupted with Ctrl+C.
+
+    Parameters
+    ----------
+    ft : FinanceTracker
+        The tracker, with its ledger loaded.
+    host : str
+        The address to listen on; only localhost by default.
+    port : int
+        The port to listen on.
+
+    Returns
+    -------
+    None
+    """
+
+    with ReportServer(ft, (host, port)) as server:
+        print(f"Serving reports on http://{host}:{server.server_address[1]} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Closing server...")
@@ -0,0 +1,1445 @@
+"""
+Persistence for the Personal-Finance Tracker.
+
+Transactions live in one binary columnar file per month (a partition) plus
+an append-only journal. Saving only appends the new rows to the journal, and
+the journal is periodically folded back into the partitions (compaction) so
+it never grows without bound. CSV is only used for explicit import and export.
+
+Every DataFrame a store returns or accepts uses compact dtypes (see
+compact_dtypes): Category and Description are Categoricals and Amount is
+exact int64 pence. Amounts are only in pounds in CSV text and on screen.
+Each partition's rows are kept sorted by date, so a loaded ledger is already
+in date order apart from the journal's rows.
+The SQLite backend in sqlite_store.py implements the same TransactionStore
+interface, so the rest of the application works with either.
+
+Layout of a partition file (all integers little-endian):
+
+    header          magic, format version, row count, and the byte sizes below
+    category names  UTF-8, newline separated; row category codes index into it
+    days            int32 per row, days since 1970-01-01
+    categories      uint8 per row
+    amounts         int64 per row, in pence
+    descriptions    int32 per row, index into the description pool
+    pool offsets    int64 per unique description (+1), byte offsets into the pool
+    pool            UTF-8 bytes of every unique description
+
+Each section starts on an 8-byte boundary so the columns can be viewed
+straight out of a memory map without copying or parsing.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from instrumentation import tracer
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Not on Windows, where stores aren't locked and only one process should write to a store at a time
+
+HEADERS = ["Date", "Category", "Amount", "Description"]
+DATE_FORMAT = "%d-%m-%Y"
+
+LEDGER_MAGIC = b"FTLEDGER"
+LEDGER_VERSION = 1
+LEDGER_HEADER = struct.Struct("<8sIQIQQ") # magic, version, rows, category bytes, pool descriptions, pool bytes
+
+
+class TransactionStore:
+    """
+    Interface every storage backend implements.
+
+    FinanceTracker only talks to its store through these methods, so the
+    views work the same whichever backend holds the transactions.
+    """
+
+    def open(self):
+        """
+        Prepares the store for reading, creating or upgrading it if needed.
+        """
+
+        raise NotImplementedError
+
+    def load(self):
+        """
+        Returns every stored transaction as a DataFrame with HEADERS columns (see compact_dtypes), sorted by date.
+        """
+
+        raise NotImplementedError
+
+    def append(self, df):
+        """
+        Durably adds new transactions (a DataFrame with HEADERS columns, Amount in pence).
+        """
+
+        raise NotImplementedError
+
+    def bulk_insert(self, batches):
+        """
+        Adds many batches of transactions (DataFrames) in the way that is cheapest for the backend.
+
+        Returns the number of transactions added.
+        """
+
+        raise NotImplementedError
+
+    def needs_compaction(self):
+        """
+        Check if the store would benefit from compact() being called.
+        """
+
+        return False
+
+    def compact(self):
+        """
+        Reorganises recently appended transactions for faster reads.
+        """
+
+    def summary_cells(self):
+        """
+        Returns {(year, month, category): [sum in pence, count]} for every stored transaction.
+        """
+
+        raise NotImplementedError
+
+    def iter_chunks(self, chunk_rows):
+        """
+        Yields every stored transaction's Date, Category and Amount, at most chunk_rows at a time.
+        """
+
+        raise NotImplementedError
+
+    def iter_batches(self):
+        """
+        Yields every stored transaction (all HEADERS columns) in batches of bounded size.
+        """
+
+        raise NotImplementedError
+
+    def read_months(self, start, end):
+        """
+        Returns the transactions from (year, month) start to end inclusive.
+        """
+
+        raise NotImplementedError
+
+    def aux_path(self, name):
+        """
+        Returns where a file that belongs with the store (e.g. an index) should be kept.
+        """
+
+        raise NotImplementedError
+
+    def version(self):
+        """
+        Returns a string that changes whenever the stored transactions change, e.g. for cache keys.
+        """
+
+        raise NotImplementedError
+
+    def position(self):
+        """
+        Returns a JSON-serialisable marker of everything stored so far, to pass to read_since later.
+        """
+
+        raise NotImplementedError
+
+    def read_since(self, position):
+        """
+        Returns the transactions stored after position, or None if they can no longer be told apart from the rest.
+        """
+
+        raise NotImplementedError
+
+    def locked(self, exclusive = True):
+        """
+        Returns a context manager holding the store's advisory lock, shared between readers or exclusive for a writer.
+        """
+
+        raise NotImplementedError
+
+    def sequence(self):
+        """
+        Returns the change-sequence number, which goes up with every write to the store by any process.
+        """
+
+        raise NotImplementedError
+
+
+def open_store(backend, path = None, categories = None, import_csv = True):
+    """
+    Creates the store for a backend name.
+
+    Parameters
+    ----------
+    backend : str
+        "ledger" (monthly binary partitions) or "sqlite".
+    path : str, optional
+        Where the store lives; defaults to transactions.ledger or transactions.sqlite.
+    categories : list of str, optional
+        The valid categories.
+    import_csv : bool
+        Whether a new store imports an existing transactions.csv next to it.
+
+    Raises
+    ------
+    ValueError
+        If the backend name is not recognised.
+
+    Returns
+    -------
+    TransactionStore
+        The store, not yet opened.
+    """
+
+    if backend == "ledger":
+        return LedgerStore(path or "transactions.ledger", categories, import_csv)
+    elif backend == "sqlite":
+        from sqlite_store import SQLiteStore # Only imported when used, like the other optional parts of the app
+        return SQLiteStore(path or "transactions.sqlite", categories, import_csv)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def migrate(source, target):
+    """
+    Copies every transaction from a CSV file, ledger directory or SQLite database into another store.
+
+    The source is read in bounded batches, so migrating never needs the
+    whole ledger in memory.
+
+    Parameters
+    ----------
+    source : str
+        A .csv file, a .sqlite/.db database, or a ledger directory.
+    target : TransactionStore
+        The store to copy the transactions into, opened with import_csv off
+        (see open_store) so it doesn't import transactions.csv as well.
+
+    Raises
+    ------
+    ValueError
+        If the target already holds transactions, which would be stored twice.
+
+    Returns
+    -------
+    int
+        The number of transactions copied.
+    """
+
+    source = Path(source)
+    if source.suffix == ".csv":
+        batches = read_csv_chunks(source, LedgerStore.IMPORT_CHUNK_ROWS, target.categories)
+    else:
+        source_store = open_store("sqlite" if source.suffix in (".sqlite", ".db") else "ledger", source, target.categories, import_csv = False)
+        source_store.open()
+        batches = source_store.iter_batches()
+
+    target.open()
+    if target.summary_cells():
+        raise ValueError(f"{target.path} already holds transactions; migrate into a new store")
+    return target.bulk_insert(batches)
+
+
+class FileLock:
+    """
+    An advisory lock on a file, held by many readers or one writer across processes.
+
+    Holds can be nested: the operating system's lock is only taken by the
+    outermost one, and a shared hold is upgraded in place if an exclusive one
+    is asked for inside it (it then stays exclusive until the outermost hold
+    ends). Threads of one process take turns holding the lock.
+    """
+
+    def __init__(self, path):
+        """
+        Initialises the lock, unlocked.
+
+        Parameters
+        ----------
+        path : str or Path
+            The lock file, created when the lock is first taken.
+        """
+
+        self.path = Path(path)
+        self.thread_lock = threading.RLock()
+        self.fd = None
+        self.depth = 0
+        self.exclusive = False
+
+    @contextmanager
+    def hold(self, exclusive = True):
+        """
+        Holds the lock for the duration of a with block, waiting for other processes to release it first.
+
+        Parameters
+        ----------
+        exclusive : bool
+            Whether to keep every other process out, rather than only writers.
+
+        Yields
+        ------
+        None
+        """
+
+        with self.thread_lock:
+            if self.fd is None or (exclusive and not self.exclusive):
+                self.acquire(exclusive)
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.release()
+
+    def acquire(self, exclusive):
+        """
+        Opens the lock file if needed and takes (or upgrades) the operating system's lock on it.
+        """
+
+        if self.fd is None:
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self.exclusive = exclusive
+
+    def release(self):
+        """
+        Releases the operating system's lock and closes the lock file, so child processes never inherit it.
+        """
+
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
+        self.exclusive = False
+
+
+class LedgerStore(TransactionStore):
+    """
+    Stores transactions as per-month partitions plus an append-only journal.
+
+    The ledger is a directory laid out as:
+
+        manifest.json               generation number, and for each partition its
+                                    file, row count and per-category totals
+        2025/2025-05.g3.ledger      binary columnar file with the May 2025
+                                    transactions, written at generation 3
+        journal                     CSV rows (no header) appended since the
+                                    last compaction
+        journal.g2                  the journal folded in by the compaction to
+                                    generation 3, kept for readers still at 2
+        sequence                    the change-sequence number, and how many
+                                    rows the journal holds
+
+    Compaction folds the journal into only the partitions its rows fall in.
+    New partition files are written under the next generation number before
+    the manifest is switched over to them, and the journal's first line
+    records the generation it was started at, so an interrupted compaction
+    never loses rows or replays them twice.
+
+    Several processes can use the same ledger at once. Every write holds an
+    advisory lock on transactions.lock (next to the directory) exclusively,
+    and reads that open more than one file hold it shared, so a compaction
+    never folds away rows another process is appending or removes a
+    partition file mid-read. Each write also moves the change-sequence
+    number on, so another process can tell cheaply that it has to read
+    what was added (see read_since).
+    """
+
+    COMPACT_EVERY = 1000 # Fold the journal into the partitions once it holds this many rows
+    FOLDED_JOURNALS = 4 # Compacted journals kept, so readers up to this many compactions behind can still read just the new rows
+    IMPORT_CHUNK_ROWS = 250_000 # Rows read at a time when importing a legacy CSV file
+
+    def __init__(self, path = "transactions.ledger", categories = None, import_csv = True):
+        """
+        Initialises the store.
+
+        Parameters
+        ----------
+        path : str
+            Path of the ledger directory.
+        categories : list of str, optional
+            The valid categories, in the order their codes are stored.
+        import_csv : bool
+            Whether a new ledger imports an existing transactions.csv next to it.
+        """
+
+        self.path = Path(path)
+        self.manifest_path = self.path / "manifest.json"
+        self.journal_path = self.path / "journal"
+        self.sequence_path = self.path / "sequence"
+        self.lock = FileLock(self.path.with_suffix(".lock"))
+        self.csv_path = self.path.with_suffix(".csv") if import_csv else None
+        self.legacy_journal_path = self.path.with_suffix(".journal")
+        self.categories = categories
+        self.manifest = {"generation": 0, "partitions": {}}
+        self.journal_rows = 0
+
+    def open(self):
+        """
+        Reads the manifest, first converting the ledger from an older format if needed.
+
+        Earlier versions kept every transaction in a single binary file at the
+        ledger's path, or in transactions.csv, each with a journal next to it.
+        Either is imported into partitions once, by whichever process gets
+        there first.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.path.is_file() or (not self.manifest_path.exists() and self.csv_path is not None and self.csv_path.exists()):
+            with self.locked():
+                # Check again, as another process may have converted it while this one waited for the lock
+                if self.path.is_file():
+                    self.import_legacy_ledger()
+                    self.advance_sequence(0)
+                elif not self.manifest_path.exists() and self.csv_path is not None and self.csv_path.exists():
+                    self.import_legacy_csv()
+                    self.advance_sequence(0)
+
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text())
+
+    def load(self):
+        """
+        Loads every partition and replays the journal on top of them.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        DataFrame
+            Every stored transaction, sorted by date.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+
+            with tracer.span("read partitions") as span:
+                frames = [self.read_partition(key) for key in sorted(self.manifest["partitions"])]
+                span.rows = sum(len(frame) for frame in frames)
+
+            journal = self.read_journal()
+            self.journal_rows = len(journal)
+        if not journal.empty:
+            frames.append(journal)
+
+        if not frames:
+            return empty_ledger(self.categories)
+
+        return sort_by_date(concat_ledgers(frames)) # Partitions are in date order, but the journal's rows may not be
+
+    def read_months(self, start, end):
+        """
+        Reads the transactions between two months, opening only the partitions in that range.
+
+        Parameters
+        ----------
+        start : tuple of int
+            The first (year, month) to include.
+        end : tuple of int
+            The last (year, month) to include.
+
+        Returns
+        -------
+        DataFrame
+            The transactions in the range, including any still in the journal, sorted by date.
+        """
+
+        first, last = f"{start[0]:04d}-{start[1]:02d}", f"{end[0]:04d}-{end[1]:02d}"
+        with self.locked(exclusive = False):
+            self.open()
+            frames = [self.read_partition(key) for key in sorted(self.manifest["partitions"]) if first <= key <= last]
+            journal = self.read_journal()
+
+        if not journal.empty:
+            keys = journal["Date"].dt.strftime("%Y-%m")
+            frames.append(journal[(keys >= first) & (keys <= last)])
+
+        if not frames:
+            return empty_ledger(self.categories)
+
+        return sort_by_date(concat_ledgers(frames))
+
+    def read_partition(self, key):
+        """
+        Reads every transaction in one partition, e.g. "2025-05".
+        """
+
+        return columns_to_dataframe(read_ledger_file(self.path / self.manifest["partitions"][key]["file"]), categories = self.categories)
+
+    def iter_batches(self):
+        """
+        Yields every stored transaction one month partition at a time, followed by the journal's rows.
+
+        The lock is held shared until the last batch has been read, so other
+        processes can append meanwhile but not compact.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            for key in sorted(self.manifest["partitions"]):
+                yield self.read_partition(key)
+
+            journal = self.read_journal()
+            if not journal.empty:
+                yield journal
+
+    def summary_cells(self):
+        """
+        Returns the stored transactions' {(year, month, category): [sum in pence, count]} totals.
+
+        Each partition's totals are read from the manifest, so only the
+        journal's rows have to be summed.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            manifest = self.manifest
+            journal = self.read_journal()
+
+        cells = {}
+        for key, partition in manifest["partitions"].items():
+            year, month = int(key[:4]), int(key[5:])
+            for category, (total, count) in partition["totals"].items():
+                cells[(year, month, category)] = [total, count]
+
+        if not journal.empty:
+            for (year, month, category), rows in journal["Amount"].groupby([journal["Date"].dt.year, journal["Date"].dt.month, journal["Category"]], observed = True):
+                cell = cells.setdefault((int(year), int(month), category), [0, 0])
+                cell[0] += int(rows.sum())
+                cell[1] += len(rows)
+
+        return cells
+
+    def aux_path(self, name):
+        """
+        Returns the path of a file kept inside the ledger directory.
+        """
+
+        return self.path / name
+
+    def version(self):
+        """
+        Returns the manifest's generation and a hash of its totals, plus the journal's size and modification time.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            journal = self.journal_path.stat() if self.journal_path.exists() else None
+            return f"ledger:{self.manifest['generation']}:{manifest_hash(self.manifest)}:" + (f"{journal.st_size}:{journal.st_mtime_ns}" if journal else "0")
+
+    def position(self):
+        """
+        Returns the manifest's generation and hash, and the length of the journal's complete lines.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            return {
+                "generation": self.manifest["generation"],
+                "manifest": manifest_hash(self.manifest),
+                "journal_bytes": journal_length(self.journal_path)
+            }
+
+    def read_since(self, position):
+        """
+        Reads the rows appended after position, following the journal through any compactions since.
+
+        A compaction only folds the journal into the partitions, and each
+        folded journal is kept (as journal.g<generation>) for the next
+        FOLDED_JOURNALS compactions. The manifest records which generations
+        were made by folding a journal in, and the hash of the manifest each
+        was folded from, so the rows appended since a position are the rest
+        of the journal it was taken in followed by every later journal, and
+        only those are read.
+
+        Parameters
+        ----------
+        position : dict
+            A position returned by position().
+
+        Returns
+        -------
+        DataFrame or None
+            The rows appended since, or None if the ledger was rewritten in
+            some other way since (e.g. by bulk_insert), or compacted too many
+            times to follow.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            generation, current = position["generation"], self.manifest["generation"]
+            folds = self.manifest.get("folds", {})
+
+            if generation == current:
+                if manifest_hash(self.manifest) != position["manifest"]:
+                    return None
+            elif generation > current or folds.get(str(generation + 1)) != position["manifest"] or any(str(g) not in folds for g in range(generation + 2, current + 1)):
+                return None
+
+            frames = []
+            for g in range(generation, current + 1):
+                path = self.journal_path if g == current else self.folded_journal_path(g)
+                rows = read_journal_from(path, g, position["journal_bytes"] if g == generation else 0, self.categories)
+                if rows is None:
+                    return None
+                if not rows.empty:
+                    frames.append(rows)
+
+        return concat_ledgers(frames) if frames else empty_ledger(self.categories)
+
+    def locked(self, exclusive = True):
+        """
+        Returns a context manager holding the ledger's advisory lock (see FileLock.hold).
+        """
+
+        return self.lock.hold(exclusive)
+
+    def sequence(self):
+        """
+        Returns the change-sequence number, which every write by any process moves on by one.
+        """
+
+        return self.read_sequence()["sequence"]
+
+    def read_sequence(self):
+        """
+        Returns the saved change-sequence number and the number of rows in the journal.
+        """
+
+        try:
+            return json.loads(self.sequence_path.read_text())
+        except FileNotFoundError:
+            # Ledgers written before the sequence number was kept start from 0, with the journal as loaded
+            return {"sequence": 0, "journal_rows": self.journal_rows}
+
+    def advance_sequence(self, journal_rows):
+        """
+        Moves the change-sequence number on after a write, recording how many rows the journal now holds.
+
+        Only called with the lock held exclusively, after the write itself,
+        so a process that sees the new number also sees what was written.
+        """
+
+        state = {"sequence": self.read_sequence()["sequence"] + 1, "journal_rows": journal_rows}
+        write_atomic(self.sequence_path, json.dumps(state).encode("utf-8"))
+        self.journal_rows = journal_rows
+
+    def folded_journal_path(self, generation):
+        """
+        Returns where the journal started at generation is kept once it has been compacted.
+        """
+
+        return self.path / f"journal.g{generation}"
+
+    def iter_chunks(self, chunk_rows):
+        """
+        Streams every stored transaction in chunks, without loading the whole ledger.
+
+        Chunks carry the Date, Category and Amount columns only. Pages of each
+        memory-mapped partition are released after each chunk, so memory use is
+        bounded by chunk_rows however large the ledger is.
+
+        Parameters
+        ----------
+        chunk_rows : int
+            The maximum number of transactions per chunk.
+
+        Yields
+        ------
+        DataFrame
+            The next chunk of transactions.
+        """
+
+        with self.locked(exclusive = False):
+            self.open()
+            for key in sorted(self.manifest["partitions"]):
+                columns = read_ledger_file(self.path / self.manifest["partitions"][key]["file"], descriptions = False)
+                for start in range(0, len(columns["days"]), chunk_rows):
+                    yield columns_to_dataframe(columns, start, start + chunk_rows, descriptions = False, categories = self.categories)
+                    release_pages(columns["buffer"])
+
+            journal = self.read_journal()
+            if not journal.empty:
+                yield journal
+
+    def import_legacy_ledger(self):
+        """
+        Converts a single-file binary ledger (and the journal written against it) into partitions.
+
+        The old file is kept next to the new directory with a .v1 suffix.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        df = columns_to_dataframe(read_ledger_file(self.path), categories = self.categories)
+        journal = read_journal_file(self.legacy_journal_path, f"# base_size={self.path.stat().st_size}", self.categories)
+
+        self.path.rename(self.path.with_name(self.path.name + ".v1"))
+        self.path.mkdir()
+
+        self.add_to_partitions(concat_ledgers([df, journal]))
+        self.start_journal()
+        self.legacy_journal_path.unlink(missing_ok = True)
+
+    def import_legacy_csv(self):
+        """
+        Converts a CSV file (and the journal written against it) into partitions.
+
+        The CSV is read in chunks of IMPORT_CHUNK_ROWS rows, so memory use stays
+        bounded however large it is. The CSV file itself is left untouched.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        journal = read_journal_file(self.legacy_journal_path, f"# base_size={self.csv_path.stat().st_size}", self.categories)
+
+        self.path.mkdir(exist_ok = True)
+        for chunk in read_csv_chunks(self.csv_path, LedgerStore.IMPORT_CHUNK_ROWS, self.categories):
+            self.add_to_partitions(chunk)
+
+        self.add_to_partitions(journal)
+        self.start_journal()
+        self.legacy_journal_path.unlink(missing_ok = True)
+
+    def read_journal(self):
+        """
+        Reads the rows in the journal that have not been folded into the partitions.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        DataFrame
+            The journal rows, with the Date column parsed.
+        """
+
+        return read_journal_file(self.journal_path, f"# generation={self.manifest['generation']}", self.categories)
+
+    def append(self, df):
+        """
+        Appends transactions to the journal and forces them to disk.
+
+        The rows are written with a single write call on a file opened for
+        appending, then fsynced, so a crash can at worst leave a partial last
+        line, which load ignores and the next append cuts off. The ledger is
+        locked exclusively meanwhile, so appends from several processes are
+        applied one after another and none is folded away half-written.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The new transactions.
+
+        Returns
+        -------
+        None
+        """
+
+        if df.empty:
+            return
+
+        rows = to_csv_text(df, header = False).encode("utf-8")
+
+        with self.locked():
+            self.open() # Another process may have compacted since this one last read the manifest
+            journal_rows = self.read_sequence()["journal_rows"]
+            if read_journal_header(self.journal_path) != f"# generation={self.manifest['generation']}":
+                # Missing, or left over from a compaction interrupted after the manifest was switched over, so its rows are already in the partitions
+                self.start_journal()
+                journal_rows = 0
+
+            fd = os.open(self.journal_path, os.O_RDWR | os.O_APPEND)
+            try:
+                length = complete_length(fd)
+                if length < os.fstat(fd).st_size:
+                    os.ftruncate(fd, length) # So these rows don't run on from a partial line
+                os.write(fd, rows)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            self.advance_sequence(journal_rows + len(df))
+
+    def bulk_insert(self, batches):
+        """
+        Writes transactions straight into their partitions rather than through the journal.
+
+        Parameters
+        ----------
+        batches : iterable of DataFrame
+            The transactions to add.
+
+        Returns
+        -------
+        int
+            The number of transactions added.
+        """
+
+        self.path.mkdir(exist_ok = True)
+
+        with self.locked():
+            self.compact() # Fold the journal in first, so the new partitions don't get ahead of it
+
+            added = 0
+            for df in batches:
+                # Batches may have plain dtypes (e.g. straight from a CSV file), which can't be merged with a partition's Categoricals
+                self.add_to_partitions(compact_dtypes(df[HEADERS], self.categories))
+                added += len(df)
+
+            self.start_journal()
+            self.advance_sequence(0)
+
+        return added
+
+    def compact(self):
+        """
+        Folds the journal into the partitions its rows fall in and starts an empty journal.
+
+        The folded journal is kept as journal.g<generation> for the next
+        FOLDED_JOURNALS compactions, so other processes can still read just
+        the rows appended since they last looked (see read_since).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self.locked():
+            self.open() # Fold in what every process has appended, on top of the latest manifest
+            journal = self.read_journal()
+            if journal.empty:
+                self.journal_rows = 0
+                return
+
+            generation = self.manifest["generation"]
+            self.add_to_partitions(journal, folded_from = manifest_hash(self.manifest))
+            os.replace(self.journal_path, self.folded_journal_path(generation))
+            self.start_journal()
+
+            for path in self.path.glob("journal.g*"):
+                if path.suffix[2:].isdigit() and int(path.suffix[2:]) <= generation - LedgerStore.FOLDED_JOURNALS:
+                    path.unlink(missing_ok = True)
+
+            self.advance_sequence(0)
+
+    def add_to_partitions(self, df, folded_from = None):
+        """
+        Merges transactions into their month partitions and moves the manifest to the next generation.
+
+        Only the partitions that df has rows for are rewritten, with their rows
+        sorted by date. Their new files are written alongside the old ones, the
+        manifest is atomically replaced to point at them, and only then are the
+        old files removed.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions to add.
+        folded_from : str, optional
+            When compacting, the hash of the manifest whose journal df is,
+            recorded in the new manifest's "folds".
+
+        Returns
+        -------
+        None
+        """
+
+        if df.empty:
+            return
+
+        generation = self.manifest["generation"] + 1
+        partitions = dict(self.manifest["partitions"])
+        replaced_files = []
+
+        for year_month, rows in df.groupby(df["Date"].dt.year * 100 + df["Date"].dt.month, sort = True):
+            key = f"{year_month // 100:04d}-{year_month % 100:02d}"
+            if key in partitions:
+                replaced_files.append(self.path / partitions[key]["file"])
+                rows = concat_ledgers([self.read_partition(key), rows])
+            rows = sort_by_date(rows)
+
+            file = f"{key[:4]}/{key}.g{generation}.ledger"
+            (self.path / key[:4]).mkdir(parents = True, exist_ok = True)
+            write_ledger_file(self.path / file, rows, self.categories)
+
+            totals = rows["Amount"].groupby(rows["Category"], observed = True).agg(["sum", "count"])
+            partitions[key] = {
+                "file": file,
+                "rows": len(rows),
+                "totals": {category: [int(total), int(count)] for category, total, count in zip(totals.index, totals["sum"], totals["count"])}
+            }
+
+        folds = {key: previous for key, previous in self.manifest.get("folds", {}).items() if int(key) > generation - LedgerStore.FOLDED_JOURNALS}
+        if folded_from is not None:
+            folds[str(generation)] = folded_from
+
+        self.manifest = {"generation": generation, "partitions": partitions, "folds": folds}
+        write_atomic(self.manifest_path, json.dumps(self.manifest, indent = 2).encode("utf-8"))
+
+        for file in replaced_files:
+            file.unlink(missing_ok = True)
+
+    def needs_compaction(self):
+        """
+        Check if the journal has grown enough to be folded into the partitions.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True if the journal holds at least COMPACT_EVERY rows, False otherwise.
+        """
+
+        return self.journal_rows >= LedgerStore.COMPACT_EVERY
+
+    def start_journal(self):
+        """
+        Atomically replaces the journal with an empty one tied to the current generation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.path.mkdir(exist_ok = True)
+        write_atomic(self.journal_path, f"# generation={self.manifest['generation']}\n".encode("utf-8"))
+
+
+def read_journal_file(path, expected_header, categories = None):
+    """
+    Reads a journal's rows if its first line matches expected_header.
+
+    A journal whose header doesn't match was started before the last
+    compaction, so its rows are already in the base data and are ignored.
+
+    Parameters
+    ----------
+    path : Path
+        The journal file.
+    expected_header : str
+        The first line the journal must have, e.g. "# generation=3".
+    categories : list of str, optional
+        The valid categories.
+
+    Returns
+    -------
+    DataFrame
+        The journal rows, with the Date column parsed and compact dtypes.
+    """
+
+    if not path.exists():
+        return empty_ledger(categories)
+
+    data = path.read_bytes()
+    data = data[:data.rfind(b"\n") + 1] # Ignore a trailing partial line left by an interrupted append
+
+    header, _, rows = data.partition(b"\n")
+    if header.decode("utf-8") != expected_header:
+        return empty_ledger(categories)
+
+    return parse_journal_rows(rows, categories)
+
+
+def read_journal_from(path, generation, offset, categories = None):
+    """
+    Reads a journal's complete rows from a byte offset on, or from its first row if offset is 0.
+
+    Parameters
+    ----------
+    path : Path
+        The journal file.
+    generation : int
+        The generation the journal must have been started at.
+    offset : int
+        Where to start reading, e.g. a position's journal_bytes.
+    categories : list of str, optional
+        The valid categories.
+
+    Returns
+    -------
+    DataFrame or None
+        The rows, or None if the journal is missing, was started at another
+        generation, or is shorter than offset.
+    """
+
+    header = f"# generation={generation}\n".encode("utf-8")
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return empty_ledger(categories) if offset == 0 else None
+
+    try:
+        length = complete_length(fd)
+        os.lseek(fd, 0, os.SEEK_SET)
+        if os.read(fd, len(header)) != header or length < offset:
+            return None
+
+        start = max(offset, len(header))
+        os.lseek(fd, start, os.SEEK_SET)
+        rows = os.read(fd, length - start)
+    finally:
+        os.close(fd)
+
+    return parse_journal_rows(rows, categories)
+
+
+def read_journal_header(path):
+    """
+    Returns a journal's first line, or None if it doesn't exist.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            return f.readline().rstrip(b"\n").decode("utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def complete_length(fd):
+    """
+    Returns the length of an open file's complete lines, leaving out a partial last line left by an interrupted append.
+    """
+
+    end = os.fstat(fd).st_size
+    while end > 0:
+        start = max(end - 65536, 0)
+        os.lseek(fd, start, os.SEEK_SET)
+        newline = os.read(fd, end - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def journal_length(path):
+    """
+    Returns the length of a journal's complete lines, or 0 if it doesn't exist.
+    """
+
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return 0
+
+    try:
+        return complete_length(fd)
+    finally:
+        os.close(fd)
+
+
+def manifest_hash(manifest):
+    """
+    Returns a short hash of a ledger manifest, to tell generations of the same number apart.
+    """
+
+    return hashlib.sha256(json.dumps(manifest, sort_keys = True).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_journal_rows(rows, categories = None):
+    """
+    Parses a journal's CSV rows (bytes, without the header line) into a DataFrame with compact dtypes.
+    """
+
+    if not rows:
+        return empty_ledger(categories)
+
+    with tracer.span("read journal") as span:
+        df = pd.read_csv(StringIO(rows.decode("utf-8")), names = HEADERS, header = None)
+        span.rows = len(df)
+
+    with tracer.span("parse dates", len(df)):
+        df["Date"] = pd.to_datetime(df["Date"], format = DATE_FORMAT)
+    return compact_dtypes(df, categories, pounds = True)
+
+
+def write_ledger_file(path, df, categories = None):
+    """
+    Writes transactions to a binary columnar file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Where to write the file. It is replaced atomically.
+    df : DataFrame
+        The transactions, with Amount in pence.
+    categories : list of str, optional
+        The valid categories; defaults to the categories present in df.
+
+    Raises
+    ------
+    ValueError
+        If a transaction's category is not one of categories.
+
+    Returns
+    -------
+    None
+    """
+
+    if categories is None:
+        categories = sorted(df["Category"].unique())
+
+    category_codes = pd.Categorical(df["Category"], categories = categories).codes
+    if (category_codes < 0).any():
+        raise ValueError(f"Unknown categories: {sorted(set(df['Category'][category_codes < 0]))}")
+
+    days = df["Date"].values.astype("datetime64[D]").astype("int32")
+    amounts = df["Amount"].values.astype("int64")
+
+    # Store each distinct description once, and a code per row pointing at it
+    description_codes, descriptions = pd.factorize(df["Description"])
+    encoded = [str(d).encode("utf-8") for d in descriptions]
+    offsets = np.zeros(len(encoded) + 1, dtype = "int64")
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+
+    category_names = "\n".join(categories).encode("utf-8")
+    pool = b"".join(encoded)
+
+    sections = [
+        LEDGER_HEADER.pack(LEDGER_MAGIC, LEDGER_VERSION, len(df), len(category_names), len(encoded), len(pool)),
+        category_names,
+        days.tobytes(),
+        category_codes.astype("uint8").tobytes(),
+        amounts.tobytes(),
+        description_codes.astype("int32").tobytes(),
+        offsets.tobytes(),
+        pool
+    ]
+
+    write_atomic(path, b"".join(section + b"\0" * (-len(section) % 8) for section in sections))
+
+
+def read_ledger_file(path, descriptions = True):
+    """
+    Maps a binary columnar file into memory and returns views of its columns.
+
+    Nothing is parsed or copied: each column is a NumPy view over the memory
+    map, so only the pages that are actually read get loaded from disk.
+
+    Parameters
+    ----------
+    path : str or Path
+        The file to read.
+    descriptions : bool
+        Whether to decode the description pool (not needed for summaries).
+
+    Raises
+    ------
+    ValueError
+        If the file is not a ledger file or was written by a newer format version.
+
+    Returns
+    -------
+    dict
+        "days", "categories", "amounts" and "descriptions" arrays, plus the
+        "category_names" and "description_pool" lists their codes index into,
+        and the underlying memory map as "buffer".
+    """
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+    magic, version, rows, category_bytes, pool_count, pool_bytes = LEDGER_HEADER.unpack_from(buffer, 0)
+    if magic != LEDGER_MAGIC or version > LEDGER_VERSION:
+        raise ValueError(f"{path} is not a supported ledger file")
+
+    offset = 0
+
+    def section(length):
+        # Return the start of the next section and move past it (sections are padded to 8 bytes)
+        nonlocal offset
+        start = offset
+        offset += length + (-length % 8)
+        return start
+
+    section(LEDGER_HEADER.size)
+    names_start = section(category_bytes)
+    category_names = bytes(buffer[names_start:names_start + category_bytes]).decode("utf-8").split("\n")
+
+    columns = {
+        "days": np.frombuffer(buffer, dtype = "<i4", count = rows, offset = section(rows * 4)),
+        "categories": np.frombuffer(buffer, dtype = "u1", count = rows, offset = section(rows)),
+        "amounts": np.frombuffer(buffer, dtype = "<i8", count = rows, offset = section(rows * 8)),
+        "descriptions": np.frombuffer(buffer, dtype = "<i4", count = rows, offset = section(rows * 4))
+    }
+
+    columns["category_names"] = category_names
+    columns["buffer"] = buffer
+
+    if descriptions:
+        offsets = np.frombuffer(buffer, dtype = "<i8", count = pool_count + 1, offset = section((pool_count + 1) * 8)).tolist()
+        pool = bytes(buffer[offset:offset + pool_bytes])
+        columns["description_pool"] = [pool[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+    return columns
+
+
+def columns_to_dataframe(columns, start = 0, stop = None, descriptions = True, categories = None):
+    """
+    Builds a transactions DataFrame from (a slice of) the columns returned by read_ledger_file.
+
+    The stored codes become the codes of the Category and Description
+    Categoricals as they are, so no string is built per row. Category is
+    recoded to categories if given and the file was written with a different list.
+    """
+
+    rows = slice(start, stop)
+
+    category = pd.Categorical.from_codes(columns["categories"][rows], columns["category_names"])
+    if categories is not None and list(categories) != columns["category_names"]:
+        category = category.set_categories(categories)
+
+    df = pd.DataFrame({
+        "Date": columns["days"][rows].astype("datetime64[D]").astype("datetime64[us]"),
+        "Category": category,
+        "Amount": columns["amounts"][rows].astype("int64") # A copy, so the DataFrame doesn't pin the memory map
+    })
+
+    if descriptions:
+        df["Description"] = pd.Categorical.from_codes(columns["descriptions"][rows], columns["description_pool"])
+    return df
+
+
+def release_pages(buffer):
+    """
+    Tells the OS it can drop the pages of a read-only memory map that have been read so far.
+
+    They are re-read from disk if touched again. This keeps the resident size of
+    a streamed ledger flat instead of growing to the size of the file.
+    """
+
+    if hasattr(mmap, "MADV_DONTNEED"):
+        buffer.madvise(mmap.MADV_DONTNEED)
+
+
+def read_csv_chunks(path, chunk_rows, categories = None):
+    """
+    Reads transactions from a CSV file with DD-MM-YYYY dates and amounts in pounds, chunk_rows at a time.
+    """
+
+    for chunk in pd.read_csv(path, chunksize = chunk_rows):
+        with tracer.span("parse dates", len(chunk)):
+            chunk["Date"] = pd.to_datetime(chunk["Date"], format = DATE_FORMAT) # Converting the dates column from strings to datetime objects to help with filtering transactions
+        yield compact_dtypes(chunk, categories, pounds = True)
+
+
+def write_csv_file(path, df):
+    """
+    Writes transactions to a CSV file with DD-MM-YYYY dates, replacing it atomically.
+    """
+
+    write_atomic(path, to_csv_text(df).encode("utf-8"))
+
+
+def write_csv_batches(path, batches):
+    """
+    Writes batches of transactions to a CSV file one at a time, so they never all have to be in memory, replacing it atomically.
+
+    Returns the number of transactions written.
+    """
+
+    rows = 0
+    with atomic_file(path) as f:
+        f.write(",".join(HEADERS).encode("utf-8") + b"\n")
+        for batch in batches:
+            f.write(to_csv_text(batch, header = False).encode("utf-8"))
+            rows += len(batch)
+    return rows
+
+
+def empty_ledger(categories = None):
+    """
+    Returns an empty transactions DataFrame with the compact dtypes.
+    """
+
+    df = pd.DataFrame(columns = HEADERS)
+    # Explicitly set dtypes so pandas doesn't guess column types when concatenating new rows
+    return df.astype({
+        "Date": "datetime64[us]",
+        "Category": pd.CategoricalDtype(categories or []),
+        "Amount": "int64",
+        "Description": "category"
+    })
+
+
+def to_pence(pounds):
+    """
+    Converts amounts in pounds (a Series or array) to exact int64 pence.
+    """
+
+    return (pounds * 100).round().astype("int64")
+
+
+def compact_dtypes(df, categories = None, pounds = False):
+    """
+    Converts transactions to the compact dtypes every stored or loaded DataFrame uses.
+
+    Category becomes a Categorical over the valid categories, so it takes one
+    byte a row and is compared by code rather than by string, and Amount
+    becomes int64 pence, so sums are exact however many rows are added up.
+    Description becomes a Categorical too: each distinct description is kept
+    once, and each row only holds a code pointing at it.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Transactions with HEADERS columns (Description is optional).
+    categories : list of str, optional
+        The valid categories; defaults to the categories present in df.
+    pounds : bool
+        Whether Amount is in pounds (e.g. read from CSV text) rather than pence.
+
+    Raises
+    ------
+    ValueError
+        If a transaction's category is not one of categories.
+
+    Returns
+    -------
+    DataFrame
+        The transactions with compact dtypes.
+    """
+
+    category = pd.Categorical(df["Category"], categories = categories)
+    unknown = (category.codes < 0) & df["Category"].notna().values
+    if unknown.any():
+        raise ValueError(f"Unknown categories: {sorted(set(df['Category'][unknown]))}")
+
+    columns = {
+        "Category": category,
+        "Amount": to_pence(df["Amount"]) if pounds else df["Amount"].astype("int64")
+    }
+    if "Description" in df.columns:
+        columns["Description"] = df["Description"].astype("category")
+
+    return df.assign(**columns)
+
+
+def sort_by_date(df):
+    """
+    Returns transactions sorted by date, keeping the order of transactions on the same day.
+
+    A stable sort merges already-sorted runs (e.g. a sorted ledger and a batch
+    of new rows) in linear time, and nothing is copied if df is already sorted.
+    """
+
+    if df["Date"].is_monotonic_increasing:
+        return df
+    return df.sort_values("Date", kind = "stable", ignore_index = True)
+
+
+def concat_ledgers(frames):
+    """
+    Concatenates transactions DataFrames, keeping Category and Description as Categoricals.
+
+    pd.concat turns Categoricals with different categories (e.g. the
+    description pools of two partitions) into object columns, so those
+    columns are joined with union_categoricals instead.
+    """
+
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = [column for column in ("Category", "Description") if column in frames[0].columns]
+    df = pd.concat([frame.drop(columns = columns) for frame in frames], ignore_index = True)
+    for column in columns:
+        df[column] = union_categoricals([frame[column] for frame in frames])
+
+    return df[frames[0].columns]
+
+
+def to_csv_text(df, header = True):
+    """
+    Formats transactions as CSV text, with dates as DD-MM-YYYY strings and amounts in pounds.
+    """
+
+    df_to_save = df.copy()
+    df_to_save["Date"] = df_to_save["Date"].dt.strftime(DATE_FORMAT)
+    df_to_save["Amount"] = df_to_save["Amount"] / 100
+    return df_to_save.to_csv(index = False, header = header)
+
+
+@contextmanager
+def atomic_file(path):
+    """
+    Opens a temporary file to write in path's place, renamed over path once the block completes, so readers never see it half-written.
+
+    The file's directory is created if needed, e.g. a ledger directory nothing
+    has been stored in yet. If the block raises, the temporary file is removed
+    and path is left as it was.
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents = True, exist_ok = True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp") # Unique, as other processes and threads may write the same file
+
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        tmp_path.unlink(missing_ok = True)
+        raise
+
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path, data):
+    """
+    Writes a file via a temporary file and a rename (see atomic_file), so readers never see it half-written.
+    """
+
+    with atomic_file(path) as f:
+        f.write(data)
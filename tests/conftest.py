@@ -0,0 +1,38 @@
+"""
+Shared fixtures for the tests.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty working directory, where the tracker keeps its files by default.
+    """
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def transactions(rows, start = "2025-01-01", category = "Food", prefix = "transaction"):
+    """
+    Returns rows expenses of a category on consecutive days, with distinct descriptions and Amount in pence.
+    """
+
+    return pd.DataFrame({
+        "Date": pd.date_range(start, periods = rows, freq = "D"),
+        "Category": category,
+        "Amount": -(100.0 + pd.RangeIndex(rows) % 50 * 10),
+        "Description": [f"{prefix} {i}" for i in range(rows)]
+    })
@@ -0,0 +1,103 @@
+"""
+Tests for flagging unusual transactions and monthly spending spikes.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomalies import SKETCH_ACCURACY, CategoryStats, monthly_spikes
+from conftest import transactions
+from main import FinanceTracker
+
+CATEGORIES = FinanceTracker.VALID_CATEGORIES
+
+
+def monthly_bills(months, start = "2024-01-15"):
+    """
+    Returns a £60 phone bill in each of a number of months.
+    """
+
+    return pd.DataFrame({"Date": pd.date_range(start, periods = months, freq = "MS") + pd.Timedelta(days = 14), "Category": "Bills", "Amount": -6000.0, "Description": "Phone"})
+
+
+def test_statistics_match_numpy():
+    df = pd.concat([transactions(200), transactions(40, category = "Transport")], ignore_index = True)
+    batched = CategoryStats.from_batches([df.iloc[:70], df.iloc[70:150], df.iloc[150:]], CATEGORIES)
+    one_at_a_time = CategoryStats(CATEGORIES)
+    for category, pence in zip(df["Category"], df["Amount"]):
+        one_at_a_time.add(category, pence)
+
+    sizes = df.loc[df["Category"] == "Food", "Amount"].abs()
+    food = CATEGORIES.index("Food")
+    for stats in (batched, one_at_a_time):
+        assert stats.count[food] == 200
+        assert stats.mean[food] == pytest.approx(sizes.mean())
+        assert stats.std()[food] == pytest.approx(sizes.std())
+        assert stats.quantile(0.5)[food] == pytest.approx(np.quantile(sizes, 0.5, method = "lower"), rel = SKETCH_ACCURACY)
+        assert stats.quantile(0.99)[food] == pytest.approx(np.quantile(sizes, 0.99, method = "lower"), rel = SKETCH_ACCURACY)
+    assert np.array_equal(batched.sketch, one_at_a_time.sketch)
+
+
+def test_only_amounts_far_above_the_category_are_flagged():
+    stats = CategoryStats.from_batches([transactions(120), transactions(20, category = "Leisure")], CATEGORIES)
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-06-01", "2025-06-02", "2025-06-03", "2025-06-04", "2025-06-05"]),
+        "Category": ["Food", "Food", "Food", "Leisure", "Shopping"],
+        "Amount": [-50_000, -600, -10_000, -50_000, -50_000],
+        "Description": ["Banquet", "Lunch", "Party", "Concert", "Sofa"]
+    })
+
+    unusual = stats.unusual_amounts(df)
+
+    # Leisure has too few transactions to judge, and Shopping none
+    assert list(unusual["Description"]) == ["Banquet", "Party"]
+    assert list(unusual["Amount"]) == [-500.0, -100.0]
+    assert (unusual["Score"] >= CategoryStats.Z_THRESHOLD).all()
+    assert list(stats.unusual_amounts(df, z_threshold = 100)["Description"]) == ["Banquet"]
+
+
+def test_spikes_are_months_far_above_the_months_before():
+    cells = {(2024, month, "Bills"): [-6000 - month * 10, 1] for month in range(1, 13)}
+    cells[2024, 9, "Bills"] = [-30_000, 2]
+    cells[2024, 11, "Shopping"] = [-90_000, 1] # No history to compare with
+    cells[2024, 12, "Income"] = [500_000, 1] # Not an expense
+
+    spikes = monthly_spikes(cells, FinanceTracker.EXPENSE_CATEGORIES)
+
+    assert spikes[["year", "month", "category", "spent"]].values.tolist() == [[2024, 9, "Bills", 300.0]]
+    assert spikes["typical"].iloc[0] == pytest.approx(60.45)
+    assert monthly_spikes({}, FinanceTracker.EXPENSE_CATEGORIES).empty
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_detect_anomalies(workdir, out_of_core):
+    FinanceTracker().append_transactions(pd.concat([transactions(120), monthly_bills(12)], ignore_index = True))
+    ft = FinanceTracker(out_of_core = out_of_core)
+    ft.stage_transaction(datetime(2025, 2, 14), "Food", -450.0, "Banquet")
+    ft.stage_transaction(datetime(2025, 2, 15), "Food", -4.5, "Lunch")
+
+    unusual, spikes = ft.detect_anomalies()
+
+    assert list(unusual["Description"]) == ["Banquet"]
+    assert spikes.empty
+
+
+def test_import_reports_the_anomalies_it_brought_in(workdir):
+    FinanceTracker().append_transactions(pd.concat([transactions(120), monthly_bills(12)], ignore_index = True))
+    statement = workdir / "statement.csv"
+    statement.write_text("Date,Category,Amount,Description\n10-05-2025,Food,-3.50,Lunch\n15-01-2025,Bills,-350.00,Boiler repair\n12-05-2025,Food,-420.00,Banquet\n")
+    ordinary = workdir / "ordinary.csv"
+    ordinary.write_text("Date,Category,Amount,Description\n29-04-2025,Food,-4.00,Lunch\n15-02-2025,Bills,-60.00,Phone\n")
+
+    ft = FinanceTracker()
+    result = ft.import_csv([str(statement)], workers = 1)
+
+    assert result["imported"] == 3
+    assert len(result["anomalies"]) == 3
+    assert result["anomalies"][0].startswith("Unusual Food transaction on 12-05-2025: £420.00 for \"Banquet\"")
+    assert result["anomalies"][1] == "Bills spending spike in January 2025: £410.00 against a typical £60.00 a month"
+    assert result["anomalies"][2].startswith("Food spending spike in May 2025: £423.50")
+    assert ft.import_csv([str(ordinary)], workers = 1)["anomalies"] == []
@@ -0,0 +1,46 @@
+"""
+Tests for loading budgets saved next to the ledger.
+"""
+
+import pytest
+
+from main import FinanceTracker, main
+
+DAMAGED = [
+    '{"format": 1, "month',
+    '{"format": 99}',
+    '[1, 2]',
+    '{"format": 1, "monthly": [], "yearly": {}}',
+    '{"format": 1}'
+]
+
+
+@pytest.fixture
+def budgets_path(workdir):
+    """
+    Where the tracker keeps its budgets, with the ledger directory created.
+    """
+
+    path = workdir / "transactions.ledger" / "budgets.json"
+    path.parent.mkdir()
+    return path
+
+
+@pytest.mark.parametrize("content", DAMAGED)
+def test_damaged_budgets_are_ignored(budgets_path, content, capsys):
+    budgets_path.write_text(content)
+
+    ft = FinanceTracker()
+
+    assert "Ignoring damaged budgets" in capsys.readouterr().err
+    assert not ft.budgets.covers(FinanceTracker.EXPENSE_CATEGORIES)
+
+
+def test_budgets_can_be_set_again_after_damage(budgets_path, capsys):
+    budgets_path.write_text("not json")
+
+    main(["budget", "--monthly", "Food", "300"])
+    capsys.readouterr()
+
+    assert FinanceTracker().budgets.limits["monthly"] == {"Food": 30_000}
+    assert "Ignoring damaged budgets" not in capsys.readouterr().err
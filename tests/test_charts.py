@@ -0,0 +1,60 @@
+"""
+Tests for the chart cache.
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from charts import ChartCache, render_charts
+from conftest import transactions
+from main import FinanceTracker
+from reports import parse_query
+
+
+@pytest.fixture(autouse = True)
+def agg(monkeypatch):
+    """
+    Draws without a display.
+    """
+
+    monkeypatch.setenv("MPLBACKEND", "Agg")
+
+
+def render(ft, cache):
+    """
+    Renders the overview and cumulative charts, cached, and returns whether each came from the cache.
+    """
+
+    queries = [parse_query(query, FinanceTracker.VALID_CATEGORIES) for query in ["overview", "cumulative"]]
+    results = render_charts(ft, queries, "charts", cache = cache, data_version = ft.get_data_version(), workers = 1, income_categories = FinanceTracker.INCOME_CATEGORIES)
+    return [cached for path, cached in results]
+
+
+def cached_files(cache):
+    """
+    Returns the path of every cached image, relative to the cache.
+    """
+
+    return sorted(path.relative_to(cache.directory) for path in cache.directory.rglob("*") if path.is_file())
+
+
+def test_charts_of_older_data_versions_are_pruned(workdir):
+    ft = FinanceTracker()
+    ft.append_transactions(transactions(30))
+    cache = ChartCache(ft.store.aux_path("chart_cache"))
+
+    assert render(ft, cache) == [False, False]
+    assert render(ft, cache) == [True, True]
+    first = cached_files(cache)
+    assert len(first) == 2
+
+    ft.stage_transaction(datetime(2025, 3, 1), "Food", -5.0, "Lunch")
+    ft.write_unsaved()
+    assert render(ft, cache) == [False, False]
+
+    second = cached_files(cache)
+    assert len(second) == 2
+    assert not set(first) & set(second)
+    assert all(os.path.exists(f"charts/{name}") for name in ["overview.png", "cumulative.png"])
@@ -0,0 +1,77 @@
+"""
+Tests for starting from a checkpoint, and falling back to the ledger when it can't be used.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+
+
+def damage_state(checkpoint):
+    (checkpoint / "state.json").write_text("{\"format\": 1, \"snap")
+
+
+def truncate_column(checkpoint):
+    snapshot = checkpoint / json.loads((checkpoint / "state.json").read_text())["snapshot"]
+    np.save(snapshot / "amounts.npy", np.zeros(3, dtype = "int64"))
+
+
+def miscount_rows(checkpoint):
+    state = json.loads((checkpoint / "state.json").read_text())
+    state["cells"][0][4] += 1
+    (checkpoint / "state.json").write_text(json.dumps(state))
+
+
+def remove_snapshot(checkpoint):
+    snapshot = checkpoint / json.loads((checkpoint / "state.json").read_text())["snapshot"]
+    (snapshot / "dates.npy").unlink()
+
+
+@pytest.fixture
+def ledger(workdir):
+    """
+    A ledger with a checkpoint, and transactions saved after it.
+    """
+
+    ft = FinanceTracker()
+    ft.append_transactions(transactions(30, prefix = "checkpointed"))
+    ft.write_checkpoint()
+    ft.append_transactions(transactions(5, start = "2025-03-01", prefix = "after"))
+    return workdir / "transactions.ledger"
+
+
+def loaded(ft):
+    """
+    Returns the tracker's DataFrame with every staged transaction merged in.
+    """
+
+    ft.flush_pending_transactions()
+    return ft.df
+
+
+def test_restores_checkpoint_and_replays_tail(ledger):
+    ft = FinanceTracker()
+
+    assert ft.checkpoint_rows == 5 # Only the transactions saved after the checkpoint were read from the ledger
+    assert len(loaded(ft)) == 35
+    assert ft.verify_summary_cube() == []
+
+
+@pytest.mark.parametrize("damage", [damage_state, truncate_column, miscount_rows, remove_snapshot])
+def test_damaged_checkpoint_falls_back_to_ledger(ledger, damage, capsys):
+    damage(ledger / "checkpoint")
+
+    ft = FinanceTracker()
+
+    assert "Ignoring damaged checkpoint" in capsys.readouterr().err
+    df = loaded(ft)
+    assert len(df) == 35
+    assert df["Amount"].sum() == transactions(30)["Amount"].sum() + transactions(5)["Amount"].sum()
+    assert ft.verify_summary_cube() == []
+
+    # A new checkpoint was written in its place
+    assert FinanceTracker().checkpoint_rows == 0
@@ -0,0 +1,87 @@
+"""
+Tests that several processes appending to the same store at once lose and duplicate no transactions.
+
+A small version of benchmarks/bench_concurrent_append.py: each writer is a
+separate process with its own FinanceTracker, and the journal is compacted
+every few rows so appends race with compactions too.
+"""
+
+import multiprocessing
+import queue
+import time
+
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+from storage import LedgerStore
+
+WRITERS = 3
+BATCHES = 8
+BATCH = 5
+TIMEOUT = 30 # Seconds a writer waits for the others, so one that crashes fails the test rather than hanging it
+
+
+def write_batches(path, backend, writer, barrier, results):
+    """
+    Saves batches of transactions from one writer process, then reports what its own DataFrame ended up holding.
+    """
+
+    LedgerStore.COMPACT_EVERY = 2 * BATCH
+    ft = FinanceTracker(path, backend = backend)
+
+    barrier.wait(TIMEOUT)
+    for i in range(BATCHES):
+        ft.append_transactions(transactions(BATCH, start = "2025-01-01", prefix = f"writer {writer} batch {i} row"))
+
+    barrier.wait(TIMEOUT) # Every writer has finished, so the last merge sees everything
+    ft.merge_external_changes()
+    ft.flush_pending_transactions()
+    results.put((writer, len(ft.df), int(ft.df["Amount"].sum())))
+
+
+def collect(processes, results):
+    """
+    Returns every writer's report, stopping early if the writers have all exited without sending one.
+    """
+
+    reports, deadline = [], time.monotonic() + 4 * TIMEOUT
+    while len(reports) < len(processes) and time.monotonic() < deadline:
+        try:
+            reports.append(results.get(timeout = 1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    return reports
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_concurrent_appends_lose_nothing(workdir, backend):
+    path = workdir / ("transactions.ledger" if backend == "ledger" else "transactions.sqlite")
+    FinanceTracker(path, backend = backend).append_transactions(transactions(20, prefix = "existing"))
+
+    context = multiprocessing.get_context("spawn") # Each writer starts like a separate terminal would, sharing nothing
+    barrier, results = context.Barrier(WRITERS), context.Queue()
+    processes = [context.Process(target = write_batches, args = (path, backend, writer, barrier, results), daemon = True) for writer in range(WRITERS)]
+    for process in processes:
+        process.start()
+    try:
+        reports = collect(processes, results)
+    finally:
+        for process in processes:
+            process.join(TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+
+    assert len(reports) == WRITERS, "A writer failed; see its traceback above"
+
+    ft = FinanceTracker(path, backend = backend)
+    ft.flush_pending_transactions()
+    written = ft.df["Description"].astype(str)
+    written = written[written.str.startswith("writer ")]
+    expected = {f"writer {w} batch {i} row {j}" for w in range(WRITERS) for i in range(BATCHES) for j in range(BATCH)}
+
+    assert set(written) == expected # None lost
+    assert len(written) == len(expected) # None stored twice
+    assert len(ft.df) == 20 + len(expected)
+    assert all((rows, total) == (len(ft.df), int(ft.df["Amount"].sum())) for writer, rows, total in reports) # Every writer ended up with the same ledger
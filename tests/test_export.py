@@ -0,0 +1,39 @@
+"""
+Tests for exporting the report pack.
+"""
+
+import pandas as pd
+import pytest
+
+from conftest import transactions
+from export import export_reports
+from main import FinanceTracker
+
+
+@pytest.fixture(autouse = True)
+def agg(monkeypatch):
+    """
+    Draws without a display.
+    """
+
+    monkeypatch.setenv("MPLBACKEND", "Agg")
+
+
+@pytest.mark.parametrize("year", [None, 2025])
+def test_pages_of_every_year_are_labelled(workdir, year):
+    FinanceTracker().append_transactions(pd.concat([transactions(3, start = "2024-12-30"), transactions(2, start = "2025-03-01", category = "Bills")], ignore_index = True))
+    ft = FinanceTracker()
+
+    result = export_reports(ft, workdir / "pack", FinanceTracker.VALID_CATEGORIES, FinanceTracker.INCOME_CATEGORIES, "markdown", year, workers = 1)
+
+    index = (workdir / "pack" / "index.md").read_text(encoding = "utf-8")
+    names = sorted(path.name for path in result["pages"])
+    assert ("month-2024-12.md" in names) == (year is None)
+    assert "month-2025-03.md" in names and "category-bills.md" in names
+    if year is None:
+        assert index.startswith("# Finance Reports\n")
+        assert "## Overview\n" in index and "## Categories\n" in index
+    else:
+        assert index.startswith("# Finance Reports for 2025\n")
+        assert "## Overview (all years)\n" in index and "## Categories (all years)\n" in index
+        assert "## Months of 2024" not in index
@@ -0,0 +1,34 @@
+"""
+Tests for exporting every transaction as CSV.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker, main
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_export_has_every_transaction(workdir, out_of_core):
+    FinanceTracker().append_transactions(transactions(40, start = "2024-12-01"))
+    ft = FinanceTracker(out_of_core = out_of_core)
+    ft.stage_transaction(datetime(2025, 2, 1), "Income", 1200.0, "Salary") # Not saved yet
+
+    assert ft.export_csv(workdir / "export.csv") == 41
+
+    exported = pd.read_csv(workdir / "export.csv")
+    assert list(exported.columns) == ["Date", "Category", "Amount", "Description"]
+    assert sorted(exported["Description"]) == sorted(list(transactions(40)["Description"]) + ["Salary"])
+    assert round(exported["Amount"].sum() * 100) == transactions(40)["Amount"].sum() + 120_000
+
+
+def test_export_command_in_out_of_core_mode(workdir, capsys):
+    FinanceTracker().append_transactions(transactions(5))
+
+    main(["--out-of-core", "export-csv", "export.csv"])
+
+    assert "5 transaction(s) exported" in capsys.readouterr().out
+    assert len(pd.read_csv(workdir / "export.csv")) == 5
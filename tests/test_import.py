@@ -0,0 +1,125 @@
+"""
+Tests for bulk imports skipping transactions that are already stored.
+"""
+
+import multiprocessing
+from datetime import datetime
+
+import pytest
+
+from main import FinanceTracker, main
+
+STATEMENT = "Date,Category,Amount,Description\n01-05-2025,Food,-12.50,Lunch\n02-05-2025,Transport,-2.80,Bus\n02-05-2025,Transport,-2.80,Bus\n"
+
+
+@pytest.fixture
+def statement(workdir):
+    """
+    A statement file with three transactions, two of them identical.
+    """
+
+    path = workdir / "statement.csv"
+    path.write_text(STATEMENT)
+    return str(path)
+
+
+def stored(backend):
+    """
+    Returns every stored transaction, as a fresh process would see them.
+    """
+
+    ft = FinanceTracker(backend = backend)
+    ft.flush_pending_transactions()
+    return ft.df
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_reimport_is_skipped(statement, backend):
+    first = FinanceTracker(backend = backend).import_csv([statement], workers = 1)
+    second = FinanceTracker(backend = backend).import_csv([statement], workers = 1)
+
+    assert (first["imported"], first["duplicates"]) == (3, 0)
+    assert (second["imported"], second["duplicates"]) == (0, 3)
+    assert len(stored(backend)) == 3
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_rows_added_other_ways_are_duplicates(workdir, statement, backend):
+    ft = FinanceTracker(backend = backend)
+    ft.import_csv([statement], workers = 1) # Saves the index
+
+    # Then added one at a time, and by another process
+    ft.stage_transaction(datetime(2025, 5, 3), "Food", -4.2, "Coffee")
+    other = FinanceTracker(backend = backend)
+    other.stage_transaction(datetime(2025, 5, 4), "Shopping", -30.0, "Shoes")
+    other.write_unsaved()
+
+    later = workdir / "later.csv"
+    later.write_text("Date,Category,Amount,Description\n03-05-2025,Food,-4.20,Coffee\n04-05-2025,Shopping,-30.00,Shoes\n05-05-2025,Food,-8.00,Dinner\n")
+    result = ft.import_csv([str(later)], workers = 1)
+
+    assert (result["imported"], result["duplicates"]) == (1, 2)
+    assert len(stored(backend)) == 6
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+@pytest.mark.parametrize("rebuild", [False, True])
+def test_identical_rows_added_by_hand_are_counted(workdir, backend, rebuild):
+    one_fare = workdir / "one_fare.csv"
+    one_fare.write_text("Date,Category,Amount,Description\n02-05-2025,Transport,-2.80,Bus\n")
+    ft = FinanceTracker(backend = backend)
+    ft.import_csv([str(one_fare)], workers = 1)
+
+    # The second fare of the day is entered by hand
+    ft.stage_transaction(datetime(2025, 5, 2), "Transport", -2.8, "Bus")
+    ft.write_unsaved()
+    if rebuild:
+        ft.store.aux_path("import_hashes.npz").unlink() # Rebuilt from the whole store by the next import
+
+    both_fares = workdir / "both_fares.csv"
+    both_fares.write_text("Date,Category,Amount,Description\n02-05-2025,Transport,-2.80,Bus\n02-05-2025,Transport,-2.80,Bus\n03-05-2025,Transport,-2.80,Bus\n")
+    result = FinanceTracker(backend = backend).import_csv([str(both_fares)], workers = 1)
+
+    assert (result["imported"], result["duplicates"]) == (1, 2)
+    assert len(stored(backend)) == 3
+
+
+@pytest.mark.parametrize("content", [None, "Date,Amount\n01-05-2025,-2.00\n"])
+def test_unreadable_statement_is_reported(workdir, content, capsys):
+    path = workdir / "statement.csv"
+    if content is not None:
+        path.write_text(content)
+
+    with pytest.raises(SystemExit):
+        main(["import-csv", str(path)])
+
+    assert capsys.readouterr().err.startswith("Could not import the statements: ")
+
+
+def import_statement(backend, path, barrier, results):
+    """
+    Imports a statement from a separate process, starting at the same time as the others.
+    """
+
+    ft = FinanceTracker(backend = backend)
+    barrier.wait(30)
+    results.put(ft.import_csv([path], workers = 1)["imported"])
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_concurrent_imports_add_rows_once(workdir, statement, backend):
+    FinanceTracker(backend = backend).import_csv([statement], workers = 1)
+    path = workdir / "june.csv"
+    path.write_text("Date,Category,Amount,Description\n" + "".join(f"{day:02d}-06-2025,Food,-{day}.00,Meal {day}\n" for day in range(1, 29)))
+
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(3), context.Queue()
+    processes = [context.Process(target = import_statement, args = (backend, str(path), barrier, results), daemon = True) for _ in range(3)]
+    for process in processes:
+        process.start()
+    imported = sorted(results.get(timeout = 120) for _ in processes)
+    for process in processes:
+        process.join(30)
+
+    assert imported == [0, 0, 28]
+    assert len(stored(backend)) == 3 + 28
@@ -0,0 +1,92 @@
+"""
+Tests for the ledger store's journal: compaction, and reading what was appended since a position.
+"""
+
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+from storage import LedgerStore
+
+
+@pytest.fixture
+def store(workdir):
+    """
+    An empty ledger store in the working directory.
+    """
+
+    store = LedgerStore(workdir / "transactions.ledger", FinanceTracker.VALID_CATEGORIES)
+    store.open()
+    return store
+
+
+def descriptions(df):
+    """
+    Returns the descriptions of some transactions as a sorted list, to compare what was stored.
+    """
+
+    return sorted(df["Description"].astype(str))
+
+
+def test_compaction_keeps_every_row(store, monkeypatch):
+    monkeypatch.setattr(LedgerStore, "COMPACT_EVERY", 10)
+    batches = [transactions(4, start = f"2025-0{i + 1}-01", prefix = f"batch {i}") for i in range(5)]
+
+    for batch in batches:
+        store.append(batch)
+        if store.needs_compaction():
+            store.compact()
+    store.compact()
+
+    df = store.load()
+    assert descriptions(df) == sorted(sum((descriptions(batch) for batch in batches), []))
+    assert df["Amount"].sum() == sum(batch["Amount"].sum() for batch in batches)
+    assert not store.needs_compaction()
+    assert store.read_journal().empty
+
+
+def test_compaction_prunes_old_folded_journals(store):
+    for i in range(LedgerStore.FOLDED_JOURNALS + 3):
+        store.append(transactions(2, prefix = f"batch {i}"))
+        store.compact()
+
+    assert len(list(store.path.glob("journal.g*"))) == LedgerStore.FOLDED_JOURNALS
+    assert len(store.load()) == 2 * (LedgerStore.FOLDED_JOURNALS + 3)
+
+
+def test_read_since_follows_folded_journals(store):
+    store.append(transactions(3, prefix = "before"))
+    position = store.position()
+
+    added = [transactions(3, start = f"2025-0{i + 2}-01", prefix = f"after {i}") for i in range(3)]
+    store.append(added[0])
+    store.compact()
+    store.append(added[1])
+    store.compact()
+    store.append(added[2])
+
+    tail = store.read_since(position)
+    assert descriptions(tail) == sorted(sum((descriptions(batch) for batch in added), []))
+
+    assert store.read_since(store.position()).empty
+
+
+def test_read_since_gives_up_after_too_many_compactions(store):
+    store.append(transactions(1, prefix = "before"))
+    position = store.position()
+
+    for i in range(LedgerStore.FOLDED_JOURNALS + 1):
+        store.append(transactions(1, prefix = f"after {i}"))
+        store.compact()
+
+    assert store.read_since(position) is None
+
+
+def test_read_since_gives_up_after_bulk_insert(store):
+    store.append(transactions(2, prefix = "before"))
+    position = store.position()
+
+    store.bulk_insert([transactions(5, prefix = "bulk")])
+
+    assert store.read_since(position) is None
+    assert len(store.load()) == 7
@@ -0,0 +1,55 @@
+"""
+Tests for copying transactions between storage backends.
+"""
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from main import FinanceTracker, main
+
+SAMPLE = Path(__file__).resolve().parent.parent / "transactions.csv"
+
+
+def stored(backend):
+    """
+    Returns every stored transaction, as a fresh process would see them.
+    """
+
+    ft = FinanceTracker(backend = backend)
+    ft.flush_pending_transactions()
+    return ft.df
+
+
+@pytest.fixture
+def sample(workdir):
+    """
+    The sample transactions.csv in the working directory, which a new store would import on its own.
+    """
+
+    shutil.copy(SAMPLE, workdir / "transactions.csv")
+    return pd.read_csv(workdir / "transactions.csv")
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_migrate_copies_every_row_once(sample, backend, capsys):
+    main(["--backend", backend, "migrate", "transactions.csv"])
+
+    assert f"{len(sample)} transaction(s) migrated" in capsys.readouterr().out
+    df = stored(backend)
+    assert len(df) == len(sample)
+    assert df["Amount"].sum() == round(sample["Amount"].sum() * 100)
+    assert df.loc[df["Category"] == "Income", "Amount"].sum() == round(sample.loc[sample["Category"] == "Income", "Amount"].sum() * 100)
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_migrate_refuses_a_store_with_transactions(sample, backend, capsys):
+    main(["--backend", backend, "migrate", "transactions.csv"])
+
+    with pytest.raises(SystemExit):
+        main(["--backend", backend, "migrate", "transactions.csv"])
+
+    assert "already holds transactions" in capsys.readouterr().err
+    assert len(stored(backend)) == len(sample)
@@ -0,0 +1,135 @@
+"""
+Tests for parsing and running report queries, and writing them out.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from main import FinanceTracker, main
+from reports import QueryError, describe_query, format_csv, format_json, format_text, parse_query, run_report
+
+LEDGER = [
+    (datetime(2024, 12, 20), "Shopping", -40.0, "Gift"),
+    (datetime(2025, 5, 1), "Income", 1000.0, "Salary"),
+    (datetime(2025, 5, 3), "Food", -12.5, "Lunch"),
+    (datetime(2025, 5, 10), "Food", -7.5, "Dinner"),
+    (datetime(2025, 6, 1), "Transport", -2.8, "Bus")
+]
+
+
+@pytest.fixture
+def ft(workdir):
+    """
+    A tracker with the LEDGER transactions saved.
+    """
+
+    ft = FinanceTracker()
+    for transaction in LEDGER:
+        ft.stage_transaction(*transaction)
+    ft.write_unsaved()
+    return FinanceTracker()
+
+
+def report(ft, query):
+    """
+    Parses and runs one query.
+    """
+
+    return run_report(ft, parse_query(query, FinanceTracker.VALID_CATEGORIES))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("month --year 2025 --month May", {"report": "month", "year": 2025, "month": "May"}),
+    ("category food", {"report": "category", "category": "Food"}),
+    ("overview", {"report": "overview"}),
+    ("rolling --window 7 --category Food Leisure", {"report": "rolling", "window": 7, "categories": ["Food", "Leisure"]}),
+    ("search --from 01-05-2025 --max -10 --text 'lun din' --any", {"report": "search", "start": datetime(2025, 5, 1), "max_amount": -10.0, "text": "lun din", "any_term": True})
+])
+def test_valid_queries_are_parsed(query, expected):
+    args = parse_query(query, FinanceTracker.VALID_CATEGORIES)
+
+    assert {name: getattr(args, name) for name in expected} == expected
+    assert vars(parse_query(describe_query(args), FinanceTracker.VALID_CATEGORIES)) == vars(args)
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "weekly",
+    "month --year 2025",
+    "month --year twenty --month May",
+    "category Pets",
+    "rolling --window 0",
+    "daily --from 2025-05-01",
+    "overview --year 2025"
+])
+def test_invalid_queries_raise_query_error(query):
+    with pytest.raises(QueryError):
+        parse_query(query, FinanceTracker.VALID_CATEGORIES)
+
+
+@pytest.mark.parametrize("query", ["month --year 2025 --month Mayy", "month --year 2025 --month 13", "search --description '('"])
+def test_queries_that_only_fail_when_run(ft, query):
+    with pytest.raises(QueryError):
+        report(ft, query)
+
+
+def test_reports(ft):
+    month = report(ft, "month --year 2025 --month 5")
+    assert month["title"] == "Summary for May 2025"
+    assert month["rows"] == [{"period": "2025-05", "category": "Food", "amount": -20.0}, {"period": "2025-05", "category": "Income", "amount": 1000.0}]
+    assert (month["total_income"], month["total_expenses"]) == (1000.0, -20.0)
+
+    assert report(ft, "category Food")["rows"] == [{"period": "May", "category": "Food", "amount": -20.0, "transactions": 2}]
+
+    cumulative = report(ft, "cumulative")["rows"]
+    assert [row["period"] for row in cumulative] == ["2024-12", "2025-05", "2025-06"]
+    assert [row["cumulative"] for row in cumulative] == pytest.approx([-40.0, 940.0, 937.2])
+
+    overview = report(ft, "overview")
+    assert {row["category"]: row["amount"] for row in overview["rows"]} == {"Food": -20.0, "Income": 1000.0, "Shopping": -40.0, "Transport": -2.8}
+    assert overview["total_expenses"] == pytest.approx(-62.8)
+
+    daily = report(ft, "daily --from 01-05-2025 --to 03-05-2025")["rows"]
+    assert [(row["period"], row["amount"], row["cumulative"]) for row in daily] == [("2025-05-01", 1000.0, 960.0), ("2025-05-02", 0.0, 960.0), ("2025-05-03", -12.5, 947.5)]
+
+    rolling = report(ft, "rolling --window 7 --category Food --from 09-05-2025 --to 10-05-2025")
+    assert rolling["title"] == "7-day Totals by Category"
+    assert [row["amount"] for row in rolling["rows"]] == [-12.5, -7.5]
+
+    search = report(ft, "search --category Food --max -10")
+    assert search["rows"] == [{"period": "2025-05-03", "category": "Food", "amount": -12.5, "description": "Lunch"}]
+    assert (search["total_income"], search["total_expenses"]) == (0.0, -12.5)
+
+
+def test_formats(ft):
+    reports = [report(ft, "month --year 2025 --month May"), report(ft, "category Food")]
+
+    text = format_text(reports)
+    assert "Summary for May 2025:" in text
+    assert "May: £-20.00 (2 transaction(s), avg per transaction: £-10.00)" in text
+    assert "Total expenses: £-20.00" in text
+
+    assert json.loads(format_json(reports)) == reports
+
+    rows = list(csv.DictReader(io.StringIO(format_csv(reports))))
+    assert [(row["report"], row["category"], row["amount"]) for row in rows] == [
+        ("month", "Food", "-20.0"),
+        ("month", "Income", "1000.0"),
+        ("month", "Total income", "1000.0"),
+        ("month", "Total expenses", "-20.0"),
+        ("category", "Food", "-20.0")
+    ]
+    assert rows[-1]["transactions"] == "2"
+
+
+def test_report_command_skips_bad_queries(ft, capsys):
+    with pytest.raises(SystemExit):
+        main(["report", "overview", "category Pets", "--format", "json"])
+
+    output = capsys.readouterr()
+    assert [report["report"] for report in json.loads(output.out)] == ["overview"]
+    assert "Skipping query 'category Pets'" in output.err
@@ -0,0 +1,112 @@
+"""
+Tests for searching transactions by date range, category, amount and description.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+from search import TransactionQuery
+from storage import compact_dtypes
+
+
+@pytest.fixture
+def saved(workdir):
+    """
+    Saves four months of food, transport and income transactions, and returns them all in pence.
+    """
+
+    df = pd.concat([
+        transactions(120, start = "2025-01-01", prefix = "lunch at cafe"),
+        transactions(60, start = "2025-02-10", category = "Transport", prefix = "bus fare"),
+        pd.DataFrame({"Date": pd.to_datetime(["2025-01-31", "2025-02-28", "2025-03-31"]), "Category": "Income", "Amount": 250_000.0, "Description": "Salary"})
+    ], ignore_index = True)
+    FinanceTracker().append_transactions(df)
+    return df
+
+
+def expected(df, start = None, end = None, categories = None, min_pence = None, max_pence = None, description = None):
+    """
+    Filters transactions with a boolean mask over every row, and returns their descriptions sorted.
+    """
+
+    mask = pd.Series(True, index = df.index)
+    if start is not None:
+        mask &= df["Date"] >= start
+    if end is not None:
+        mask &= df["Date"] <= end
+    if categories is not None:
+        mask &= df["Category"].isin(categories)
+    if min_pence is not None:
+        mask &= df["Amount"] >= min_pence
+    if max_pence is not None:
+        mask &= df["Amount"] <= max_pence
+    if description is not None:
+        mask &= df["Description"].str.contains(description, case = False)
+    return sorted(df.loc[mask, "Description"])
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+@pytest.mark.parametrize("query, arguments", [
+    (TransactionQuery(), {}),
+    (TransactionQuery(datetime(2025, 2, 15), datetime(2025, 3, 2)), {"start": "2025-02-15", "end": "2025-03-02"}),
+    (TransactionQuery(datetime(2025, 3, 31), datetime(2025, 3, 31)), {"start": "2025-03-31", "end": "2025-03-31"}),
+    (TransactionQuery(end = datetime(2024, 12, 31)), {"end": "2024-12-31"}),
+    (TransactionQuery(categories = ["Transport", "Income"]), {"categories": ["Transport", "Income"]}),
+    (TransactionQuery(min_amount = -2.0, max_amount = -1.5), {"min_pence": -200, "max_pence": -150}),
+    (TransactionQuery(min_amount = 0), {"min_pence": 0}),
+    (TransactionQuery(description = r"CAFE 1\d$"), {"description": r"cafe 1\d$"}),
+    (TransactionQuery(datetime(2025, 2, 1), datetime(2025, 2, 28), ["Food"], max_amount = -4.0, description = "lunch"), {"start": "2025-02-01", "end": "2025-02-28", "categories": ["Food"], "max_pence": -400, "description": "lunch"})
+])
+def test_query_matches_a_full_scan(saved, out_of_core, query, arguments):
+    ft = FinanceTracker(out_of_core = out_of_core)
+    ft.stage_transaction(datetime(2025, 3, 31), "Food", -1.5, "Unsaved lunch at cafe")
+    df = pd.concat([saved, pd.DataFrame({"Date": [pd.Timestamp("2025-03-31")], "Category": ["Food"], "Amount": [-150.0], "Description": ["Unsaved lunch at cafe"]})], ignore_index = True)
+
+    matches = ft.search_transactions(query)
+
+    assert sorted(matches["Description"]) == expected(df, **{name: pd.Timestamp(value) if name in ("start", "end") else value for name, value in arguments.items()})
+    assert matches["Date"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_text_words_match_the_start_of_description_words(saved, out_of_core):
+    ft = FinanceTracker(out_of_core = out_of_core)
+
+    assert set(ft.search_transactions(TransactionQuery(text = "sal"))["Description"]) == {"Salary"}
+    assert len(ft.search_transactions(TransactionQuery(text = "bus far"))) == 60
+    assert len(ft.search_transactions(TransactionQuery(text = "bus caf"))) == 0
+    assert len(ft.search_transactions(TransactionQuery(text = "bus caf", any_term = True))) == 180
+    assert len(ft.search_transactions(TransactionQuery(datetime(2025, 4, 1), categories = ["Food"], text = "lunch"))) == 30
+
+
+def test_categorical_descriptions_with_missing_values():
+    df = compact_dtypes(pd.DataFrame({
+        "Date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"]),
+        "Category": "Food",
+        "Amount": [-100, -200, -300],
+        "Description": ["Lunch", None, "Late lunch"]
+    }))
+
+    matches = TransactionQuery(description = "lunch").apply(df)
+
+    assert list(matches["Amount"]) == [-100, -300]
+    assert isinstance(df["Description"].dtype, pd.CategoricalDtype)
+
+
+def test_date_window_is_found_by_binary_search():
+    dates = pd.to_datetime(["2025-01-01", "2025-01-05", "2025-01-05", "2025-01-09"]).values
+
+    assert TransactionQuery(datetime(2025, 1, 5), datetime(2025, 1, 5)).date_window(dates) == (1, 3)
+    assert TransactionQuery(datetime(2025, 1, 6), datetime(2025, 1, 8)).date_window(dates) == (3, 3)
+    assert TransactionQuery(datetime(2025, 1, 10), datetime(2025, 1, 1)).date_window(dates) == (4, 4)
+    assert TransactionQuery().date_window(dates) == (0, 4)
+    assert TransactionQuery(datetime(2025, 2, 1)).months((2024, 1), (2025, 12)) == ((2025, 2), (2025, 12))
+
+
+def test_invalid_pattern_raises_value_error():
+    with pytest.raises(ValueError, match = "Invalid description pattern"):
+        TransactionQuery(description = "(")
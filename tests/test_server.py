@@ -0,0 +1,70 @@
+"""
+Tests for the report server's append endpoint.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from main import FinanceTracker
+from server import ReportServer
+
+
+@pytest.fixture
+def server(workdir):
+    """
+    Serves a tracker on a free port for the length of a test.
+    """
+
+    server = ReportServer(FinanceTracker(), ("127.0.0.1", 0))
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body):
+    """
+    POSTs a raw body to /transactions and returns the status and decoded JSON reply.
+    """
+
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/transactions", data = body.encode("utf-8"), method = "POST")
+    try:
+        with urllib.request.urlopen(request, timeout = 10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_append_saves_valid_transactions(server):
+    status, result = post(server, json.dumps([{"Date": "01-05-2025", "Category": "Food", "Amount": "-12.50", "Description": "Lunch"}]))
+
+    assert status == 200
+    assert result["added"] == 1
+    reopened = FinanceTracker()
+    reopened.flush_pending_transactions()
+    assert len(reopened.df) == 1
+
+
+@pytest.mark.parametrize("body", ["[1, 2]", "[]", "\"text\"", "[{\"Date\": \"01-05-2025\"}]", "{\"Amount\": 5}", "not json"])
+def test_append_rejects_malformed_body(server, body):
+    status, result = post(server, body)
+
+    assert status == 400
+    assert "error" in result
+    assert server.ft.df.empty
+
+
+def test_append_reports_save_failure(server, monkeypatch):
+    def fail(df):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(server.ft, "append_transactions", fail)
+
+    status, result = post(server, json.dumps({"Date": "01-05-2025", "Category": "Food", "Amount": "-12.50", "Description": "Lunch"}))
+
+    assert status == 500
+    assert "No space left" in result["error"]
@@ -0,0 +1,31 @@
+"""
+Tests for starting the tracker with nothing stored yet.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from main import FinanceTracker, main
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_tracker_starts_in_empty_directory(workdir, backend):
+    ft = FinanceTracker(backend = backend)
+    assert ft.df.empty
+
+    ft.stage_transaction(datetime(2025, 5, 1), "Food", -12.5, "Lunch")
+    ft.write_unsaved()
+
+    reopened = FinanceTracker(backend = backend)
+    reopened.flush_pending_transactions()
+    assert len(reopened.df) == 1
+    assert reopened.df["Amount"].sum() == -1250
+
+
+def test_commands_run_in_empty_directory(workdir, capsys):
+    main(["budget"])
+    assert "No budgets set" in capsys.readouterr().out
+
+    main(["budget", "--monthly", "Food", "300"])
+    assert (workdir / "transactions.ledger" / "budgets.json").exists()
@@ -0,0 +1,69 @@
+"""
+Tests that the incrementally maintained summary cube matches a full recompute (FinanceTracker.verify_summary_cube).
+"""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+
+
+def assert_cube_consistent(ft, in_place = True):
+    """
+    Checks the cube matches a recompute, and (unless in_place is False) that it was kept up to date in place rather than rebuilt.
+    """
+
+    if in_place:
+        assert ft.summary_cube is not None and ft.summary_cube.version == ft.data_version
+    assert ft.verify_summary_cube() == []
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_cube_stays_consistent(workdir, backend, out_of_core):
+    FinanceTracker(backend = backend).append_transactions(transactions(40, start = "2024-11-15"))
+    ft = FinanceTracker(out_of_core = out_of_core, backend = backend)
+    ft.get_summary_cube()
+
+    # Staged
+    ft.stage_transaction(datetime(2025, 1, 3), "Food", -12.5, "Lunch")
+    ft.stage_transaction(datetime(2025, 2, 28), "Income", 1500.0, "Salary")
+    ft.stage_transaction(datetime(2026, 3, 1), "Refund", 20.0, "Returned shoes")
+    assert_cube_consistent(ft)
+
+    # Saved
+    ft.write_unsaved()
+    assert_cube_consistent(ft)
+
+    # Imported
+    statement = workdir / "statement.csv"
+    statement.write_text("Date,Category,Amount,Description\n05-01-2025,Bills,-60.00,Phone\n06-04-2025,Shopping,-35.99,Shoes\n01-01-2023,Income,100.00,Gift\n")
+    result = ft.import_csv([str(statement)], workers = 1)
+    assert result["imported"] == 3
+    assert_cube_consistent(ft)
+
+    # Saved by another process, then merged in (in out-of-core mode the summaries are rebuilt from the store instead)
+    FinanceTracker(backend = backend).append_transactions(transactions(25, start = "2025-03-20", category = "Transport", prefix = "other"))
+    assert ft.merge_external_changes()
+    assert_cube_consistent(ft, in_place = not out_of_core)
+
+
+@pytest.mark.parametrize("backend", ["ledger", "sqlite"])
+def test_loaded_cube_is_totalled_by_store(workdir, backend, monkeypatch):
+    FinanceTracker(backend = backend).append_transactions(transactions(40, start = "2024-11-15"))
+    ft = FinanceTracker(backend = backend)
+    ft.stage_transaction(datetime(2025, 1, 3), "Food", -12.5, "Unsaved lunch")
+
+    calls = []
+    summary_cells = ft.store.summary_cells
+    monkeypatch.setattr(ft.store, "summary_cells", lambda: calls.append(1) or summary_cells())
+
+    assert ft.build_summary_cube().differences(ft.build_summary_cube(from_manifest = False)) == []
+    assert calls == [1]
+
+    # Once another process has written, the store holds transactions the DataFrame doesn't, so the DataFrame is grouped instead
+    FinanceTracker(backend = backend).append_transactions(transactions(5, start = "2025-06-01", prefix = "other"))
+    assert ft.build_summary_cube().differences(ft.build_summary_cube(from_manifest = False)) == []
+    assert calls == [1]
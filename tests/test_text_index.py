@@ -0,0 +1,94 @@
+"""
+Tests for the description index: building it, updating it, looking words up, and keeping it across saves.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+from text_index import DescriptionIndex, tokenize
+
+DESCRIPTIONS = pd.DataFrame({
+    "Amount": [-1099, -1099, -450, -320, 250_000],
+    "Description": ["Netflix subscription", "Netflix subscription", "Lunch at Café Nero", "Net bag", "Salary"]
+})
+
+
+def contents(index):
+    """
+    Returns what an index holds, whatever order its descriptions were added in.
+    """
+
+    return index.descriptions, index.postings, index.tokens
+
+
+def expected(df):
+    """
+    Returns the contents of an index built from scratch over a DataFrame of transactions.
+    """
+
+    return contents(DescriptionIndex.from_batches([df]))
+
+
+def test_tokens_are_lower_case_words_without_accents():
+    assert tokenize("Lunch at Café-Nero, 2x") == ["lunch", "at", "cafe", "nero", "2x"]
+
+
+def test_build_and_lookup():
+    index = DescriptionIndex.from_batches([DESCRIPTIONS.iloc[:2], DESCRIPTIONS.iloc[2:]])
+
+    assert index.descriptions["Netflix subscription"] == [2, -2198]
+    assert index.match("net") == {"Netflix subscription", "Net bag"}
+    assert index.match("NETF sub") == {"Netflix subscription"}
+    assert index.match("cafe") == {"Lunch at Café Nero"}
+    assert index.match("netf lunch") == set()
+    assert index.match("netf lunch", any_term = True) == {"Netflix subscription", "Lunch at Café Nero"}
+    assert index.match("rent") == index.match("") == set()
+    assert index.totals(index.match("net")) == (3, -2518)
+
+
+def test_update_matches_a_build():
+    index = DescriptionIndex.from_batches([DESCRIPTIONS.iloc[:3]])
+    index.add("Net bag", -320)
+    index.add_dataframe(DESCRIPTIONS.iloc[4:])
+
+    assert contents(index) == expected(DESCRIPTIONS)
+
+
+def test_saved_index_is_only_loaded_for_its_store_version(tmp_path):
+    index = DescriptionIndex.from_batches([DESCRIPTIONS], tmp_path / "index.json")
+    index.save("v1")
+
+    loaded = DescriptionIndex.load(tmp_path / "index.json", "v1")
+    assert loaded.state() == index.state()
+    assert loaded.match("sal") == {"Salary"}
+    assert DescriptionIndex.load(tmp_path / "index.json", "v2") is None
+    assert DescriptionIndex.load(tmp_path / "missing.json", "v1") is None
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_index_is_updated_in_place_and_saved(workdir, out_of_core, monkeypatch):
+    FinanceTracker().append_transactions(transactions(50, prefix = "coffee"))
+    ft = FinanceTracker(out_of_core = out_of_core)
+    index = ft.get_description_index() # Built from the store
+
+    ft.stage_transaction(datetime(2025, 3, 1), "Food", -4.2, "Sandwich")
+    assert ft.get_description_index() is index # Updated in place, not rebuilt
+    assert index.match("sand") == {"Sandwich"}
+    df = pd.concat([transactions(50, prefix = "coffee"), pd.DataFrame({"Amount": [-420.0], "Description": ["Sandwich"]})])
+    built = expected(df)
+    assert contents(index) == built
+
+    ft.write_unsaved() # Saves the index with the store's new version
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("the saved index was rebuilt")
+
+    monkeypatch.setattr(DescriptionIndex, "from_batches", no_rebuild)
+    loaded = FinanceTracker(out_of_core = out_of_core).get_description_index()
+    assert loaded.match("sand") == {"Sandwich"}
+    assert loaded.match("coffee 4") == {"coffee 4"} | {f"coffee {i}" for i in range(40, 50)}
+    assert contents(loaded) == built
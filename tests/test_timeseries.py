@@ -0,0 +1,83 @@
+"""
+Tests that the incrementally updated daily series matches one rebuilt from every transaction.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import transactions
+from main import FinanceTracker
+from timeseries import DailySeries
+
+CATEGORIES = FinanceTracker.VALID_CATEGORIES
+
+
+def assert_matches_rebuild(series, df):
+    """
+    Checks the series' balances and rolling totals are those of a series built from df in one pass.
+    """
+
+    rebuilt = DailySeries.from_dataframe(df, CATEGORIES)
+
+    assert np.array_equal(series.dates(), rebuilt.dates())
+    for got, expected in zip(series.running_balance(), rebuilt.running_balance()):
+        assert np.array_equal(got, expected)
+    for window, categories in [(7, None), (30, ["Food", "Transport"]), (90, ["Income"])]:
+        for got, expected in zip(series.rolling(window, categories), rebuilt.rolling(window, categories)):
+            assert np.array_equal(got, expected)
+    assert np.array_equal(series.running_balance(datetime(2025, 2, 1), datetime(2025, 2, 10))[2], rebuilt.running_balance(datetime(2025, 2, 1), datetime(2025, 2, 10))[2])
+
+
+def row(date, category, pence):
+    """
+    Returns a one-transaction DataFrame.
+    """
+
+    return pd.DataFrame({"Date": [pd.Timestamp(date)], "Category": [category], "Amount": [pence]})
+
+
+def test_appends_match_a_rebuild():
+    df = transactions(60, start = "2025-01-01")
+    series = DailySeries.from_dataframe(df, CATEGORIES)
+    assert_matches_rebuild(series, df) # Brings the prefix sums up to date, so only the later days are recomputed below
+
+    appends = [
+        row("2025-03-01", "Food", -250), # The day after the last
+        row("2025-03-01", "Income", 100_000), # The same day again
+        row("2025-03-15", "Transport", -280), # A gap of empty days
+        row("2025-02-10", "Shopping", -4_000), # Inside the range, so later prefix sums change
+        row("2026-06-30", "Bills", -6_000), # Beyond the room kept for new days
+        row("2024-11-01", "Leisure", -1_500) # Before every other day, so the table shifts
+    ]
+    for append in appends:
+        date, category, pence = append.iloc[0]
+        series.add(date, category, pence)
+        df = pd.concat([df, append], ignore_index = True)
+        assert_matches_rebuild(series, df)
+
+    batch = transactions(45, start = "2026-06-15", category = "Transport")
+    series.add_dataframe(batch)
+    assert_matches_rebuild(series, pd.concat([df, batch], ignore_index = True))
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_tracker_keeps_the_series_current(workdir, out_of_core):
+    FinanceTracker().append_transactions(transactions(60, start = "2025-01-01"))
+    ft = FinanceTracker(out_of_core = out_of_core)
+    series = ft.get_daily_series()
+    series.prefix_sums()
+
+    ft.stage_transaction(datetime(2025, 3, 2), "Food", -3.5, "Coffee")
+    ft.stage_transaction(datetime(2025, 3, 2), "Income", 1200.0, "Salary")
+    statement = workdir / "statement.csv"
+    statement.write_text("Date,Category,Amount,Description\n03-03-2025,Bills,-60.00,Phone\n20-02-2025,Shopping,-35.99,Shoes\n")
+    assert ft.import_csv([str(statement)], workers = 1)["imported"] == 2
+    ft.write_unsaved()
+
+    assert ft.get_daily_series() is series # Updated in place, not rebuilt
+    ft = FinanceTracker()
+    ft.flush_pending_transactions()
+    assert_matches_rebuild(series, ft.df)
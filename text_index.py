@@ -0,0 +1,245 @@
+"""
+Inverted index for searching transaction descriptions by word.
+
+Descriptions repeat a lot (every month has a "Monthly rent"), so the index
+is kept over distinct descriptions rather than rows: each token points at
+the descriptions containing it, and each description keeps the number and
+total (in pence) of its transactions. A query is answered from the index
+alone, without looking at a single row, and the matching rows are found
+afterwards by their Description codes (see search.TransactionQuery).
+
+Tokens are lower-cased words with accents removed, so "cafe" finds
+"Lunch at café". Every query term is a prefix ("netf" finds "Netflix
+subscription"), and a description has to match every term unless any_term
+is set. The tokens are kept sorted, so the tokens a prefix covers are found
+by binary search.
+"""
+
+import bisect
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+from instrumentation import tracer
+from storage import write_atomic
+
+INDEX_VERSION = 1
+
+
+def tokenize(text):
+    """
+    Returns the lower-cased words of text, with accents removed.
+    """
+
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return re.findall(r"\w+", "".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+class DescriptionIndex:
+    """
+    Token -> descriptions postings, plus the count and total of every description's transactions.
+    """
+
+    def __init__(self, path = None, version = None):
+        """
+        Initialises an empty index.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            Where the index is saved.
+        version : int, optional
+            The data version of the transactions the index covers.
+        """
+
+        self.path = None if path is None else Path(path)
+        self.version = version
+        self.postings = {} # token -> set of descriptions containing it
+        self.tokens = [] # Every token, sorted, for prefix lookups
+        self.descriptions = {} # description -> [number of transactions, total in pence]
+
+    @classmethod
+    def from_batches(cls, batches, path = None, version = None):
+        """
+        Builds the index from transactions read in batches, one pass over the data.
+
+        Parameters
+        ----------
+        batches : iterable of DataFrame
+            Transactions with Amount (in pence) and Description columns.
+        path : str or Path, optional
+            Where the index is saved.
+        version : int, optional
+            The data version of the transactions.
+
+        Returns
+        -------
+        DescriptionIndex
+            The populated index.
+        """
+
+        index = cls(path, version)
+        for batch in batches:
+            index.add_dataframe(batch)
+        return index
+
+    @classmethod
+    def load(cls, path, store_version):
+        """
+        Reads a saved index if it was saved for the store's current version.
+
+        Parameters
+        ----------
+        path : str or Path
+            The saved index.
+        store_version : str
+            The store's current version (see TransactionStore.version).
+
+        Returns
+        -------
+        DescriptionIndex or None
+            The index, or None if there is none or the ledger has changed since it was saved.
+        """
+
+        path = Path(path)
+        try:
+            saved = json.loads(path.read_text(encoding = "utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if saved.get("format") != INDEX_VERSION or saved.get("store_version") != store_version:
+            return None
+
+        index = cls.from_state(saved)
+        index.path = path
+        return index
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuilds an index from the dict state() returned, e.g. one stored in a checkpoint.
+        """
+
+        index = cls()
+        descriptions = [description for description, count, total in state["descriptions"]]
+        index.descriptions = {description: [count, total] for description, count, total in state["descriptions"]}
+        index.postings = {token: {descriptions[i] for i in ids} for token, ids in state["postings"].items()}
+        index.tokens = sorted(index.postings)
+        return index
+
+    def state(self):
+        """
+        Returns the index as a JSON-serialisable dict, with postings as positions in the list of descriptions.
+        """
+
+        ids = {description: i for i, description in enumerate(self.descriptions)}
+        return {
+            "descriptions": [[description, count, total] for description, (count, total) in self.descriptions.items()],
+            "postings": {token: sorted(ids[description] for description in descriptions) for token, descriptions in self.postings.items()}
+        }
+
+    def save(self, store_version, state = None):
+        """
+        Writes the index atomically, tagged with the store version it matches.
+
+        Parameters
+        ----------
+        store_version : str
+            The store's version once the indexed transactions were saved.
+        state : dict, optional
+            The state() to write, if it was taken earlier (e.g. under a lock); defaults to the current state.
+
+        Returns
+        -------
+        None
+        """
+
+        saved = {"format": INDEX_VERSION, "store_version": store_version, **(state or self.state())}
+        write_atomic(self.path, json.dumps(saved, ensure_ascii = False).encode("utf-8"))
+
+    def add_dataframe(self, df):
+        """
+        Adds every transaction in a DataFrame to the index, with one groupby.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions with Amount (in pence) and Description columns.
+
+        Returns
+        -------
+        None
+        """
+
+        if df.empty:
+            return
+
+        grouped = df["Amount"].groupby(df["Description"], observed = True).agg(["count", "sum"])
+        for description, count, total in zip(grouped.index, grouped["count"], grouped["sum"]):
+            self.add_description(description, int(count), int(total))
+
+    def add(self, description, pence):
+        """
+        Adds a single transaction to the index; O(1) unless its description is new.
+        """
+
+        self.add_description(description, 1, pence)
+
+    def add_description(self, description, count, total):
+        """
+        Adds transactions with one description, indexing the description's tokens the first time it is seen.
+        """
+
+        totals = self.descriptions.get(description)
+        if totals is None:
+            totals = self.descriptions[description] = [0, 0]
+            for token in set(tokenize(description)):
+                if token not in self.postings:
+                    self.postings[token] = set()
+                    bisect.insort(self.tokens, token)
+                self.postings[token].add(description)
+
+        totals[0] += count
+        totals[1] += total
+
+    def match(self, text, any_term = False):
+        """
+        Returns the descriptions matching a query.
+
+        Parameters
+        ----------
+        text : str
+            The query's terms, each matched as a prefix of a description's words.
+        any_term : bool
+            Whether a description matching any term counts, rather than only those matching every term.
+
+        Returns
+        -------
+        set of str
+            The matching descriptions.
+        """
+
+        with tracer.span("description index: match", len(self.tokens)):
+            matches = None
+            for term in tokenize(text):
+                # Every token starting with term sorts between term itself and term followed by the highest character
+                first = bisect.bisect_left(self.tokens, term)
+                stop = bisect.bisect_left(self.tokens, term + "\U0010ffff", first)
+                described = set().union(*(self.postings[token] for token in self.tokens[first:stop]))
+
+                if matches is None:
+                    matches = described
+                else:
+                    matches = matches | described if any_term else matches & described
+
+        return matches or set()
+
+    def totals(self, descriptions):
+        """
+        Returns the number and total in pence of the transactions with any of the given descriptions.
+        """
+
+        count = sum(self.descriptions[description][0] for description in descriptions)
+        total = sum(self.descriptions[description][1] for description in descriptions)
+        return count, total
@@ -0,0 +1,257 @@
+"""
+Daily series for the Personal-Finance Tracker.
+
+The summary cube (see aggregates.py) stops at month granularity. The daily
+running balance and the rolling 7/30/90-day spend per category are instead
+read from a DailySeries: a (day, category) table of totals in pence covering
+every calendar day from the first transaction to the last. A ledger spanning
+ten years has about 3,650 rows of 9 categories, however many transactions
+it holds, so the series are worked out from this table with cumulative sums
+rather than from the transactions.
+
+Adding a transaction changes one cell in O(1). The table's prefix sums are
+kept as well, and only the rows from the earliest changed day onwards are
+recomputed when a series is next read. Appending transactions dated after
+everything else, the usual case, therefore recomputes only the last few days.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class DailySeries:
+    """
+    Sum of transactions for every (day, category), with prefix sums that are brought up to date lazily.
+
+    Days are numbered from the first day covered (day 0), and totals are in pence as integers so every series is exact.
+    """
+
+    GROWTH_DAYS = 366 # Days of room added beyond the last day, so appending a new day rarely reallocates
+
+    def __init__(self, categories, version = None):
+        """
+        Initialises an empty series.
+
+        Parameters
+        ----------
+        categories : list of str
+            The valid categories, in the order of the table's columns.
+        version : int, optional
+            The data version the series was built from.
+        """
+
+        self.categories = list(categories)
+        self.codes = {category: code for code, category in enumerate(self.categories)}
+        self.first_day = None # Days since January 1970 of row 0
+        self.days = 0 # Rows in use, from the first day to the last day with a transaction
+        self.totals = np.zeros((0, len(self.categories)), dtype = "int64")
+        self.prefix = np.zeros((1, len(self.categories)), dtype = "int64") # prefix[i] is the sum of totals[:i]
+        self.valid = 0 # prefix[:valid + 1] is up to date
+        self.version = version
+
+    @classmethod
+    def from_chunks(cls, chunks, categories, version = None):
+        """
+        Builds the series from transactions streamed in chunks, one pass over the data.
+
+        Parameters
+        ----------
+        chunks : iterable of DataFrame
+            Chunks of transactions, with Date, Category and Amount (in pence) columns.
+        categories : list of str
+            The valid categories.
+        version : int, optional
+            The data version of the transactions.
+
+        Returns
+        -------
+        DailySeries
+            The populated series.
+        """
+
+        series = cls(categories, version = version)
+        for chunk in chunks:
+            series.add_dataframe(chunk)
+        return series
+
+    @classmethod
+    def from_dataframe(cls, df, categories, version = None):
+        """
+        Builds the series with a single pass over the transactions.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The transactions, with Date, Category and Amount (in pence) columns.
+        categories : list of str
+            The valid categories.
+        version : int, optional
+            The data version of df.
+
+        Returns
+        -------
+        DailySeries
+            The populated series.
+        """
+
+        return cls.from_chunks([df], categories, version)
+
+    def add_dataframe(self, df):
+        """
+        Adds every transaction in a DataFrame to the series, with one scatter-add into the table.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Transactions with Date, Category and Amount (in pence) columns.
+
+        Returns
+        -------
+        None
+        """
+
+        if df.empty:
+            return
+
+        days = df["Date"].values.astype("datetime64[D]").astype("int64")
+        if isinstance(df["Category"].dtype, pd.CategoricalDtype) and list(df["Category"].cat.categories) == self.categories:
+            codes = df["Category"].cat.codes.values.astype("int64")
+        else:
+            codes = pd.Categorical(df["Category"], categories = self.categories).codes.astype("int64")
+        pence = df["Amount"].values.astype("int64")
+
+        first, last = int(days.min()), int(days.max())
+        self.cover(first, last)
+
+        # A flat index into the table, so np.add.at sums repeated (day, category) pairs exactly in int64
+        np.add.at(self.totals.reshape(-1), (days - self.first_day) * len(self.categories) + codes, pence)
+        self.valid = min(self.valid, first - self.first_day)
+
+    def add(self, date, category, pence):
+        """
+        Adds a single transaction to the series in O(1), unless it is dated beyond the table's room.
+
+        Parameters
+        ----------
+        date : datetime
+            The date of the transaction.
+        category : str
+            The category of the transaction.
+        pence : int
+            The amount in pence.
+
+        Returns
+        -------
+        None
+        """
+
+        day = int(np.datetime64(date, "D").astype("int64"))
+        self.cover(day, day)
+        self.totals[day - self.first_day, self.codes[category]] += pence
+        self.valid = min(self.valid, day - self.first_day)
+
+    def cover(self, first, last):
+        """
+        Makes room in the table for the days first to last (days since January 1970).
+        """
+
+        if self.first_day is None:
+            self.first_day = first
+        elif first < self.first_day:
+            # Transactions dated before every other one shift the whole table down; every prefix sum changes
+            shift = self.first_day - first
+            self.totals = np.concatenate([np.zeros((shift, len(self.categories)), dtype = "int64"), self.totals])
+            self.first_day, self.days, self.valid = first, self.days + shift, 0
+
+        needed = last - self.first_day + 1
+        if needed > len(self.totals):
+            grown = np.zeros((needed + DailySeries.GROWTH_DAYS, len(self.categories)), dtype = "int64")
+            grown[:self.days] = self.totals[:self.days]
+            self.totals = grown
+        self.days = max(self.days, needed)
+
+    def prefix_sums(self):
+        """
+        Returns the (days + 1, categories) prefix sums of the table, recomputing only the rows after the earliest change.
+        """
+
+        if len(self.prefix) < len(self.totals) + 1:
+            grown = np.zeros((len(self.totals) + 1, len(self.categories)), dtype = "int64")
+            grown[:self.valid + 1] = self.prefix[:self.valid + 1]
+            self.prefix = grown
+
+        if self.valid < self.days:
+            self.prefix[self.valid + 1:self.days + 1] = self.prefix[self.valid] + np.cumsum(self.totals[self.valid:self.days], axis = 0)
+            self.valid = self.days
+        return self.prefix[:self.days + 1]
+
+    def dates(self):
+        """
+        Returns the date of every day the series covers, as datetime64[D].
+        """
+
+        return (self.first_day + np.arange(self.days)).astype("datetime64[D]") if self.days else np.array([], dtype = "datetime64[D]")
+
+    def window(self, start = None, end = None):
+        """
+        Returns the (first, last + 1) day numbers covering start to end (dates), clipped to the series.
+        """
+
+        first = 0 if start is None else int(np.datetime64(start, "D").astype("int64")) - self.first_day
+        last = self.days if end is None else int(np.datetime64(end, "D").astype("int64")) - self.first_day + 1
+        return max(first, 0), min(max(last, 0), self.days)
+
+    def running_balance(self, start = None, end = None):
+        """
+        Works out the net amount and the running net balance at the end of every day.
+
+        Parameters
+        ----------
+        start : datetime, optional
+            The first day to return; the balance still counts every earlier transaction.
+        end : datetime, optional
+            The last day to return.
+
+        Returns
+        -------
+        tuple
+            The days (datetime64[D]), each day's net amount and the balance at
+            the end of each day, both in pence.
+        """
+
+        if not self.days:
+            return self.dates(), np.array([], dtype = "int64"), np.array([], dtype = "int64")
+
+        first, last = self.window(start, end)
+        balance = self.prefix_sums()[first:last + 1].sum(axis = 1)
+        return self.dates()[first:last], np.diff(balance), balance[1:]
+
+    def rolling(self, window, categories = None, start = None, end = None):
+        """
+        Works out each category's total over the window days up to and including every day.
+
+        Parameters
+        ----------
+        window : int
+            The number of days in each window, e.g. 7, 30 or 90.
+        categories : list of str, optional
+            The categories to return; defaults to every category.
+        start : datetime, optional
+            The first day to return; its window still reaches back before it.
+        end : datetime, optional
+            The last day to return.
+
+        Returns
+        -------
+        tuple
+            The days (datetime64[D]) and a (days, categories) array of totals in pence.
+        """
+
+        columns = [self.codes[category] for category in (categories or self.categories)]
+        if not self.days:
+            return self.dates(), np.zeros((0, len(columns)), dtype = "int64")
+
+        first, last = self.window(start, end)
+        prefix = self.prefix_sums()[:, columns]
+        ends = np.arange(first + 1, last + 1)
+        return self.dates()[first:last], prefix[ends] - prefix[np.maximum(ends - window, 0)]